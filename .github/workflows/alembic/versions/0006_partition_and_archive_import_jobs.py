@@ -0,0 +1,150 @@
+"""partition import_jobs by created_at, add archive table, drop redundant indexes
+
+Revision ID: 0006_partition_and_archive_import_jobs
+Revises: 0005_auth_and_pii_hardening
+Create Date: 2026-03-02
+"""
+
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+revision: str = '0006_partition_and_archive_import_jobs'
+down_revision: Union[str, None] = '0005_auth_and_pii_hardening'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+# content was replaced by content_sha256/content_preview_masked in 0005 and is not carried over
+JOB_COLUMNS = (
+    'job_id, user_id, status, progress_percent, attempts, channel, content_sha256, '
+    'content_preview_masked, last_error, created_at, updated_at'
+)
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_monthly_partitions(first: date, last: date) -> None:
+    month = first
+    while month <= last:
+        upper = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE IF NOT EXISTS import_jobs_p{month:%Y_%m} PARTITION OF import_jobs "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+        month = upper
+
+
+def _partition_import_jobs() -> None:
+    current = datetime.now(timezone.utc).date().replace(day=1)
+    first = current
+    if not context.is_offline_mode():
+        oldest = op.get_bind().execute(sa.text('SELECT min(created_at) FROM import_jobs')).scalar()
+        if oldest is not None:
+            first = min(first, oldest.date().replace(day=1))
+
+    for name in ('ix_import_jobs_user_status_created_at', 'ix_import_jobs_created_at', 'ix_import_jobs_content_sha256'):
+        op.execute(f'DROP INDEX IF EXISTS {name}')
+    op.execute('ALTER TABLE import_jobs RENAME TO import_jobs_unpartitioned')
+    op.execute(
+        """
+        CREATE TABLE import_jobs (
+            job_id VARCHAR(64) NOT NULL,
+            user_id VARCHAR(64) NOT NULL,
+            status VARCHAR(16) NOT NULL,
+            progress_percent INTEGER NOT NULL DEFAULT 0,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            channel VARCHAR(32) NOT NULL,
+            content_sha256 VARCHAR(64),
+            content_preview_masked TEXT,
+            last_error TEXT,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            updated_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            PRIMARY KEY (job_id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    _create_monthly_partitions(first, _add_months(current, MONTHS_AHEAD))
+    op.execute('CREATE TABLE import_jobs_default PARTITION OF import_jobs DEFAULT')
+    op.execute(f'INSERT INTO import_jobs ({JOB_COLUMNS}) SELECT {JOB_COLUMNS} FROM import_jobs_unpartitioned')
+    op.execute('DROP TABLE import_jobs_unpartitioned')
+
+    op.create_index('ix_import_jobs_user_status_created_at', 'import_jobs', ['user_id', 'status', 'created_at'])
+    op.create_index('ix_import_jobs_user_created_at', 'import_jobs', ['user_id', 'created_at'])
+    op.create_index('ix_import_jobs_content_sha256', 'import_jobs', ['content_sha256'])
+
+
+def _unpartition_import_jobs() -> None:
+    op.execute('ALTER TABLE import_jobs RENAME TO import_jobs_partitioned')
+    for name in ('ix_import_jobs_user_status_created_at', 'ix_import_jobs_user_created_at', 'ix_import_jobs_content_sha256'):
+        op.execute(f'DROP INDEX IF EXISTS {name}')
+    op.execute(
+        """
+        CREATE TABLE import_jobs (
+            job_id VARCHAR(64) PRIMARY KEY,
+            user_id VARCHAR(64) NOT NULL,
+            status VARCHAR(16) NOT NULL,
+            progress_percent INTEGER NOT NULL DEFAULT 0,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            channel VARCHAR(32) NOT NULL,
+            content_sha256 VARCHAR(64),
+            content_preview_masked TEXT,
+            last_error TEXT,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            updated_at TIMESTAMP WITH TIME ZONE NOT NULL
+        )
+        """
+    )
+    op.execute(f'INSERT INTO import_jobs ({JOB_COLUMNS}) SELECT {JOB_COLUMNS} FROM import_jobs_partitioned')
+    op.execute('DROP TABLE import_jobs_partitioned CASCADE')
+
+    op.create_index('ix_import_jobs_user_status_created_at', 'import_jobs', ['user_id', 'status', 'created_at'])
+    op.create_index('ix_import_jobs_created_at', 'import_jobs', ['created_at'])
+    op.create_index('ix_import_jobs_content_sha256', 'import_jobs', ['content_sha256'])
+
+
+def upgrade() -> None:
+    op.create_table(
+        'import_jobs_archive',
+        sa.Column('job_id', sa.String(length=64), primary_key=True),
+        sa.Column('user_id', sa.String(length=64), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('channel', sa.String(length=32), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('content_sha256', sa.String(length=64), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('archived_at', sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index('ix_import_jobs_archive_user_created_at', 'import_jobs_archive', ['user_id', 'created_at'])
+
+    # user_id and status are leading columns of the composites; updated_at is never filtered on
+    op.drop_index('ix_import_jobs_user_id', table_name='import_jobs')
+    op.drop_index('ix_import_jobs_status', table_name='import_jobs')
+    op.drop_index('ix_import_jobs_updated_at', table_name='import_jobs')
+
+    if op.get_context().dialect.name == 'postgresql':
+        _partition_import_jobs()
+    else:
+        op.create_index('ix_import_jobs_user_created_at', 'import_jobs', ['user_id', 'created_at'])
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name == 'postgresql':
+        _unpartition_import_jobs()
+    else:
+        op.drop_index('ix_import_jobs_user_created_at', table_name='import_jobs')
+
+    op.create_index('ix_import_jobs_updated_at', 'import_jobs', ['updated_at'])
+    op.create_index('ix_import_jobs_status', 'import_jobs', ['status'])
+    op.create_index('ix_import_jobs_user_id', 'import_jobs', ['user_id'])
+
+    op.drop_index('ix_import_jobs_archive_user_created_at', table_name='import_jobs_archive')
+    op.drop_table('import_jobs_archive')
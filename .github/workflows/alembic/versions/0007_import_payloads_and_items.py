@@ -0,0 +1,49 @@
+"""add transient import payloads and extracted import items
+
+Revision ID: 0007_import_payloads_and_items
+Revises: 0006_partition_and_archive_import_jobs
+Create Date: 2026-03-09
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '0007_import_payloads_and_items'
+down_revision: Union[str, None] = '0006_partition_and_archive_import_jobs'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'import_payloads',
+        sa.Column('job_id', sa.String(length=64), primary_key=True),
+        sa.Column('user_id', sa.String(length=64), nullable=False),
+        sa.Column('content', sa.LargeBinary(), nullable=False),
+        sa.Column('size_bytes', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index('ix_import_payloads_user_id', 'import_payloads', ['user_id'])
+
+    op.create_table(
+        'import_items',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('job_id', sa.String(length=64), nullable=False),
+        sa.Column('user_id', sa.String(length=64), nullable=False),
+        sa.Column('kind', sa.String(length=16), nullable=False),
+        sa.Column('text', sa.String(length=500), nullable=False),
+        sa.Column('occurrences', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index('ix_import_items_job_id', 'import_items', ['job_id'])
+    op.create_index('ix_import_items_user_kind', 'import_items', ['user_id', 'kind'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_import_items_user_kind', table_name='import_items')
+    op.drop_index('ix_import_items_job_id', table_name='import_items')
+    op.drop_table('import_items')
+    op.drop_index('ix_import_payloads_user_id', table_name='import_payloads')
+    op.drop_table('import_payloads')
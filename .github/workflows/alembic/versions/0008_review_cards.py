@@ -0,0 +1,43 @@
+"""add spaced-repetition review cards with a per-user due index
+
+Revision ID: 0008_review_cards
+Revises: 0007_import_payloads_and_items
+Create Date: 2026-03-16
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '0008_review_cards'
+down_revision: Union[str, None] = '0007_import_payloads_and_items'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'review_cards',
+        sa.Column('card_id', sa.String(length=64), primary_key=True),
+        sa.Column('user_id', sa.String(length=64), nullable=False),
+        sa.Column('front', sa.String(length=500), nullable=False),
+        sa.Column('back', sa.String(length=500), nullable=True),
+        sa.Column('source_job_id', sa.String(length=64), nullable=True),
+        sa.Column('ease', sa.Float(), nullable=False, server_default='2.5'),
+        sa.Column('interval_days', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('repetitions', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('lapses', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('reviews', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('due_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('last_reviewed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    )
+    # serves "next N due cards" as a single range scan, already in due order
+    op.create_index('ix_review_cards_user_due_at', 'review_cards', ['user_id', 'due_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_review_cards_user_due_at', table_name='review_cards')
+    op.drop_table('review_cards')
@@ -0,0 +1,24 @@
+"""index import_items by (user_id, id) for keyset-paginated exports
+
+Revision ID: 0009_import_items_export_index
+Revises: 0008_review_cards
+Create Date: 2026-03-23
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = '0009_import_items_export_index'
+down_revision: Union[str, None] = '0008_review_cards'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # each export window is one range scan in id order instead of a sort over the user's items
+    op.create_index('ix_import_items_user_id_id', 'import_items', ['user_id', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_import_items_user_id_id', table_name='import_items')
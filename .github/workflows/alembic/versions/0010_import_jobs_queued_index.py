@@ -0,0 +1,33 @@
+"""partial index on queued import_jobs for the stale-job sweep
+
+Revision ID: 0010_import_jobs_queued_index
+Revises: 0009_import_items_export_index
+Create Date: 2026-03-24
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '0010_import_jobs_queued_index'
+down_revision: Union[str, None] = '0009_import_items_export_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+QUEUED = sa.text("status = 'queued'")
+
+
+def upgrade() -> None:
+    # workers look for jobs queued in the database but on no queue; only queued rows are indexed, so it stays small
+    op.create_index(
+        'ix_import_jobs_queued_updated_at',
+        'import_jobs',
+        ['updated_at'],
+        postgresql_where=QUEUED,
+        sqlite_where=QUEUED,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_import_jobs_queued_updated_at', table_name='import_jobs')
@@ -0,0 +1,25 @@
+"""remember the queue lane of each import job
+
+Revision ID: 0011_import_jobs_lane
+Revises: 0010_import_jobs_queued_index
+Create Date: 2026-03-25
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '0011_import_jobs_lane'
+down_revision: Union[str, None] = '0010_import_jobs_queued_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # nullable without a default: a metadata-only change, even on the partitioned table
+    op.add_column('import_jobs', sa.Column('lane', sa.String(length=32), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('import_jobs', 'lane')
@@ -1,34 +1,264 @@
 from __future__ import annotations
 
+import atexit
+import heapq
+import http.client
+import itertools
 import json
-from urllib import request
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+from urllib.parse import urlsplit
 
 from app.config import settings
-from app.observability import app_logger
+from app.lazy import Lazy
+from app.observability import app_logger, metrics
+
+
+class HttpPool:
+    # keep-alive connections per (scheme, host); only the dispatcher thread uses them
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self._conns: dict[tuple[str, str], http.client.HTTPConnection] = {}
+
+    def _connection(self, scheme: str, netloc: str) -> http.client.HTTPConnection:
+        conn = self._conns.get((scheme, netloc))
+        if conn is None:
+            conn_cls = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+            conn = conn_cls(netloc, timeout=self.timeout)
+            self._conns[(scheme, netloc)] = conn
+        return conn
+
+    def _discard(self, scheme: str, netloc: str) -> None:
+        conn = self._conns.pop((scheme, netloc), None)
+        if conn is not None:
+            conn.close()
+
+    def post_json(self, url: str, payload: dict) -> None:
+        parts = urlsplit(url)
+        path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        body = json.dumps(payload).encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+
+        for attempt in range(2):
+            reused = (parts.scheme, parts.netloc) in self._conns
+            conn = self._connection(parts.scheme, parts.netloc)
+            try:
+                conn.request('POST', path, body=body, headers=headers)
+                resp = conn.getresponse()
+                resp.read()
+            except (http.client.RemoteDisconnected, ConnectionError):
+                self._discard(parts.scheme, parts.netloc)
+                # the server may have closed an idle keep-alive connection; retry once on a fresh one
+                if reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                self._discard(parts.scheme, parts.netloc)
+                raise
+            if resp.will_close:
+                self._discard(parts.scheme, parts.netloc)
+            if resp.status >= 400:
+                raise RuntimeError(f'alert endpoint returned HTTP {resp.status}')
+            return
+
+    def close(self) -> None:
+        for key in list(self._conns):
+            self._discard(*key)
+
+
+@dataclass
+class PendingAlert:
+    sink: str
+    title: str
+    detail: str
+    occurrences: int = 1
+    attempts: int = 0
+
+
+class AlertDispatcher:
+    def __init__(
+        self,
+        deliver: Callable[[PendingAlert], None],
+        max_pending: int = 1000,
+        coalesce_window_seconds: float = 60.0,
+        rate_limit_per_minute: int = 30,
+        max_retries: int = 3,
+        retry_backoff_seconds: float = 1.0,
+    ):
+        self._deliver = deliver
+        self.max_pending = max_pending
+        self.coalesce_window_seconds = coalesce_window_seconds
+        self.rate_limit_per_minute = max(1, rate_limit_per_minute)
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+
+        self._cond = threading.Condition()
+        self._pending: dict[tuple[str, str], PendingAlert] = {}
+        self._schedule: list[tuple[float, int, tuple[str, str]]] = []
+        self._seq = itertools.count()
+        self._last_sent: dict[tuple[str, str], float] = {}
+        self._tokens = float(self.rate_limit_per_minute)
+        self._tokens_at = time.monotonic()
+        self._inflight = 0
+        self._closed = False
+        self._thread: threading.Thread | None = None
+
+    def submit(self, sink: str, title: str, detail: str) -> bool:
+        key = (sink, title)
+        with self._cond:
+            if self._closed:
+                metrics.record_alert('dropped')
+                return False
+            pending = self._pending.get(key)
+            if pending is not None:
+                pending.occurrences += 1
+                pending.detail = detail
+                metrics.record_alert('coalesced')
+                return True
+            if len(self._pending) >= self.max_pending:
+                metrics.record_alert('dropped')
+                return False
+
+            now = time.monotonic()
+            last_sent = self._last_sent.get(key)
+            due = now if last_sent is None else max(now, last_sent + self.coalesce_window_seconds)
+            self._pending[key] = PendingAlert(sink=sink, title=title, detail=detail)
+            heapq.heappush(self._schedule, (due, next(self._seq), key))
+            self._ensure_started()
+            self._cond.notify()
+        return True
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._pending) + self._inflight
+
+    def close(self, timeout: float = 5.0) -> bool:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is None:
+            return True
+        thread.join(timeout)
+        return not thread.is_alive()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='alert-dispatcher', daemon=True)
+        self._thread.start()
+        atexit.register(self.close, 2.0)
+
+    def _refill_tokens(self, now: float) -> None:
+        rate_per_second = self.rate_limit_per_minute / 60
+        self._tokens = min(float(self.rate_limit_per_minute), self._tokens + (now - self._tokens_at) * rate_per_second)
+        self._tokens_at = now
+
+    def _next_ready(self) -> PendingAlert | None:
+        # called with self._cond held
+        while True:
+            if not self._schedule:
+                if self._closed:
+                    return None
+                self._cond.wait()
+                continue
+
+            now = time.monotonic()
+            self._refill_tokens(now)
+            if self._closed:
+                wait = 0.0
+            else:
+                token_wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) * 60 / self.rate_limit_per_minute
+                wait = max(self._schedule[0][0] - now, token_wait)
+            if wait > 0:
+                self._cond.wait(wait)
+                continue
+
+            _, _, key = heapq.heappop(self._schedule)
+            self._tokens = max(0.0, self._tokens - 1)
+            self._inflight += 1
+            return self._pending.pop(key)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                alert = self._next_ready()
+            if alert is None:
+                return
+
+            try:
+                self._deliver(alert)
+                delivered = True
+            except Exception as exc:
+                delivered = False
+                app_logger.warning(f'{alert.sink} alert failed: {exc}')
+
+            with self._cond:
+                self._inflight -= 1
+                key = (alert.sink, alert.title)
+                now = time.monotonic()
+                if delivered:
+                    self._last_sent[key] = now
+                    metrics.record_alert('sent')
+                    if len(self._last_sent) > self.max_pending:
+                        cutoff = now - self.coalesce_window_seconds
+                        self._last_sent = {k: v for k, v in self._last_sent.items() if v >= cutoff}
+                elif alert.attempts < self.max_retries and not self._closed:
+                    alert.attempts += 1
+                    metrics.record_alert('retried')
+                    newer = self._pending.get(key)
+                    if newer is not None:
+                        newer.occurrences += alert.occurrences
+                    else:
+                        self._pending[key] = alert
+                        due = now + self.retry_backoff_seconds * 2 ** (alert.attempts - 1)
+                        heapq.heappush(self._schedule, (due, next(self._seq), key))
+                else:
+                    metrics.record_alert('failed')
+                self._cond.notify_all()
 
 
 class AlertClient:
-    def __init__(self, slack_webhook: str | None, pagerduty_url: str | None):
+    def __init__(self, slack_webhook: str | None, pagerduty_url: str | None, dispatcher: AlertDispatcher | None = None):
         self.slack_webhook = slack_webhook
         self.pagerduty_url = pagerduty_url
+        self._http = HttpPool(timeout=settings.alert_http_timeout_seconds)
+        self.dispatcher = dispatcher or AlertDispatcher(
+            self._deliver,
+            max_pending=settings.alert_queue_size,
+            coalesce_window_seconds=settings.alert_coalesce_window_seconds,
+            rate_limit_per_minute=settings.alert_rate_limit_per_minute,
+            max_retries=settings.alert_max_retries,
+            retry_backoff_seconds=settings.alert_retry_backoff_seconds,
+        )
 
     def _post_json(self, url: str, payload: dict) -> None:
-        body = json.dumps(payload).encode('utf-8')
-        req = request.Request(url, data=body, headers={'Content-Type': 'application/json'})
-        with request.urlopen(req, timeout=3):
-            pass
+        self._http.post_json(url, payload)
+
+    def _deliver(self, alert: PendingAlert) -> None:
+        detail = alert.detail
+        if alert.occurrences > 1:
+            detail = f'{detail} (x{alert.occurrences} since last alert)'
+        if alert.sink == 'slack' and self.slack_webhook:
+            self._post_json(self.slack_webhook, {'text': f'[{alert.title}] {detail}'})
+        elif alert.sink == 'pagerduty' and self.pagerduty_url:
+            self._post_json(self.pagerduty_url, {'event_action': 'trigger', 'dedup_key': alert.title, 'payload': {'summary': alert.title, 'source': 'backend', 'severity': 'error', 'custom_details': {'detail': detail, 'occurrences': alert.occurrences}}})
 
     def notify_error(self, title: str, detail: str) -> None:
         if self.slack_webhook:
-            try:
-                self._post_json(self.slack_webhook, {'text': f'[{title}] {detail}'})
-            except Exception as exc:
-                app_logger.warning('slack alert failed', extra={'message': str(exc)})
+            self.dispatcher.submit('slack', title, detail)
         if self.pagerduty_url:
-            try:
-                self._post_json(self.pagerduty_url, {'event_action': 'trigger', 'payload': {'summary': title, 'source': 'backend', 'severity': 'error', 'custom_details': {'detail': detail}}})
-            except Exception as exc:
-                app_logger.warning('pagerduty alert failed', extra={'message': str(exc)})
+            self.dispatcher.submit('pagerduty', title, detail)
+
+    def close(self, timeout: float = 5.0) -> None:
+        if self.dispatcher.close(timeout):
+            self._http.close()
+
+
+def build_alert_client() -> AlertClient:
+    return AlertClient(settings.slack_webhook_url, settings.pagerduty_events_url)
 
 
-alerts = AlertClient(settings.slack_webhook_url, settings.pagerduty_events_url)
+alerts = Lazy(build_alert_client, 'alerts')
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import Protocol
+
+from app.config import settings
+from app.observability import app_logger, metrics, now_ms
+
+Alternatives = tuple[tuple[str, str], ...]
+
+
+@dataclass(frozen=True)
+class AnalysisInput:
+    text: str
+    tone_preference: str
+
+
+class AnalysisEngine(Protocol):
+    name: str
+    version: str
+
+    def analyze_batch(self, items: list[AnalysisInput]) -> list[Alternatives]:
+        ...
+
+
+class EngineOverloaded(RuntimeError):
+    pass
+
+
+class EngineTimeout(RuntimeError):
+    pass
+
+
+_INTENT_KEYWORDS: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ('apology', ('sorry', 'apolog', 'my bad')),
+    ('thanks', ('thank', 'thx', 'appreciate')),
+    ('postpone', ('later', 'tomorrow', 'reschedule', 'postpone', 'not now', 'busy')),
+    ('request', ('can you', 'could you', 'would you', 'please')),
+)
+
+_REWRITES: dict[tuple[str, str], Alternatives] = {
+    ('postpone', 'business'): (
+        ('business', 'Could we revisit this tomorrow?'),
+        ('business', 'Let me review this and get back to you.'),
+        ('natural', 'I am tied up right now, can we reschedule?'),
+    ),
+    ('postpone', 'daily'): (
+        ('daily', 'Can we do this a bit later?'),
+        ('daily', 'I am swamped right now.'),
+        ('natural', 'Let us pick this up tomorrow.'),
+    ),
+    ('apology', 'business'): (
+        ('business', 'I apologize for the inconvenience.'),
+        ('business', 'Please accept my apologies for the delay.'),
+        ('natural', 'Sorry about that, my mistake.'),
+    ),
+    ('apology', 'daily'): (
+        ('daily', 'Sorry, my bad.'),
+        ('daily', 'Oops, sorry about that.'),
+        ('natural', 'I am really sorry about that.'),
+    ),
+    ('thanks', 'business'): (
+        ('business', 'Thank you for your help with this.'),
+        ('business', 'I appreciate your quick response.'),
+        ('natural', 'Thanks so much, this really helps.'),
+    ),
+    ('thanks', 'daily'): (
+        ('daily', 'Thanks a lot!'),
+        ('daily', 'I owe you one.'),
+        ('natural', 'Thanks, I really appreciate it.'),
+    ),
+    ('request', 'business'): (
+        ('business', 'Would you be able to take a look at this?'),
+        ('business', 'Could you send it over when you have a moment?'),
+        ('natural', 'Can you help me out with this?'),
+    ),
+    ('request', 'daily'): (
+        ('daily', 'Can you do me a favor?'),
+        ('daily', 'Mind helping me out?'),
+        ('natural', 'Could you give me a hand with this?'),
+    ),
+}
+
+
+class LocalRewriteEngine:
+    name = 'local'
+    version = '1'
+
+    def _intent(self, text: str) -> str:
+        lowered = text.casefold()
+        for intent, keywords in _INTENT_KEYWORDS:
+            if any(keyword in lowered for keyword in keywords):
+                return intent
+        return 'postpone'
+
+    def analyze_batch(self, items: list[AnalysisInput]) -> list[Alternatives]:
+        return [_REWRITES[(self._intent(item.text), item.tone_preference)] for item in items]
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        engine: AnalysisEngine,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        max_concurrency: int = 4,
+        max_pending: int = 1000,
+    ):
+        self.engine = engine
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_ms / 1000
+        self.max_concurrency = max_concurrency
+        self._queue: queue.Queue[tuple[AnalysisInput, Future] | None] = queue.Queue(maxsize=max_pending)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='analysis-batch')
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def submit(self, item: AnalysisInput) -> Future:
+        self._ensure_started()
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((item, future))
+        except queue.Full as exc:
+            metrics.record_analysis_rejected()
+            raise EngineOverloaded('analysis queue is full') from exc
+        return future
+
+    def analyze(self, text: str, tone_preference: str, timeout: float) -> Alternatives:
+        future = self.submit(AnalysisInput(text=text, tone_preference=tone_preference))
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError as exc:
+            future.cancel()
+            metrics.record_analysis_timeout()
+            raise EngineTimeout('analysis timed out') from exc
+
+    def close(self, timeout: float = 5.0) -> None:
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None:
+            return
+        self._queue.put(None)
+        thread.join(timeout)
+        # wait for in-flight batches; the executor stays usable so the batcher can be restarted
+        acquired = 0
+        deadline = time.monotonic() + timeout
+        while acquired < self.max_concurrency and self._slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            acquired += 1
+        for _ in range(acquired):
+            self._slots.release()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='analysis-batcher', daemon=True)
+                self._thread.start()
+
+    def _collect(self, first: tuple[AnalysisInput, Future]) -> tuple[list[tuple[AnalysisInput, Future]], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait_seconds
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is None:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, stopping = self._collect(first)
+            # skip requests whose caller already gave up
+            batch = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            self._slots.acquire()
+            self._executor.submit(self._execute, batch)
+
+    def _execute(self, batch: list[tuple[AnalysisInput, Future]]) -> None:
+        start = now_ms()
+        try:
+            results = self.engine.analyze_batch([item for item, _ in batch])
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+        except Exception as exc:
+            app_logger.error(f'analysis batch failed: {exc}')
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+        finally:
+            self._slots.release()
+            metrics.record_analysis_batch(len(batch), now_ms() - start)
+
+
+def build_analysis_engine() -> AnalysisEngine:
+    if settings.chat_engine != 'local':
+        app_logger.warning(f'unknown chat engine {settings.chat_engine!r}, using local engine')
+    return LocalRewriteEngine()
+
+
+def build_micro_batcher(engine: AnalysisEngine | None = None) -> MicroBatcher:
+    return MicroBatcher(
+        engine or build_analysis_engine(),
+        max_batch_size=settings.chat_engine_max_batch_size,
+        max_wait_ms=settings.chat_engine_batch_wait_ms,
+        max_concurrency=settings.chat_engine_max_concurrency,
+        max_pending=settings.chat_engine_max_pending,
+    )
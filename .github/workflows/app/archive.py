@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import re
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import delete, insert, select, text
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+from app.db import ImportJobArchiveRecord, ImportJobRecord, engine, get_session
+from app.observability import app_logger
+
+ARCHIVABLE_STATUSES = ('completed',)
+ARCHIVE_COLUMNS = (
+    'job_id',
+    'user_id',
+    'status',
+    'channel',
+    'attempts',
+    'content_sha256',
+    'last_error',
+    'created_at',
+    'updated_at',
+)
+PARTITION_NAME = re.compile(r'^import_jobs_p(\d{4})_(\d{2})$')
+
+
+def archive_completed_jobs(
+    older_than_days: int | None = None,
+    batch_size: int | None = None,
+    max_batches: int | None = None,
+) -> int:
+    older_than_days = settings.import_archive_after_days if older_than_days is None else older_than_days
+    batch_size = batch_size or settings.import_archive_batch_size
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    columns = [getattr(ImportJobRecord, name) for name in ARCHIVE_COLUMNS]
+
+    archived = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        # each batch is its own short transaction so the hot table is never locked for long
+        with get_session() as session:
+            rows = [
+                dict(row._mapping)
+                for row in session.execute(
+                    select(*columns)
+                    .where(ImportJobRecord.status.in_(ARCHIVABLE_STATUSES), ImportJobRecord.created_at < cutoff)
+                    .order_by(ImportJobRecord.created_at)
+                    .limit(batch_size)
+                )
+            ]
+            if not rows:
+                break
+            archived_at = datetime.now(timezone.utc)
+            for row in rows:
+                row['archived_at'] = archived_at
+            session.execute(insert(ImportJobArchiveRecord), rows)
+            session.execute(delete(ImportJobRecord).where(ImportJobRecord.job_id.in_([row['job_id'] for row in rows])))
+        archived += len(rows)
+        batches += 1
+        if len(rows) < batch_size:
+            break
+
+    if archived:
+        app_logger.info(f'archived {archived} import jobs older than {cutoff.isoformat()}')
+    return archived
+
+
+def _month_start(value: date) -> date:
+    return value.replace(day=1)
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def is_partitioned(bind: Engine = engine) -> bool:
+    if bind.dialect.name != 'postgresql':
+        return False
+    with bind.connect() as conn:
+        return bool(
+            conn.execute(
+                text(
+                    'SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid '
+                    "WHERE c.relname = 'import_jobs'"
+                )
+            ).scalar()
+        )
+
+
+def list_partitions(bind: Engine = engine) -> dict[str, date]:
+    with bind.connect() as conn:
+        names = conn.execute(
+            text(
+                'SELECT c.relname FROM pg_inherits i '
+                'JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent '
+                "WHERE p.relname = 'import_jobs'"
+            )
+        ).scalars()
+        partitions = {}
+        for name in names:
+            match = PARTITION_NAME.match(name)
+            if match:
+                partitions[name] = date(int(match.group(1)), int(match.group(2)), 1)
+        return partitions
+
+
+def ensure_partitions(months_ahead: int | None = None, bind: Engine = engine) -> list[str]:
+    if not is_partitioned(bind):
+        return []
+    months_ahead = settings.import_partition_months_ahead if months_ahead is None else months_ahead
+    existing = set(list_partitions(bind))
+    current = _month_start(datetime.now(timezone.utc).date())
+    created = []
+    for offset in range(months_ahead + 1):
+        month = _add_months(current, offset)
+        name = f'import_jobs_p{month:%Y_%m}'
+        if name in existing:
+            continue
+        upper = _add_months(month, 1)
+        with bind.begin() as conn:
+            conn.execute(
+                text(
+                    f'CREATE TABLE {name} PARTITION OF import_jobs '
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+                )
+            )
+        created.append(name)
+    return created
+
+
+def drop_empty_partitions(older_than_days: int | None = None, bind: Engine = engine) -> list[str]:
+    if not is_partitioned(bind):
+        return []
+    older_than_days = settings.import_archive_after_days if older_than_days is None else older_than_days
+    cutoff = datetime.now(timezone.utc).date() - timedelta(days=older_than_days)
+    dropped = []
+    for name, month in sorted(list_partitions(bind).items(), key=lambda item: item[1]):
+        if _add_months(month, 1) > cutoff:
+            continue
+        with bind.begin() as conn:
+            # failed jobs are kept for inspection, so only partitions the archiver fully drained go away
+            if conn.execute(text(f'SELECT EXISTS (SELECT 1 FROM {name})')).scalar():
+                continue
+            conn.execute(text(f'ALTER TABLE import_jobs DETACH PARTITION {name}'))
+            conn.execute(text(f'DROP TABLE {name}'))
+        dropped.append(name)
+    return dropped
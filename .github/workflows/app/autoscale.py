@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from app.config import settings
+from app.observability import metrics
+from app.queue import QueueMetrics
+
+
+@dataclass(frozen=True)
+class ScalingDecision:
+    required_slots: float
+    concurrency: int
+    desired_workers: int
+    service_time_seconds: float
+
+
+# scale up immediately; scale down only to the highest recommendation seen over the window,
+# and ignore changes within the tolerance band, so a noisy queue does not make the value flap
+class Stabilizer:
+    def __init__(self, initial: int, window_seconds: float, tolerance: float = 0.1):
+        self.window_seconds = window_seconds
+        self.tolerance = tolerance
+        self.current = initial
+        self._recommendations: deque[tuple[float, int]] = deque()
+
+    def update(self, recommendation: int, now: float) -> int:
+        self._recommendations.append((now, recommendation))
+        while self._recommendations and now - self._recommendations[0][0] > self.window_seconds:
+            self._recommendations.popleft()
+
+        if self.current and abs(recommendation / self.current - 1) <= self.tolerance:
+            return self.current
+        if recommendation > self.current:
+            self.current = recommendation
+        else:
+            self.current = min(self.current, max(value for _, value in self._recommendations))
+        return self.current
+
+
+class ConcurrencyController:
+    def __init__(
+        self,
+        min_concurrency: int = 1,
+        max_concurrency: int = 8,
+        min_workers: int = 1,
+        max_workers: int = 20,
+        target_wait_seconds: float = 60.0,
+        default_job_seconds: float = 1.0,
+        scale_down_window_seconds: float = 300.0,
+        tolerance: float = 0.1,
+        ewma_alpha: float = 0.2,
+    ):
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.target_wait_seconds = target_wait_seconds
+        self.ewma_alpha = ewma_alpha
+        self._service_time = default_job_seconds
+        self._observed = False
+        self._lock = threading.Lock()
+        self._concurrency = Stabilizer(min_concurrency, scale_down_window_seconds, tolerance)
+        self._workers = Stabilizer(min_workers, scale_down_window_seconds, tolerance)
+        self._decision = ScalingDecision(0.0, min_concurrency, min_workers, default_job_seconds)
+
+    @property
+    def concurrency(self) -> int:
+        return self._decision.concurrency
+
+    @property
+    def desired_workers(self) -> int:
+        return self._decision.desired_workers
+
+    @property
+    def decision(self) -> ScalingDecision:
+        return self._decision
+
+    def observe_duration(self, seconds: float) -> None:
+        with self._lock:
+            if not self._observed:
+                self._service_time = seconds
+                self._observed = True
+            else:
+                self._service_time += self.ewma_alpha * (seconds - self._service_time)
+
+    def update(self, queue_metrics: QueueMetrics, now: float | None = None) -> ScalingDecision:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            service_time = self._service_time
+            # Little's law: to keep the queue wait under target, depth / target jobs must finish
+            # per second, and that throughput needs throughput * service_time jobs in flight
+            throughput = queue_metrics.main_depth / self.target_wait_seconds
+            if queue_metrics.oldest_job_age_seconds > self.target_wait_seconds:
+                # already behind: catch up faster, but bounded so one stuck job cannot max out the fleet
+                throughput *= min(2.0, queue_metrics.oldest_job_age_seconds / self.target_wait_seconds)
+            slots = throughput * service_time
+
+            concurrency = min(self.max_concurrency, max(self.min_concurrency, math.ceil(slots)))
+            workers = min(self.max_workers, max(self.min_workers, math.ceil(slots / self.max_concurrency)))
+            self._decision = ScalingDecision(
+                required_slots=round(slots, 3),
+                concurrency=self._concurrency.update(concurrency, now),
+                desired_workers=self._workers.update(workers, now),
+                service_time_seconds=round(service_time, 3),
+            )
+        decision = self._decision
+        metrics.record_autoscale(
+            decision.concurrency, decision.desired_workers, decision.required_slots, decision.service_time_seconds
+        )
+        return decision
+
+
+def build_autoscaler() -> ConcurrencyController:
+    return ConcurrencyController(
+        min_concurrency=settings.worker_min_concurrency,
+        max_concurrency=settings.worker_max_concurrency,
+        min_workers=settings.autoscale_min_workers,
+        max_workers=settings.autoscale_max_workers,
+        target_wait_seconds=settings.autoscale_target_wait_seconds,
+        default_job_seconds=settings.autoscale_default_job_seconds,
+        scale_down_window_seconds=settings.autoscale_scale_down_window_seconds,
+        tolerance=settings.autoscale_tolerance,
+    )
+
+
+autoscaler = build_autoscaler()
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from app.config import settings
+from app.observability import metrics
+from app.redis_clients import redis_clients
+
+
+def normalize_text(text: str) -> str:
+    return ' '.join(text.split()).casefold()
+
+
+def cache_key(*parts: str) -> str:
+    return hashlib.blake2b('\x1f'.join(parts).encode('utf-8'), digest_size=16).hexdigest()
+
+
+class TTLCache:
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 16 * 1024 * 1024, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._data: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: str) -> bytes | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._data[key]
+                self._bytes -= len(value)
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous[1])
+            self._data[key] = (expires_at, value)
+            self._bytes += len(value)
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted) = self._data.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+
+class ResponseCache:
+    def __init__(self, name: str, local: TTLCache, redis_client=None, redis_ttl_seconds: int = 3600):
+        self.name = name
+        self.local = local
+        self.redis_client = redis_client
+        self.redis_ttl_seconds = redis_ttl_seconds
+
+    def _redis_key(self, key: str) -> str:
+        return f'cache:{self.name}:{key}'
+
+    def get(self, key: str) -> bytes | None:
+        value = self.local.get(key)
+        if value is not None:
+            metrics.record_cache(self.name, 'local_hit')
+            return value
+
+        if self.redis_client is not None:
+            try:
+                value = self.redis_client.get(self._redis_key(key))
+            except Exception:
+                metrics.record_cache(self.name, 'redis_error')
+                value = None
+            if value is not None:
+                self.local.set(key, value)
+                metrics.record_cache(self.name, 'redis_hit')
+                return value
+
+        metrics.record_cache(self.name, 'miss')
+        return None
+
+    def set(self, key: str, value: bytes) -> None:
+        self.local.set(key, value)
+        if self.redis_client is not None:
+            try:
+                self.redis_client.set(self._redis_key(key), value, ex=self.redis_ttl_seconds)
+            except Exception:
+                metrics.record_cache(self.name, 'redis_error')
+
+    def get_or_compute(self, key: str, compute: Callable[[], bytes]) -> bytes:
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.set(key, value)
+        return value
+
+
+def build_response_cache(name: str) -> ResponseCache:
+    local = TTLCache(
+        max_entries=settings.response_cache_max_entries,
+        max_bytes=settings.response_cache_max_bytes,
+        ttl_seconds=settings.response_cache_local_ttl_seconds,
+    )
+    client = None
+    if settings.response_cache_redis_enabled:
+        client = redis_clients.get(decode_responses=False, socket_timeout=settings.response_cache_redis_timeout_seconds)
+    return ResponseCache(name, local, client, settings.response_cache_redis_ttl_seconds)
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import atexit
+import gzip
+import hashlib
+import hmac
+import json
+import queue
+import random
+import threading
+from pathlib import Path
+
+import jwt
+
+from app.config import settings
+from app.observability import app_logger, metrics
+from app.security import mask_pii
+
+# credentials are never written, masked or not
+REDACTED_FIELDS = frozenset({'password', 'refresh_token', 'access_token', 'idempotency_key'})
+# login ids in bodies get the same pseudonym as the token subject, so the trace never links the two
+SUBJECT_FIELDS = frozenset({'user_id', 'sub'})
+_STOP = object()
+
+
+def pseudonymize(authorization: str | None, secret: str) -> str | None:
+    if not authorization or not authorization.startswith('Bearer '):
+        return None
+    try:
+        # the signature is checked by the endpoint itself; here the subject only groups requests per user
+        subject = jwt.decode(authorization[7:], options={'verify_signature': False, 'verify_exp': False}).get('sub')
+    except jwt.PyJWTError:
+        return None
+    if not subject:
+        return None
+    return _pseudonym(str(subject), secret)
+
+
+def _pseudonym(subject: str, secret: str) -> str:
+    return hmac.new(secret.encode('utf-8'), f'capture:{subject}'.encode('utf-8'), hashlib.blake2s).hexdigest()[:16]
+
+
+def _mask_field(key: str, value, secret: str):
+    if key in REDACTED_FIELDS:
+        return '<redacted>'
+    if key in SUBJECT_FIELDS and isinstance(value, str):
+        return _pseudonym(value, secret)
+    return _mask_value(value, secret)
+
+
+def _mask_value(value, secret: str):
+    if isinstance(value, str):
+        return mask_pii(value, max_length=len(value))
+    if isinstance(value, list):
+        return [_mask_value(item, secret) for item in value]
+    if isinstance(value, dict):
+        return {key: _mask_field(key, item, secret) for key, item in value.items()}
+    return value
+
+
+def mask_body(body: bytes, max_bytes: int, secret: str):
+    if not body or len(body) > max_bytes:
+        return None
+    try:
+        return _mask_value(json.loads(body), secret)
+    except ValueError:
+        return None
+
+
+def build_record(
+    started_at: float,
+    method: str,
+    path: str,
+    route: str | None,
+    query: str,
+    status_code: int,
+    latency_ms: float,
+    body: bytes | None,
+    response_bytes: int | None,
+    authorization: str | None,
+) -> dict:
+    record = {
+        'ts': round(started_at, 6),
+        'method': method,
+        'route': route or path,
+        'path': path,
+        'status': status_code,
+        'ms': round(latency_ms, 2),
+        'req_bytes': len(body) if body else 0,
+    }
+    if query:
+        record['query'] = mask_pii(query, max_length=len(query))
+    if response_bytes is not None:
+        record['resp_bytes'] = response_bytes
+    user = pseudonymize(authorization, settings.jwt_secret)
+    if user:
+        record['user'] = user
+    masked = mask_body(body, settings.traffic_capture_max_body_bytes, settings.jwt_secret) if body else None
+    if masked is not None:
+        record['body'] = masked
+    return record
+
+
+class TrafficCapture:
+    def __init__(self, path: str, sample_rate: float, max_pending: int = 10_000, enabled: bool = True):
+        self.path = Path(path)
+        self.sample_rate = sample_rate
+        self.enabled = enabled and sample_rate > 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def sampled(self) -> bool:
+        return self.enabled and (self.sample_rate >= 1.0 or random.random() < self.sample_rate)
+
+    def submit(self, record: dict) -> bool:
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            metrics.record_capture('dropped')
+            return False
+        return True
+
+    def close(self, timeout: float = 5.0) -> None:
+        thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='traffic-capture', daemon=True)
+                self._thread.start()
+                atexit.register(self.close, 2.0)
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # gzip members can be appended, so restarts keep extending the same trace
+        if self.path.suffix == '.gz':
+            return gzip.open(self.path, 'at', encoding='utf-8')
+        return self.path.open('a', encoding='utf-8')
+
+    def _run(self) -> None:
+        try:
+            handle = self._open()
+        except OSError as exc:
+            app_logger.warning(f'traffic capture disabled: {exc}')
+            self.enabled = False
+            return
+        with handle:
+            while True:
+                item = self._queue.get()
+                batch = [item]
+                # drain whatever else is ready so each flush covers a burst of requests
+                while item is not _STOP and len(batch) < 256:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    batch.append(item)
+                records = [record for record in batch if record is not _STOP]
+                if records:
+                    handle.write(''.join(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n' for record in records))
+                    handle.flush()
+                    for _ in records:
+                        metrics.record_capture('written')
+                if len(records) != len(batch):
+                    return
+
+
+def build_traffic_capture() -> TrafficCapture:
+    return TrafficCapture(
+        settings.traffic_capture_path,
+        settings.traffic_capture_sample_rate,
+        max_pending=settings.traffic_capture_queue_size,
+        enabled=settings.traffic_capture_enabled,
+    )
+
+
+traffic_capture = build_traffic_capture()
@@ -12,26 +12,129 @@ class Settings(BaseSettings):
     access_token_exp_minutes: int = 30
     refresh_token_exp_days: int = 14
 
+    # 'redis' keeps refresh-token families in Redis (falls back to the revoked_tokens table without REDIS_URL), or 'database'
+    token_store_backend: str = 'redis'
+    token_store_redis_timeout_seconds: float = 0.25
+
     rate_limit_per_minute: int = 120
     redis_url: str | None = None
+    # shared by every Redis user in the process (app.redis_clients)
+    redis_max_connections: int = 50
+    redis_pool_timeout_seconds: float = 0.2
+    redis_socket_timeout_seconds: float = 0.5
+    redis_connect_timeout_seconds: float = 0.5
+    redis_health_check_interval_seconds: int = 30
+    redis_breaker_failure_threshold: int = 5
+    redis_breaker_reset_seconds: float = 10.0
+
+    chat_engine: str = 'local'
+    chat_engine_max_batch_size: int = 32
+    chat_engine_batch_wait_ms: float = 5.0
+    chat_engine_max_concurrency: int = 4
+    chat_engine_max_pending: int = 1000
+    chat_engine_timeout_seconds: float = 2.0
+    response_cache_max_entries: int = 4096
+    response_cache_max_bytes: int = 16 * 1024 * 1024
+    response_cache_local_ttl_seconds: float = 300.0
+    response_cache_redis_enabled: bool = True
+    response_cache_redis_ttl_seconds: int = 3600
+    response_cache_redis_timeout_seconds: float = 0.1
+
+    onboarding_rules_path: str | None = None
+    onboarding_rules_check_interval_seconds: float = 5.0
+    onboarding_plan_max_age_seconds: int = 3600
 
     database_url: str = 'sqlite:///./language_practice.db'
     production_database_url: str | None = None
+    replica_database_urls: str = ''
+    replica_pool_size: int = 5
+    replica_max_lag_seconds: float = 5.0
+    replica_lag_check_interval_seconds: float = 5.0
+    replica_connect_timeout_seconds: int = 2
+    read_your_writes_window_seconds: float = 10.0
+    analytics_database_url: str | None = None
+    secondary_engine_max: int = 8
+    secondary_engine_pool_size: int = 2
+    secondary_engine_connect_timeout_seconds: int = 5
+    db_verify_timeout_seconds: float = 15.0
 
     queue_mode: str = 'inmemory'  # inmemory | redis
+    # jobs held locally while Redis is unreachable, pushed once it answers again
+    queue_outbox_max: int = 10000
+    # queued jobs untouched this long are pushed again, e.g. outbox entries lost when their process exited
+    queue_requeue_stale_after_seconds: int = 900
+    queue_requeue_interval_seconds: float = 60.0
+    queue_requeue_batch_size: int = 500
     queue_name: str = 'import_jobs'
     dead_letter_queue_name: str = 'import_jobs_dlq'
+    queue_lanes: str = 'interactive:4,bulk:1'  # lane:weight, first lane is the default
+    queue_interactive_max_pending: int = 2
+    dlq_redrive_batch_size: int = 500
+    dlq_redrive_rate_per_second: float = 200.0
+    dlq_redrive_max_main_depth: int = 5000
     max_job_retries: int = 3
     backoff_base_seconds: int = 2
     queue_depth_alert_threshold: int = 1000
+    worker_min_concurrency: int = 1
+    worker_max_concurrency: int = 8
+    autoscale_min_workers: int = 1
+    autoscale_max_workers: int = 20
+    autoscale_target_wait_seconds: float = 60.0
+    autoscale_default_job_seconds: float = 1.0
+    autoscale_scale_down_window_seconds: float = 300.0
+    autoscale_tolerance: float = 0.1
+    autoscale_interval_seconds: float = 5.0
+    import_chunk_bytes: int = 64 * 1024
+    import_progress_step_percent: int = 10
+    import_item_batch_size: int = 1000
+    import_max_sentences: int = 200
+    vocab_index_max_users: int = 10_000
+    vocab_index_refresh_seconds: float = 5.0
+    srs_initial_ease: float = 2.5
+    srs_min_ease: float = 1.3
+    srs_interval_modifier: float = 1.0
+    srs_max_interval_days: float = 365.0
+    srs_reschedule_batch_size: int = 5000
+    import_archive_after_days: int = 30
+    import_archive_batch_size: int = 5000
+    import_partition_months_ahead: int = 3
 
     cors_allow_origins: str = 'https://app.example.com'
+    # browsers cap this (Chromium at 7200s), larger values are silently clamped
+    cors_max_age_seconds: int = 7200
     enforce_https: bool = True
     hsts_enabled: bool = True
 
+    trusted_response_models: bool = True
+    # /me/export reads this many rows per short-lived session, fetched from a server-side cursor in yield_per batches
+    export_window_rows: int = 2000
+    export_yield_per: int = 500
+    export_gzip_level: int = 3
+
+    log_async: bool = True
+    log_queue_size: int = 10000
+    log_batch_size: int = 256
+    log_success_sample_rate: float = 1.0
+    traffic_capture_enabled: bool = False
+    traffic_capture_sample_rate: float = 0.01
+    traffic_capture_path: str = 'traffic_capture.ndjson.gz'
+    traffic_capture_max_body_bytes: int = 16 * 1024
+    traffic_capture_queue_size: int = 10_000
+
+    warmup_db_connections: int = 4
+    health_check_interval_seconds: float = 5.0
+    health_check_stale_after_seconds: float = 30.0
+    health_check_timeout_seconds: float = 2.0
+
     sentry_dsn: str | None = None
     slack_webhook_url: str | None = None
     pagerduty_events_url: str | None = None
+    alert_queue_size: int = 1000
+    alert_coalesce_window_seconds: float = 60.0
+    alert_rate_limit_per_minute: int = 30
+    alert_max_retries: int = 3
+    alert_retry_backoff_seconds: float = 1.0
+    alert_http_timeout_seconds: float = 3.0
 
     slo_availability_target: float = 99.9
     slo_p95_latency_ms: int = 300
@@ -1,13 +1,30 @@
 from __future__ import annotations
 
+import threading
+import time
+from collections import OrderedDict
 from contextlib import contextmanager
 from datetime import datetime, timezone
 from typing import Iterator
 
-from sqlalchemy import DateTime, Integer, String, Text, create_engine
+from sqlalchemy import (
+    DateTime,
+    Float,
+    Index,
+    Integer,
+    LargeBinary,
+    PrimaryKeyConstraint,
+    String,
+    Text,
+    create_engine,
+    make_url,
+    text,
+)
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column, sessionmaker
 
 from app.config import settings
+from app.observability import app_logger, metrics
 
 
 class Base(DeclarativeBase):
@@ -32,18 +49,106 @@ class UserCredentialRecord(Base):
 
 class ImportJobRecord(Base):
     __tablename__ = 'import_jobs'
+    # user_id / status lookups are served by the composites; on Postgres the table is
+    # range-partitioned on created_at (see migration 0006), so the key has to include it and
+    # partition pruning replaces the old created_at index. job_id alone is only unique because ids
+    # are uuid4, which is why rows are still identified (session.get) by job_id
+    __table_args__ = (
+        PrimaryKeyConstraint('job_id', 'created_at'),
+        Index('ix_import_jobs_user_status_created_at', 'user_id', 'status', 'created_at'),
+        Index('ix_import_jobs_user_created_at', 'user_id', 'created_at'),
+        # only the few queued rows, for the worker's stale-job sweep
+        Index(
+            'ix_import_jobs_queued_updated_at',
+            'updated_at',
+            postgresql_where=text("status = 'queued'"),
+            sqlite_where=text("status = 'queued'"),
+        ),
+    )
+    __mapper_args__ = {'primary_key': ['job_id']}
 
-    job_id: Mapped[str] = mapped_column(String(64), primary_key=True)
-    user_id: Mapped[str] = mapped_column(String(64), index=True)
-    status: Mapped[str] = mapped_column(String(16), index=True)
+    job_id: Mapped[str] = mapped_column(String(64))
+    user_id: Mapped[str] = mapped_column(String(64))
+    status: Mapped[str] = mapped_column(String(16))
     progress_percent: Mapped[int] = mapped_column(Integer, default=0)
     attempts: Mapped[int] = mapped_column(Integer, default=0)
     channel: Mapped[str] = mapped_column(String(32), default='daily')
+    # queue lane chosen at submission, so a job pushed again lands where it was; NULL for older rows
+    lane: Mapped[str | None] = mapped_column(String(32), nullable=True)
     content_sha256: Mapped[str] = mapped_column(String(64), index=True)
     content_preview_masked: Mapped[str] = mapped_column(Text)
     last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True, default=lambda: datetime.now(timezone.utc))
-    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True, default=lambda: datetime.now(timezone.utc))
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+
+class ImportJobArchiveRecord(Base):
+    __tablename__ = 'import_jobs_archive'
+    __table_args__ = (Index('ix_import_jobs_archive_user_created_at', 'user_id', 'created_at'),)
+
+    job_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    user_id: Mapped[str] = mapped_column(String(64))
+    status: Mapped[str] = mapped_column(String(16))
+    channel: Mapped[str] = mapped_column(String(32))
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    content_sha256: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    archived_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+    @property
+    def progress_percent(self) -> int:
+        # only finished jobs are archived
+        return 100
+
+
+class ImportPayloadRecord(Base):
+    __tablename__ = 'import_payloads'
+
+    # raw upload, zlib-compressed, kept only until the worker has parsed it
+    job_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    user_id: Mapped[str] = mapped_column(String(64), index=True)
+    content: Mapped[bytes] = mapped_column(LargeBinary)
+    size_bytes: Mapped[int] = mapped_column(Integer)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+
+class ImportItemRecord(Base):
+    __tablename__ = 'import_items'
+    __table_args__ = (
+        Index('ix_import_items_user_kind', 'user_id', 'kind'),
+        # keyset order for /me/export
+        Index('ix_import_items_user_id_id', 'user_id', 'id'),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    job_id: Mapped[str] = mapped_column(String(64), index=True)
+    user_id: Mapped[str] = mapped_column(String(64))
+    kind: Mapped[str] = mapped_column(String(16))
+    text: Mapped[str] = mapped_column(String(500))
+    occurrences: Mapped[int] = mapped_column(Integer, default=1)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+
+class ReviewCardRecord(Base):
+    __tablename__ = 'review_cards'
+    __table_args__ = (Index('ix_review_cards_user_due_at', 'user_id', 'due_at'),)
+
+    card_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    user_id: Mapped[str] = mapped_column(String(64))
+    front: Mapped[str] = mapped_column(String(500))
+    back: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    source_job_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    ease: Mapped[float] = mapped_column(Float, default=2.5)
+    interval_days: Mapped[float] = mapped_column(Float, default=0.0)
+    repetitions: Mapped[int] = mapped_column(Integer, default=0)
+    lapses: Mapped[int] = mapped_column(Integer, default=0)
+    reviews: Mapped[int] = mapped_column(Integer, default=0)
+    due_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    last_reviewed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
 
 class IdempotencyRecord(Base):
@@ -69,10 +174,298 @@ engine = create_engine(settings.database_url, future=True)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
 
+class EngineRegistry:
+    def __init__(self, max_engines: int = 8, pool_size: int = 2, connect_timeout_seconds: int = 5):
+        self.max_engines = max_engines
+        self.pool_size = pool_size
+        self.connect_timeout_seconds = connect_timeout_seconds
+        self._engines: OrderedDict[str, tuple[str, Engine]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _create(self, url: str) -> Engine:
+        connect_args = {}
+        if make_url(url).get_backend_name() == 'postgresql':
+            connect_args['connect_timeout'] = self.connect_timeout_seconds
+        return create_engine(
+            url,
+            future=True,
+            pool_size=self.pool_size,
+            max_overflow=0,
+            pool_pre_ping=True,
+            pool_recycle=1800,
+            connect_args=connect_args,
+        )
+
+    def get(self, name: str, url: str) -> Engine:
+        stale: list[Engine] = []
+        with self._lock:
+            current = self._engines.get(name)
+            if current is not None and current[0] == url:
+                self._engines.move_to_end(name)
+                return current[1]
+            if current is not None:
+                stale.append(current[1])
+            engine = self._create(url)
+            self._engines[name] = (url, engine)
+            while len(self._engines) > self.max_engines:
+                _, (_, evicted) = self._engines.popitem(last=False)
+                stale.append(evicted)
+        for old in stale:
+            old.dispose()
+        return engine
+
+    def names(self) -> list[str]:
+        with self._lock:
+            return list(self._engines)
+
+    def dispose_all(self) -> None:
+        with self._lock:
+            engines = [engine for _, engine in self._engines.values()]
+            self._engines.clear()
+        for engine in engines:
+            engine.dispose()
+
+
+def replica_urls() -> list[str]:
+    return [url.strip() for url in settings.replica_database_urls.split(',') if url.strip()]
+
+
+def secondary_database_targets() -> dict[str, str]:
+    targets: dict[str, str] = {}
+    if settings.production_database_url:
+        targets['production'] = settings.production_database_url
+    for i, url in enumerate(replica_urls()):
+        targets[f'replica_{i}'] = url
+    if settings.analytics_database_url:
+        targets['analytics'] = settings.analytics_database_url
+    return targets
+
+
+def pool_stats(engine: Engine) -> dict[str, int]:
+    pool = engine.pool
+    stats = {}
+    for key, attr in (('size', 'size'), ('checked_out', 'checkedout'), ('overflow', 'overflow'), ('checked_in', 'checkedin')):
+        getter = getattr(pool, attr, None)
+        if callable(getter):
+            stats[key] = getter()
+    return stats
+
+
+def verify_engine(engine: Engine) -> dict:
+    start = time.perf_counter()
+    try:
+        with engine.connect() as conn:
+            connect_ms = (time.perf_counter() - start) * 1000
+            query_start = time.perf_counter()
+            conn.execute(text('SELECT 1'))
+            query_ms = (time.perf_counter() - query_start) * 1000
+            version_info = conn.dialect.server_version_info or ()
+    except Exception as exc:
+        return {'status': 'error', 'error': type(exc).__name__, 'pool': pool_stats(engine)}
+    return {
+        'status': 'ok',
+        'connect_ms': round(connect_ms, 2),
+        'query_ms': round(query_ms, 2),
+        'server_version': '.'.join(str(part) for part in version_info),
+        'dialect': engine.dialect.name,
+        'pool': pool_stats(engine),
+    }
+
+
+secondary_engines = EngineRegistry(
+    max_engines=settings.secondary_engine_max,
+    pool_size=settings.secondary_engine_pool_size,
+    connect_timeout_seconds=settings.secondary_engine_connect_timeout_seconds,
+)
+
+
+REPLICA_LAG_SQL = {
+    # the last replay timestamp stops moving while the primary is idle, so a replica that has
+    # replayed everything it received counts as caught up however old that timestamp is
+    'postgresql': (
+        'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+        'ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END'
+    ),
+}
+
+
+class ReplicaState:
+    def __init__(self, name: str, engine: Engine):
+        self.name = name
+        self.engine = engine
+        self.lag_seconds: float | None = None
+        # unchecked replicas take no reads until their first lag check says they are caught up
+        self.healthy = False
+        self.checked_at = 0.0
+
+
+class ReadRouter:
+    def __init__(
+        self,
+        primary: Engine,
+        replica_engines: list[Engine] | None = None,
+        max_lag_seconds: float = 5.0,
+        lag_check_interval_seconds: float = 5.0,
+        read_your_writes_seconds: float = 10.0,
+    ):
+        self.primary = primary
+        self.replicas = [ReplicaState(f'replica_{i}', e) for i, e in enumerate(replica_engines or [])]
+        self.max_lag_seconds = max_lag_seconds
+        self.lag_check_interval_seconds = lag_check_interval_seconds
+        self.read_your_writes_seconds = read_your_writes_seconds
+        self._recent_writers: dict[str, float] = {}
+        self._next = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def mark_write(self, user_id: str) -> None:
+        if not self.replicas:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._recent_writers[user_id] = now + self.read_your_writes_seconds
+            if len(self._recent_writers) > 10_000:
+                self._recent_writers = {k: v for k, v in self._recent_writers.items() if v > now}
+
+    def _pinned_to_primary(self, user_id: str | None) -> bool:
+        if user_id is None:
+            return False
+        until = self._recent_writers.get(user_id)
+        return until is not None and until > time.monotonic()
+
+    def _measure_lag(self, replica: ReplicaState) -> None:
+        sql = REPLICA_LAG_SQL.get(replica.engine.dialect.name)
+        try:
+            with replica.engine.connect() as conn:
+                replica.lag_seconds = float(conn.execute(text(sql)).scalar_one()) if sql else 0.0
+            replica.healthy = replica.lag_seconds <= self.max_lag_seconds
+        except Exception as exc:
+            replica.lag_seconds = None
+            replica.healthy = False
+            app_logger.warning(f'replica {replica.name} lag check failed: {exc}')
+        replica.checked_at = time.monotonic()
+
+    def _due_replicas(self) -> list[ReplicaState]:
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            for replica in self.replicas:
+                if now - replica.checked_at >= self.lag_check_interval_seconds:
+                    # claim the check so concurrent readers keep using the last known state
+                    replica.checked_at = now
+                    due.append(replica)
+        return due
+
+    def check_replicas(self) -> None:
+        for replica in self._due_replicas():
+            self._measure_lag(replica)
+
+    def _healthy_replicas(self) -> list[ReplicaState]:
+        # requests only read the last known state while the background checker runs; scripts that
+        # never start it check inline instead
+        if not self.running:
+            self.check_replicas()
+        return [replica for replica in self.replicas if replica.healthy]
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.check_replicas()
+            except Exception as exc:  # pragma: no cover - keep the checker alive
+                app_logger.error(f'replica lag check loop failed: {exc}')
+            self._stop.wait(self.lag_check_interval_seconds)
+
+    def start(self) -> None:
+        if not self.replicas or self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='replica-lag-checker', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def engine_for(self, user_id: str | None = None) -> tuple[str, Engine]:
+        if not self.replicas:
+            return 'primary', self.primary
+        if self._pinned_to_primary(user_id):
+            return 'primary_read_your_writes', self.primary
+        healthy = self._healthy_replicas()
+        if not healthy:
+            return 'primary_fallback', self.primary
+        with self._lock:
+            self._next = (self._next + 1) % len(healthy)
+            replica = healthy[self._next]
+        return replica.name, replica.engine
+
+    def status(self) -> list[dict]:
+        return [
+            {'name': r.name, 'healthy': r.healthy, 'lag_seconds': r.lag_seconds}
+            for r in self.replicas
+        ]
+
+
+def build_read_router() -> ReadRouter:
+    replica_engines = []
+    for url in replica_urls():
+        connect_args = {}
+        if make_url(url).get_backend_name() == 'postgresql':
+            # an unreachable replica must fail its lag check quickly instead of stalling the checker
+            connect_args['connect_timeout'] = settings.replica_connect_timeout_seconds
+        replica_engines.append(
+            create_engine(
+                url,
+                future=True,
+                pool_size=settings.replica_pool_size,
+                pool_pre_ping=True,
+                pool_recycle=1800,
+                connect_args=connect_args,
+            )
+        )
+    return ReadRouter(
+        engine,
+        replica_engines,
+        max_lag_seconds=settings.replica_max_lag_seconds,
+        lag_check_interval_seconds=settings.replica_lag_check_interval_seconds,
+        read_your_writes_seconds=settings.read_your_writes_window_seconds,
+    )
+
+
+read_router = build_read_router()
+ReadSessionLocal = sessionmaker(autoflush=False, autocommit=False, expire_on_commit=False, future=True)
+
+
 def init_db() -> None:
     Base.metadata.create_all(bind=engine)
 
 
+def ping_database() -> None:
+    with engine.connect() as conn:
+        conn.execute(text('SELECT 1'))
+
+
+@contextmanager
+def get_read_session(user_id: str | None = None, primary: bool = False) -> Iterator[Session]:
+    target, bind = ('primary', engine) if primary else read_router.engine_for(user_id)
+    metrics.record_db_read(target)
+    session = ReadSessionLocal(bind=bind)
+    try:
+        if bind.dialect.name == 'postgresql':
+            session.connection(execution_options={'postgresql_readonly': True})
+        yield session
+    finally:
+        # close() ends the transaction without expiring loaded rows, so they stay readable afterwards
+        session.close()
+
+
 @contextmanager
 def get_session() -> Iterator[Session]:
     session = SessionLocal()
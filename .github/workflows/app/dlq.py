@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import time
+from dataclasses import dataclass, replace
+from typing import Callable
+
+from sqlalchemy import select, update
+
+from app.config import settings
+from app.db import ImportJobRecord, get_read_session, get_session
+from app.observability import app_logger
+from app.queue import QueuedJob
+
+_UUID = re.compile(r'\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b', re.IGNORECASE)
+_HEX = re.compile(r'\b(?:0x)?[0-9a-f]{8,}\b', re.IGNORECASE)
+_NUMBER = re.compile(r'\d+(?:\.\d+)?')
+_QUOTED = re.compile(r"'[^']*'|\"[^\"]*\"")
+
+
+def error_signature(error: str | None) -> str:
+    if not error:
+        return 'unknown'
+    # strip ids, numbers and quoted values so the same failure groups together
+    text = error.strip().splitlines()[0]
+    text = _UUID.sub('<id>', text)
+    text = _HEX.sub('<hex>', text)
+    text = _QUOTED.sub('<str>', text)
+    text = _NUMBER.sub('<n>', text)
+    return ' '.join(text.split())[:200]
+
+
+def signature_id(signature: str) -> str:
+    return hashlib.blake2b(signature.encode('utf-8'), digest_size=6).hexdigest()
+
+
+@dataclass(frozen=True)
+class DeadLetter:
+    entry: QueuedJob
+    status: str | None
+    attempts: int
+    last_error: str | None
+    signature: str
+
+    @property
+    def signature_id(self) -> str:
+        return signature_id(self.signature)
+
+
+@dataclass
+class RedriveResult:
+    redriven: int = 0
+    scanned: int = 0
+    cursor: float | None = None
+    done: bool = False
+
+
+def _join_jobs(entries: list[QueuedJob], primary: bool = False) -> list[DeadLetter]:
+    if not entries:
+        return []
+    with get_read_session(primary=primary) as session:
+        rows = {
+            row.job_id: row
+            for row in session.execute(
+                select(
+                    ImportJobRecord.job_id,
+                    ImportJobRecord.user_id,
+                    ImportJobRecord.status,
+                    ImportJobRecord.attempts,
+                    ImportJobRecord.last_error,
+                ).where(ImportJobRecord.job_id.in_([entry.job_id for entry in entries]))
+            )
+        }
+    letters = []
+    for entry in entries:
+        row = rows.get(entry.job_id)
+        if row is None:
+            # the job was deleted (e.g. DELETE /me/data); nothing to redrive
+            letters.append(DeadLetter(entry, None, 0, None, 'job missing'))
+            continue
+        if not entry.user_id:
+            entry = replace(entry, user_id=row.user_id)
+        letters.append(DeadLetter(entry, row.status, row.attempts, row.last_error, error_signature(row.last_error)))
+    return letters
+
+
+def list_dead_letters(queue, after: float | None = None, limit: int = 100) -> tuple[list[DeadLetter], float | None]:
+    entries = queue.dead_letters(after=after, limit=limit)
+    next_cursor = entries[-1].enqueued_at if len(entries) == limit else None
+    return _join_jobs(entries), next_cursor
+
+
+def summarize_dead_letters(queue, scan_limit: int = 10_000, page_size: int = 1000) -> list[dict]:
+    groups: dict[str, dict] = {}
+    after = None
+    scanned = 0
+    while scanned < scan_limit:
+        letters, after = list_dead_letters(queue, after=after, limit=min(page_size, scan_limit - scanned))
+        scanned += len(letters)
+        for letter in letters:
+            group = groups.setdefault(
+                letter.signature_id,
+                {'signature_id': letter.signature_id, 'signature': letter.signature, 'count': 0, 'sample_job_ids': []},
+            )
+            group['count'] += 1
+            if len(group['sample_job_ids']) < 5:
+                group['sample_job_ids'].append(letter.entry.job_id)
+        if after is None:
+            break
+    return sorted(groups.values(), key=lambda group: group['count'], reverse=True)
+
+
+def redrive_dead_letters(
+    queue,
+    signature: str | None = None,
+    limit: int | None = None,
+    batch_size: int | None = None,
+    rate_per_second: float | None = None,
+    max_main_depth: int | None = None,
+    after: float | None = None,
+    sleep: Callable[[float], None] = time.sleep,
+    on_batch: Callable[[RedriveResult], None] | None = None,
+) -> RedriveResult:
+    batch_size = batch_size or settings.dlq_redrive_batch_size
+    rate_per_second = settings.dlq_redrive_rate_per_second if rate_per_second is None else rate_per_second
+    max_main_depth = settings.dlq_redrive_max_main_depth if max_main_depth is None else max_main_depth
+    result = RedriveResult(cursor=after)
+    # jobs that fail again during this run land behind this mark and are left for the next run
+    run_started = time.time()
+
+    while limit is None or result.redriven < limit:
+        # back off while the main queue is still working through earlier redrives
+        while max_main_depth and queue.metrics().main_depth >= max_main_depth:
+            sleep(1.0)
+
+        started = time.monotonic()
+        entries = [entry for entry in queue.dead_letters(after=result.cursor, limit=batch_size) if entry.enqueued_at <= run_started]
+        if not entries:
+            result.done = True
+            break
+        result.scanned += len(entries)
+        result.cursor = entries[-1].enqueued_at
+
+        letters = [
+            letter
+            for letter in _join_jobs(entries, primary=True)
+            if letter.status is not None and (signature is None or signature in (letter.signature, letter.signature_id))
+        ]
+        if limit is not None and len(letters) > limit - result.redriven:
+            letters = letters[: limit - result.redriven]
+            # resume right after the last job taken, not after the last one scanned
+            result.cursor = letters[-1].entry.enqueued_at
+        if letters:
+            job_ids = [letter.entry.job_id for letter in letters]
+            # reset the jobs before they become visible to workers; last_error is kept so an
+            # interrupted run still matches the same signature when it is resumed
+            with get_session() as session:
+                session.execute(
+                    update(ImportJobRecord)
+                    .where(ImportJobRecord.job_id.in_(job_ids))
+                    .values(status='queued', attempts=0)
+                    .execution_options(synchronize_session=False)
+                )
+            result.redriven += queue.redrive([letter.entry for letter in letters])
+
+        if on_batch is not None:
+            on_batch(result)
+        if letters and rate_per_second:
+            sleep(max(0.0, len(letters) / rate_per_second - (time.monotonic() - started)))
+
+    app_logger.info(f'dlq redrive finished: redriven={result.redriven} scanned={result.scanned}')
+    return result
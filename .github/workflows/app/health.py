@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable
+
+from app.config import settings
+from app.observability import app_logger, now_ms
+from app.redis_clients import redis_clients
+from app.schemas import DependencyCheck, ReadyResponse
+
+HealthCheck = Callable[[], object]
+REQUIRED_CHECKS = ('db',)
+
+
+def build_redis_ping() -> HealthCheck | None:
+    # goes through the shared breaker: fails fast while it is open, and is the trial call that closes it
+    client = redis_clients.get(decode_responses=False, socket_timeout=settings.health_check_timeout_seconds)
+    return client.ping if client is not None else None
+
+
+class HealthMonitor:
+    def __init__(
+        self,
+        checks: dict[str, HealthCheck | None],
+        interval_seconds: float = 5.0,
+        stale_after_seconds: float = 30.0,
+        require_warmup: bool = False,
+    ):
+        self.checks = checks
+        self.interval_seconds = interval_seconds
+        self.stale_after_seconds = stale_after_seconds
+        self._results: dict[str, DependencyCheck] = {
+            name: DependencyCheck(status='not_configured' if check is None else 'unknown', latency_ms=0.0)
+            for name, check in checks.items()
+        }
+        self._state: tuple[ReadyResponse, bytes, float] | None = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._warm = threading.Event()
+        if not require_warmup:
+            self._warm.set()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run_check(self, name: str, check: HealthCheck | None) -> DependencyCheck:
+        previous = self._results[name]
+        if check is None:
+            return previous
+        checked_at = datetime.now(timezone.utc)
+        start = now_ms()
+        try:
+            check()
+        except Exception as exc:
+            app_logger.warning(f'health check {name} failed: {exc}')
+            return DependencyCheck(
+                status='error',
+                latency_ms=round(now_ms() - start, 2),
+                last_checked_at=checked_at,
+                last_success_at=previous.last_success_at,
+                error=type(exc).__name__,
+            )
+        return DependencyCheck(
+            status='ok',
+            latency_ms=round(now_ms() - start, 2),
+            last_checked_at=checked_at,
+            last_success_at=checked_at,
+        )
+
+    def refresh(self) -> ReadyResponse:
+        with self._refresh_lock:
+            results = {name: self._run_check(name, check) for name, check in self.checks.items()}
+            healthy = all(
+                result.status == 'ok' if name in REQUIRED_CHECKS else result.status in ('ok', 'not_configured')
+                for name, result in results.items()
+            )
+            statuses = {name: result.status for name, result in results.items()}
+            ready = ReadyResponse(
+                status='ready' if healthy else 'degraded',
+                db=statuses.get('db', 'not_configured'),
+                redis=statuses.get('redis', 'not_configured'),
+                queue=statuses.get('queue', 'not_configured'),
+                checks=results,
+                checked_at=datetime.now(timezone.utc),
+            )
+            self._results = results
+            # serialised once per interval so /ready itself never touches a dependency
+            self._state = (ready, ready.model_dump_json().encode('utf-8'), time.monotonic())
+            return ready
+
+    def mark_warm(self) -> None:
+        self._warm.set()
+
+    def ready_body(self) -> bytes:
+        state = self._state
+        if state is None or (not self.running and time.monotonic() - state[2] > self.interval_seconds):
+            self.refresh()
+            state = self._state
+        ready, body, refreshed_at = state
+        if not self._warm.is_set():
+            # dependencies may already answer, but the process has not finished warming up
+            return ready.model_copy(update={'status': 'starting'}).model_dump_json().encode('utf-8')
+        if time.monotonic() - refreshed_at > self.stale_after_seconds:
+            # the background loop has stopped making progress; do not keep reporting ready
+            return ready.model_copy(update={'status': 'degraded'}).model_dump_json().encode('utf-8')
+        return body
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as exc:  # pragma: no cover - keep the monitor alive
+                app_logger.error(f'health monitor refresh failed: {exc}')
+            self._stop.wait(self.interval_seconds)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='health-monitor', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import codecs
+import re
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator
+
+from app.security import mask_pii
+
+# (speaker, text) line formats of the chat exports we see most
+_MESSAGE_FORMATS = (
+    # KakaoTalk PC: [name] [오후 3:12] message
+    re.compile(r'^\[(?P<speaker>[^\]]+)\] \[[^\]]+\] (?P<text>.*)$'),
+    # KakaoTalk mobile: 2024. 1. 5. 오후 3:12, name : message
+    re.compile(r'^\d{4}\. ?\d{1,2}\. ?\d{1,2}\.? [^,]+, (?P<speaker>[^:]+?) : (?P<text>.*)$'),
+    # WhatsApp: 1/5/24, 3:12 PM - name: message  or  [05.01.24, 15:12:01] name: message
+    re.compile(r'^\[?\d{1,4}[./-]\d{1,2}[./-]\d{1,4},? [\d:]+(?: ?[APap][Mm])?\]?(?: -)? (?P<speaker>[^:]+?): (?P<text>.*)$'),
+)
+_DATE_HEADER = re.compile(r'^-{3,}.*-{3,}$|^\d{4}년 \d{1,2}월 \d{1,2}일')
+_SKIPPED_TEXT = frozenset({'<Media omitted>', '사진', '동영상', '이모티콘', '삭제된 메시지입니다.', 'This message was deleted'})
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+_WORD = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)?")
+
+
+@dataclass(frozen=True)
+class Message:
+    speaker: str
+    text: str
+    position: int
+
+
+@dataclass
+class ImportResult:
+    words: Counter = field(default_factory=Counter)
+    phrases: Counter = field(default_factory=Counter)
+    sentences: list[str] = field(default_factory=list)
+    messages: int = 0
+    bytes_processed: int = 0
+
+
+def compress_content(text: str) -> tuple[bytes, int]:
+    raw = text.encode('utf-8')
+    return zlib.compress(raw, 6), len(raw)
+
+
+def decode_chunks(blob: bytes, chunk_size: int) -> Iterator[tuple[str, int]]:
+    # yields decoded text with the number of uncompressed bytes consumed so far;
+    # decompression is bounded per step so a highly compressible upload never inflates at once
+    decompressor = zlib.decompressobj()
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    pending = blob
+    consumed = 0
+    while not decompressor.eof:
+        raw = decompressor.decompress(pending, chunk_size)
+        pending = decompressor.unconsumed_tail
+        if not raw and not pending:
+            break
+        consumed += len(raw)
+        text = decoder.decode(raw)
+        if text:
+            yield text, consumed
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail, consumed
+
+
+def split_lines(chunks: Iterable[tuple[str, int]]) -> Iterator[tuple[str, int]]:
+    pending = ''
+    position = 0
+    for text, position in chunks:
+        pending += text
+        *lines, pending = pending.split('\n')
+        for line in lines:
+            yield line.rstrip('\r'), position
+    if pending:
+        yield pending.rstrip('\r'), position
+
+
+def split_messages(lines: Iterable[tuple[str, int]]) -> Iterator[Message]:
+    current: Message | None = None
+    for line, position in lines:
+        stripped = line.strip()
+        if not stripped or _DATE_HEADER.match(stripped):
+            continue
+        for pattern in _MESSAGE_FORMATS:
+            match = pattern.match(stripped)
+            if match:
+                if current is not None:
+                    yield current
+                current = Message(match['speaker'].strip(), match['text'].strip(), position)
+                break
+        else:
+            if current is None:
+                # plain text export: every line is its own message
+                yield Message('', stripped, position)
+            else:
+                # a multi-line message continues until the next header line
+                current = Message(current.speaker, f'{current.text} {stripped}', position)
+    if current is not None:
+        yield current
+
+
+def split_sentences(messages: Iterable[Message]) -> Iterator[tuple[str, int]]:
+    for message in messages:
+        if message.text in _SKIPPED_TEXT:
+            continue
+        for sentence in _SENTENCE_END.split(message.text):
+            sentence = sentence.strip()
+            if sentence:
+                yield sentence, message.position
+
+
+def parse_import(
+    blob: bytes,
+    chunk_size: int = 64 * 1024,
+    max_sentences: int = 200,
+    on_progress: Callable[[int], None] | None = None,
+) -> ImportResult:
+    result = ImportResult()
+    seen_sentences: set[str] = set()
+    last_position = 0
+
+    def tracked(chunks: Iterable[tuple[str, int]]) -> Iterator[tuple[str, int]]:
+        for text, consumed in chunks:
+            result.bytes_processed = consumed
+            yield text, consumed
+
+    def counted(stream: Iterable[Message]) -> Iterator[Message]:
+        for message in stream:
+            result.messages += 1
+            yield message
+
+    messages = split_messages(split_lines(tracked(decode_chunks(blob, chunk_size))))
+    for sentence, position in split_sentences(counted(messages)):
+        tokens = [token.lower() for token in _WORD.findall(sentence)]
+        result.words.update(token for token in tokens if len(token) > 1)
+        result.phrases.update(f'{first} {second}' for first, second in zip(tokens, tokens[1:]))
+        if len(tokens) >= 3 and len(result.sentences) < max_sentences:
+            masked = mask_pii(sentence)
+            if masked not in seen_sentences:
+                seen_sentences.add(masked)
+                result.sentences.append(masked)
+        if on_progress is not None and position != last_position:
+            on_progress(position)
+        last_position = position
+    return result
+
+
+def item_rows(result: ImportResult, job_id: str, user_id: str, min_phrase_occurrences: int = 2) -> list[dict]:
+    rows = [
+        {'job_id': job_id, 'user_id': user_id, 'kind': 'word', 'text': word[:500], 'occurrences': count}
+        for word, count in result.words.items()
+    ]
+    rows.extend(
+        {'job_id': job_id, 'user_id': user_id, 'kind': 'phrase', 'text': phrase[:500], 'occurrences': count}
+        for phrase, count in result.phrases.items()
+        if count >= min_phrase_occurrences
+    )
+    rows.extend(
+        {'job_id': job_id, 'user_id': user_id, 'kind': 'sentence', 'text': sentence, 'occurrences': 1}
+        for sentence in result.sentences
+    )
+    return rows
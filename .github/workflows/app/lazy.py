@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import threading
+from typing import Callable, Generic, TypeVar
+
+T = TypeVar('T')
+
+registry: dict[str, Lazy] = {}
+
+
+class Lazy(Generic[T]):
+    # stands in for a module-level singleton; the real object is built on first attribute access
+    __slots__ = ('name', '_factory', '_instance', '_lock')
+
+    def __init__(self, factory: Callable[[], T], name: str):
+        self.name = name
+        self._factory = factory
+        self._instance: T | None = None
+        self._lock = threading.Lock()
+        registry[name] = self
+
+    @property
+    def built(self) -> bool:
+        return self._instance is not None
+
+    def get(self) -> T:
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+                instance = self._instance
+        return instance
+
+    def if_built(self) -> T | None:
+        return self._instance
+
+    def __getattr__(self, attribute: str):
+        return getattr(self.get(), attribute)
+
+    def __setattr__(self, attribute: str, value) -> None:
+        if attribute in Lazy.__slots__:
+            object.__setattr__(self, attribute, value)
+        else:
+            setattr(self.get(), attribute, value)
+
+    def __repr__(self) -> str:
+        state = 'built' if self.built else 'pending'
+        return f'<Lazy {self.name} ({state})>'
@@ -1,33 +1,72 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import asdict
 from datetime import datetime, timezone
 import hashlib
+import json
 import re
-from functools import lru_cache
+import time
+from typing import Literal
 from uuid import uuid4
 
 from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy import create_engine, func, select, text
+from pydantic import TypeAdapter
+from sqlalchemy import delete, func, literal, select, union_all
 
 from app.alerts import alerts
+from app.analysis import EngineOverloaded, EngineTimeout, build_micro_batcher
+from app.autoscale import autoscaler
+from app.cache import build_response_cache, cache_key, normalize_text
+from app.capture import traffic_capture
 from app.config import settings
 from app.db import (
     IdempotencyRecord,
+    ImportItemRecord,
+    ImportJobArchiveRecord,
     ImportJobRecord,
+    ImportPayloadRecord,
+    ReviewCardRecord,
     RevokedTokenRecord,
     UserRoleRecord,
     UserCredentialRecord,
+    get_read_session,
     get_session,
     init_db,
+    ping_database,
+    read_router,
+    secondary_database_targets,
+    secondary_engines,
+    verify_engine,
 )
-from app.observability import app_logger, metrics, now_ms
-from app.queue import build_queue
+from app.dlq import list_dead_letters, redrive_dead_letters, summarize_dead_letters
+from app.export import export_imports, gzip_stream
+from app.health import HealthMonitor, build_redis_ping
+from app.importer import compress_content
+from app.lazy import Lazy
+from app.middleware import RequestContextMiddleware
+from app.observability import app_logger, metrics
+from app.onboarding import etag_matches, plan_table
+from app.queue import QueueUnavailable
 from app.rate_limit import build_rate_limiter
+from app.redis_clients import redis_clients
+from app.responses import FastJSONResponse, TrustedModelRoute, dumps
 from app.schemas import (
+    PLAN_MAX_MINUTES,
+    PLAN_MIN_MINUTES,
     CalculatedPlan,
+    CardCreateRequest,
     ChatAlternative,
     ChatAnalyzeRequest,
     ChatAnalyzeResponse,
+    DeadLetterGroup,
+    DeadLetterItem,
+    DeadLetterPage,
+    DueCardsResponse,
+    GoalType,
     HealthResponse,
     ImportJob,
     ImportListResponse,
@@ -36,23 +75,56 @@ from app.schemas import (
     OnboardingGoal,
     QueueMetricsResponse,
     ReadyResponse,
+    RedriveRequest,
+    RedriveResponse,
     RefreshTokenRequest,
+    ReviewCard,
+    ReviewRequest,
     TokenPair,
     UserLoginRequest,
     UserSignupRequest,
+    VocabularyResponse,
+    VocabularyTerm,
 )
-from app.security import create_access_token, create_refresh_token, decode_token, hash_password, verify_password
-from app.worker import process_batch
+from app.security import (
+    create_access_token,
+    decode_token,
+    hash_password,
+    mask_pii,
+    verify_password,
+)
+from app.srs import ReviewConflict, add_cards, due_cards, record_review
+from app.token_store import TokenStoreUnavailable, issue_refresh_token, revoke_refresh_token, rotate_refresh_token
+from app.vocab_index import vocab_index
+from app.warmup import StartupReport, run_warmup
+from app.worker import process_batch, queue
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    startup()
+    try:
+        yield
+    finally:
+        shutdown()
 
-try:
-    import sentry_sdk
-except Exception:  # pragma: no cover
-    sentry_sdk = None
 
-app = FastAPI(title=settings.app_name, version=settings.app_version)
+app = FastAPI(title=settings.app_name, version=settings.app_version, lifespan=lifespan, default_response_class=FastJSONResponse)
+# handler-built response models go straight to pydantic's JSON encoder instead of being validated twice
+app.router.route_class = TrustedModelRoute
 security = HTTPBearer(auto_error=True)
-rate_limiter = build_rate_limiter()
-queue = build_queue()
+# built on first use (or during warm-up) so importing the app stays cheap for scripts and alembic
+rate_limiter = Lazy(build_rate_limiter, 'rate_limiter')
+chat_cache = Lazy(lambda: build_response_cache('chat_analyze'), 'chat_cache')
+analysis_batcher = Lazy(build_micro_batcher, 'analysis_batcher')
+health_monitor = HealthMonitor(
+    {'db': ping_database, 'redis': build_redis_ping(), 'queue': lambda: queue.ping()},
+    interval_seconds=settings.health_check_interval_seconds,
+    stale_after_seconds=settings.health_check_stale_after_seconds,
+    require_warmup=True,
+)
+startup_report: StartupReport | None = None
+chat_alternatives_adapter = TypeAdapter(list[ChatAlternative])
 
 app.add_middleware(
     CORSMiddleware,
@@ -60,91 +132,55 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=['*'],
     allow_headers=['*'],
+    max_age=settings.cors_max_age_seconds,
 )
+# added last so it wraps CORS: preflight answers get request ids and security headers too
+app.add_middleware(RequestContextMiddleware)
 
 
 def utc_now() -> datetime:
     return datetime.now(timezone.utc)
 
 
-def _is_secure_request(request: Request) -> bool:
-    proto = request.headers.get('X-Forwarded-Proto', request.url.scheme)
-    return proto == 'https'
-
-
-@app.middleware('http')
-async def observability_and_security_middleware(request: Request, call_next):
-    start = now_ms()
-    request_id = request.headers.get('X-Request-ID', str(uuid4()))
-
-    api_version = 'unversioned'
-    if request.scope.get('path', '').startswith('/v1/'):
-        request.scope['path'] = request.scope['path'][3:]
-        api_version = 'v1'
-
-    if settings.enforce_https and not _is_secure_request(request) and request.url.path not in ('/health', '/ready', '/v1/health', '/v1/ready'):
-        latency = now_ms() - start
-        metrics.record_request(latency, 400)
-        app_logger.warning(
-            'https required',
-            extra={'request_id': request_id, 'path': request.url.path, 'method': request.method, 'status_code': 400, 'latency_ms': round(latency, 2)},
-        )
-        raise HTTPException(status_code=400, detail='https required')
-
+def _init_sentry() -> None:
+    if not settings.sentry_dsn:
+        return
     try:
-        response = await call_next(request)
-    except Exception as exc:
-        latency = now_ms() - start
-        metrics.record_request(latency, 500)
-        app_logger.error(
-            'request failed',
-            extra={'request_id': request_id, 'path': request.url.path, 'method': request.method, 'status_code': 500, 'latency_ms': round(latency, 2)},
-        )
-        alerts.notify_error('api_exception', f'path={request.url.path} request_id={request_id} error={exc}')
-        raise
-
-    latency = now_ms() - start
-    metrics.record_request(latency, response.status_code)
-    app_logger.info(
-        'request completed',
-        extra={
-            'request_id': request_id,
-            'path': request.url.path,
-            'method': request.method,
-            'status_code': response.status_code,
-            'latency_ms': round(latency, 2),
-        },
-    )
-
-    response.headers['X-Request-ID'] = request_id
-    response.headers['X-API-Version'] = api_version
-    response.headers['X-Content-Type-Options'] = 'nosniff'
-    response.headers['X-Frame-Options'] = 'DENY'
-    response.headers['Referrer-Policy'] = 'no-referrer'
-    response.headers['Cache-Control'] = 'no-store'
-    if settings.hsts_enabled:
-        response.headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains; preload'
-    return response
+        import sentry_sdk
+    except Exception:  # pragma: no cover - optional dependency at runtime
+        return
+    sentry_sdk.init(dsn=settings.sentry_dsn, traces_sample_rate=0.2)
 
 
-@app.on_event('startup')
 def startup() -> None:
+    global startup_report
     if len(settings.jwt_secret) < 32:
         raise RuntimeError('JWT_SECRET is not secure enough for runtime use')
-    init_db()
-    if settings.sentry_dsn and sentry_sdk is not None:
-        sentry_sdk.init(dsn=settings.sentry_dsn, traces_sample_rate=0.2)
+    # /ready answers 'starting' until warm-up is done, so traffic only arrives at a warm process
+    health_monitor.start()
+    read_router.start()
+    startup_report = run_warmup(
+        {'sentry': _init_sentry},
+        required_steps={'init_db': init_db, 'plan_table': plan_table.reload},
+    )
+    health_monitor.mark_warm()
 
 
-def is_token_revoked(jti: str) -> bool:
-    with get_session() as session:
-        return session.get(RevokedTokenRecord, jti) is not None
+def shutdown() -> None:
+    health_monitor.stop()
+    read_router.stop()
+    secondary_engines.dispose_all()
+    for singleton in (analysis_batcher, alerts):
+        instance = singleton.if_built()
+        if instance is not None:
+            instance.close()
+    traffic_capture.close()
+    redis_clients.close()
 
 
-def revoke_token(jti: str, user_id: str, token_type: str, exp: datetime) -> None:
-    with get_session() as session:
-        if not session.get(RevokedTokenRecord, jti):
-            session.add(RevokedTokenRecord(jti=jti, user_id=user_id, token_type=token_type, expires_at=exp))
+def is_token_revoked(jti: str, user_id: str | None = None, primary: bool = False) -> bool:
+    with get_read_session(user_id, primary=primary) as session:
+        return session.get(RevokedTokenRecord, jti) is not None
 
 
 def cleanup_expired_revoked_tokens() -> int:
@@ -163,14 +199,14 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
     except Exception as exc:
         raise HTTPException(status_code=401, detail='invalid access token') from exc
 
-    if is_token_revoked(payload['jti']):
+    if is_token_revoked(payload['jti'], payload['sub']):
         raise HTTPException(status_code=401, detail='token revoked')
 
     return payload['sub']
 
 
 def get_admin_user(user_id: str = Depends(get_current_user)) -> str:
-    with get_session() as session:
+    with get_read_session(user_id) as session:
         role = session.get(UserRoleRecord, user_id)
     if not role or role.role != 'admin':
         raise HTTPException(status_code=403, detail='admin required')
@@ -193,26 +229,8 @@ def health_check() -> HealthResponse:
 
 
 @app.get('/ready', response_model=ReadyResponse)
-def readiness_check() -> ReadyResponse:
-    db = 'ok'
-    redis = 'ok'
-
-    try:
-        with get_session() as session:
-            session.execute(select(ImportJobRecord).limit(1))
-    except Exception:
-        db = 'error'
-
-    if settings.redis_url:
-        try:
-            _ = rate_limiter.allow('readiness_probe')
-        except Exception:
-            redis = 'error'
-    else:
-        redis = 'not_configured'
-
-    status = 'ready' if db == 'ok' and redis in ('ok', 'not_configured') else 'degraded'
-    return ReadyResponse(status=status, db=db, redis=redis)
+def readiness_check() -> Response:
+    return Response(content=health_monitor.ready_body(), media_type='application/json')
 
 
 @app.get('/admin/observability/metrics')
@@ -223,7 +241,10 @@ def observability_metrics(_: str = Depends(get_admin_user)) -> dict:
         'depth': queue_m.main_depth,
         'dlq_depth': queue_m.dlq_depth,
         'oldest_job_age_seconds': queue_m.oldest_job_age_seconds,
+        'lanes': {name: asdict(lane) for name, lane in queue_m.lanes.items()},
     }
+    snapshot['db_replicas'] = read_router.status()
+    snapshot['startup'] = startup_report.as_dict() if startup_report else None
     snapshot['slo'] = {
         'availability_target_percent': settings.slo_availability_target,
         'p95_latency_target_ms': settings.slo_p95_latency_ms,
@@ -233,17 +254,14 @@ def observability_metrics(_: str = Depends(get_admin_user)) -> dict:
 
 
 
-def _mask_pii(text: str) -> str:
-    # email
-    text = re.sub(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+", "[EMAIL]", text)
-    # phone variants
-    text = re.sub(r"\b(?:\+?\d{1,3}[ -]?)?(?:\d{2,4}[ -]?)?\d{3,4}[ -]?\d{4}\b", "[PHONE]", text)
-    # possible account number and resident-id like patterns
-    text = re.sub(r"\b\d{6}-?\d{7}\b", "[NATIONAL_ID]", text)
-    text = re.sub(r"\b\d{2,6}-\d{2,6}-\d{2,6}\b", "[ACCOUNT]", text)
-    # rough address masking (Korean road names)
-    text = re.sub(r"[가-힣0-9\- ]{2,}(로|길|동|구|시)\s*\d+(-\d+)?", "[ADDRESS]", text)
-    return text[:500]
+def _import_lane(session, user_id: str) -> str:
+    # a user's first few pending imports stay interactive; anything beyond that is a bulk upload
+    pending = session.execute(
+        select(func.count())
+        .select_from(ImportJobRecord)
+        .where(ImportJobRecord.user_id == user_id, ImportJobRecord.status.in_(('queued', 'processing')))
+    ).scalar_one()
+    return 'interactive' if pending < settings.queue_interactive_max_pending else 'bulk'
 
 
 def _sha256_text(text: str) -> str:
@@ -251,6 +269,11 @@ def _sha256_text(text: str) -> str:
 
 @app.get('/metrics')
 def prometheus_metrics() -> Response:
+    try:
+        # keeps app_worker_desired_workers current for the HPA/KEDA scraper
+        autoscaler.update(queue.metrics())
+    except Exception as exc:
+        app_logger.warning(f'autoscaler update failed: {exc}')
     return Response(content=metrics.to_prometheus(), media_type='text/plain; version=0.0.4')
 
 
@@ -268,22 +291,27 @@ def signup(req: UserSignupRequest) -> TokenPair:
         if existing:
             raise HTTPException(status_code=409, detail='user already exists')
         session.add(UserCredentialRecord(user_id=req.user_id, password_hash=hash_password(req.password)))
+    read_router.mark_write(req.user_id)
 
     return TokenPair(
         access_token=create_access_token(req.user_id),
-        refresh_token=create_refresh_token(req.user_id),
+        refresh_token=issue_refresh_token(req.user_id),
     )
 
 
 @app.post('/auth/login', response_model=TokenPair)
 def login(req: UserLoginRequest) -> TokenPair:
-    with get_session() as session:
+    with get_read_session(req.user_id) as session:
         cred = session.get(UserCredentialRecord, req.user_id)
+    if not cred:
+        # an account created moments ago may not have reached the replica yet
+        with get_read_session(primary=True) as session:
+            cred = session.get(UserCredentialRecord, req.user_id)
     if not cred or not verify_password(req.password, cred.password_hash):
         raise HTTPException(status_code=401, detail='invalid credentials')
     return TokenPair(
         access_token=create_access_token(req.user_id),
-        refresh_token=create_refresh_token(req.user_id),
+        refresh_token=issue_refresh_token(req.user_id),
     )
 
 
@@ -294,17 +322,15 @@ def refresh(req: RefreshTokenRequest) -> TokenPair:
     except Exception as exc:
         raise HTTPException(status_code=401, detail='invalid refresh token') from exc
 
-    if is_token_revoked(payload['jti']):
+    try:
+        _, refresh_token = rotate_refresh_token(payload)
+    except TokenStoreUnavailable as exc:
+        raise HTTPException(status_code=503, detail='token store unavailable, retry shortly') from exc
+    if refresh_token is None:
         metrics.record_refresh_revoke_hit()
         raise HTTPException(status_code=401, detail='token revoked')
 
-    revoke_token(payload['jti'], payload['sub'], 'refresh', datetime.fromtimestamp(payload['exp'], tz=timezone.utc))
-
-    user_id = payload['sub']
-    return TokenPair(
-        access_token=create_access_token(user_id),
-        refresh_token=create_refresh_token(user_id),
-    )
+    return TokenPair(access_token=create_access_token(payload['sub']), refresh_token=refresh_token)
 
 
 @app.post('/auth/logout', status_code=204)
@@ -314,50 +340,74 @@ def logout(req: LogoutRequest, _: str = Depends(get_current_user)) -> Response:
     except Exception as exc:
         raise HTTPException(status_code=401, detail='invalid refresh token') from exc
 
-    revoke_token(payload['jti'], payload['sub'], 'refresh', datetime.fromtimestamp(payload['exp'], tz=timezone.utc))
+    revoke_refresh_token(payload)
     return Response(status_code=204)
 
 
-@app.post('/onboarding/calculate-plan', response_model=CalculatedPlan)
-def calculate_onboarding_plan(goal: OnboardingGoal, request: Request, user_id: str = Depends(get_current_user)) -> CalculatedPlan:
-    enforce_rate_limit(request, user_id)
+def _plan_response(goal_type: str, target_language: str, minutes_per_day: int, if_none_match: str | None, cache_control: str) -> Response:
+    entry = plan_table.lookup(goal_type, target_language, minutes_per_day)
+    headers = {'ETag': entry.etag, 'Cache-Control': cache_control}
+    if etag_matches(if_none_match, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type='application/json', headers=headers)
 
-    words_count = max(4, int(goal.minutes_per_day * 0.8))
-    sentences_count = max(2, int(goal.minutes_per_day * 0.3))
-    chat_turns = max(2, int(goal.minutes_per_day * 0.25))
 
-    return CalculatedPlan(
-        minutes_per_day=goal.minutes_per_day,
-        words_count=words_count,
-        sentences_count=sentences_count,
-        chat_turns=chat_turns,
-        plan_preview=f"{goal.minutes_per_day} min/day → {words_count} words + {sentences_count} sentences + {chat_turns} chat turns",
+@app.post('/onboarding/calculate-plan', response_model=CalculatedPlan)
+def calculate_onboarding_plan(
+    goal: OnboardingGoal,
+    request: Request,
+    if_none_match: str | None = Header(default=None),
+    user_id: str = Depends(get_current_user),
+) -> Response:
+    enforce_rate_limit(request, user_id)
+    return _plan_response(goal.goal_type, goal.target_language, goal.minutes_per_day, if_none_match, 'private, no-cache')
+
+
+@app.get('/onboarding/plan', response_model=CalculatedPlan)
+def get_onboarding_plan(
+    minutes_per_day: int = Query(ge=PLAN_MIN_MINUTES, le=PLAN_MAX_MINUTES),
+    goal_type: GoalType = Query(default='both'),
+    target_language: str = Query(default='English', max_length=64),
+    if_none_match: str | None = Header(default=None),
+) -> Response:
+    # plans are derived from shared rules only, so they can be cached by clients and CDNs
+    return _plan_response(
+        goal_type, target_language, minutes_per_day, if_none_match, f'public, max-age={settings.onboarding_plan_max_age_seconds}'
     )
 
 
-@lru_cache(maxsize=256)
-def cached_chat_alternatives(text: str, tone_preference: str) -> tuple[tuple[str, str], ...]:
-    _ = text
-    if tone_preference == 'business':
-        return (
-            ('business', 'Could we revisit this tomorrow?'),
-            ('business', 'Let me review this and get back to you.'),
-            ('natural', 'I am tied up right now, can we reschedule?'),
-        )
+@app.post('/admin/onboarding/reload-rules')
+def reload_onboarding_rules(_: str = Depends(get_admin_user)) -> dict[str, str | int]:
+    # applies the file at once in this process; the others pick it up on their next rules-file check
+    try:
+        plan_table.reload()
+    except Exception as exc:
+        raise HTTPException(status_code=400, detail=f'invalid onboarding rules: {exc}') from exc
+    return {'rules_version': plan_table.rules_version, 'entries': len(plan_table)}
 
-    return (
-        ('daily', 'Can we do this a bit later?'),
-        ('daily', 'I am swamped right now.'),
-        ('natural', 'Let us pick this up tomorrow.'),
-    )
+
+def _render_chat_alternatives(text: str, tone_preference: str) -> bytes:
+    try:
+        pairs = analysis_batcher.analyze(text, tone_preference, timeout=settings.chat_engine_timeout_seconds)
+    except EngineOverloaded as exc:
+        raise HTTPException(status_code=503, detail='analysis engine overloaded') from exc
+    except EngineTimeout as exc:
+        raise HTTPException(status_code=504, detail='analysis timed out') from exc
+    alts = [ChatAlternative(category=c, text=t) for c, t in pairs]
+    return chat_alternatives_adapter.dump_json(alts)
 
 
 @app.post('/chat/analyze', response_model=ChatAnalyzeResponse)
-def analyze_chat_input(payload: ChatAnalyzeRequest, request: Request, user_id: str = Depends(get_current_user)) -> ChatAnalyzeResponse:
+def analyze_chat_input(payload: ChatAnalyzeRequest, request: Request, user_id: str = Depends(get_current_user)) -> Response:
     enforce_rate_limit(request, user_id)
     text = payload.text.strip()
-    alts = [ChatAlternative(category=c, text=t) for c, t in cached_chat_alternatives(text, payload.tone_preference)]
-    return ChatAnalyzeResponse(original=text, alternatives=alts)
+    normalized = normalize_text(text)
+    engine = analysis_batcher.engine
+    key = cache_key(engine.name, engine.version, payload.tone_preference, normalized)
+    alternatives_json = chat_cache.get_or_compute(key, lambda: _render_chat_alternatives(normalized, payload.tone_preference))
+    # alternatives are cached pre-serialized; only the caller's original text is encoded per request
+    body = b'{"original":' + json.dumps(text, ensure_ascii=False).encode('utf-8') + b',"alternatives":' + alternatives_json + b'}'
+    return Response(content=body, media_type='application/json')
 
 
 @app.post('/import', response_model=ImportJob)
@@ -376,7 +426,9 @@ def create_import_job(
         if key:
             existing = session.get(IdempotencyRecord, key)
             if existing:
-                existing_job = session.get(ImportJobRecord, existing.job_id)
+                existing_job = session.get(ImportJobRecord, existing.job_id) or session.get(
+                    ImportJobArchiveRecord, existing.job_id
+                )
                 if not existing_job:
                     raise HTTPException(status_code=500, detail='idempotency record is stale')
                 return ImportJob(
@@ -396,17 +448,30 @@ def create_import_job(
             attempts=0,
             channel=request_payload.channel,
             content_sha256=_sha256_text(request_payload.content),
-            content_preview_masked=_mask_pii(request_payload.content),
+            content_preview_masked=mask_pii(request_payload.content),
             last_error=None,
             created_at=created_at,
             updated_at=created_at,
         )
         session.add(record)
+        content, size_bytes = compress_content(request_payload.content)
+        session.add(ImportPayloadRecord(job_id=job_id, user_id=user_id, content=content, size_bytes=size_bytes))
 
         if key:
             session.add(IdempotencyRecord(key=key, user_id=user_id, job_id=job_id))
+        lane = record.lane = _import_lane(session, user_id)
+    read_router.mark_write(user_id)
 
-    queue.enqueue(job_id)
+    try:
+        queue.enqueue(job_id, user_id, lane)
+    except QueueUnavailable as exc:
+        # nothing will ever pick the job up: fail it and free the idempotency key so a retry starts over
+        with get_session() as session:
+            record = session.get(ImportJobRecord, job_id)
+            record.status, record.last_error, record.updated_at = 'failed', 'queue unavailable', utc_now()
+            if key and (idempotency := session.get(IdempotencyRecord, key)) is not None:
+                session.delete(idempotency)
+        raise HTTPException(status_code=503, detail='import queue unavailable') from exc
 
     return ImportJob(job_id=job_id, status='queued', progress_percent=0, created_at=created_at)
 
@@ -414,23 +479,28 @@ def create_import_job(
 @app.get('/import/{job_id}', response_model=ImportJob)
 def get_import_job(job_id: str, request: Request, user_id: str = Depends(get_current_user)) -> ImportJob:
     enforce_rate_limit(request, user_id)
-    with get_session() as session:
-        rec = session.get(ImportJobRecord, job_id)
-        if not rec:
-            raise HTTPException(status_code=404, detail='import job not found')
-        if rec.user_id != user_id:
-            raise HTTPException(status_code=403, detail='forbidden')
-        return ImportJob(
-            job_id=rec.job_id,
-            status=rec.status,
-            progress_percent=rec.progress_percent,
-            created_at=rec.created_at,
-        )
+    with get_read_session(user_id) as session:
+        rec = session.get(ImportJobRecord, job_id) or session.get(ImportJobArchiveRecord, job_id)
+    if not rec:
+        # the job may have been created through another process and not replicated yet
+        with get_read_session(primary=True) as session:
+            rec = session.get(ImportJobRecord, job_id)
+    if not rec:
+        raise HTTPException(status_code=404, detail='import job not found')
+    if rec.user_id != user_id:
+        raise HTTPException(status_code=403, detail='forbidden')
+    return ImportJob(
+        job_id=rec.job_id,
+        status=rec.status,
+        progress_percent=rec.progress_percent,
+        created_at=rec.created_at,
+    )
 
 
 @app.get('/admin/queues/metrics', response_model=QueueMetricsResponse)
 def queue_metrics(_: str = Depends(get_admin_user)) -> QueueMetricsResponse:
     queue_data = queue.metrics()
+    decision = autoscaler.update(queue_data)
     alert = queue_data.main_depth > settings.queue_depth_alert_threshold
     if alert:
         alerts.notify_error('queue_backlog_alert', f'depth={queue_data.main_depth}')
@@ -439,7 +509,55 @@ def queue_metrics(_: str = Depends(get_admin_user)) -> QueueMetricsResponse:
         dlq_depth=queue_data.dlq_depth,
         oldest_job_age_seconds=queue_data.oldest_job_age_seconds,
         alert=alert,
+        desired_workers=decision.desired_workers,
+        worker_concurrency=decision.concurrency,
+        lanes={name: asdict(lane) for name, lane in queue_data.lanes.items()},
+    )
+
+
+@app.get('/admin/queues/dlq', response_model=DeadLetterPage)
+def list_dlq(
+    after: float | None = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=500),
+    _: str = Depends(get_admin_user),
+) -> DeadLetterPage:
+    letters, next_cursor = list_dead_letters(queue, after=after, limit=limit)
+    items = [
+        DeadLetterItem(
+            job_id=letter.entry.job_id,
+            user_id=letter.entry.user_id,
+            lane=letter.entry.lane,
+            failed_at=datetime.fromtimestamp(letter.entry.enqueued_at, timezone.utc),
+            status=letter.status,
+            attempts=letter.attempts,
+            last_error=letter.last_error,
+            signature=letter.signature,
+            signature_id=letter.signature_id,
+        )
+        for letter in letters
+    ]
+    return DeadLetterPage(items=items, next_cursor=next_cursor)
+
+
+@app.get('/admin/queues/dlq/signatures', response_model=list[DeadLetterGroup])
+def dlq_signatures(
+    scan_limit: int = Query(default=10_000, ge=1, le=100_000),
+    _: str = Depends(get_admin_user),
+) -> list[DeadLetterGroup]:
+    return [DeadLetterGroup(**group) for group in summarize_dead_letters(queue, scan_limit=scan_limit)]
+
+
+@app.post('/admin/queues/dlq/redrive', response_model=RedriveResponse)
+def redrive_dlq(req: RedriveRequest, _: str = Depends(get_admin_user)) -> RedriveResponse:
+    # bounded per call and never paced inline: a request must not sleep while the main queue drains, so a
+    # busy queue is a 429 for the caller to retry, and scripts/redrive_dlq.py handles large paced replays
+    max_main_depth = settings.dlq_redrive_max_main_depth
+    if max_main_depth and queue.metrics().main_depth >= max_main_depth:
+        raise HTTPException(status_code=429, detail='main queue is busy, retry the redrive later')
+    result = redrive_dead_letters(
+        queue, signature=req.signature, limit=req.limit, after=req.after, rate_per_second=0, max_main_depth=0
     )
+    return RedriveResponse(redriven=result.redriven, scanned=result.scanned, next_cursor=result.cursor, done=result.done)
 
 
 @app.post('/admin/worker/tick')
@@ -456,16 +574,35 @@ def cleanup_tokens(_: str = Depends(get_admin_user)) -> dict[str, int]:
     return {'deleted': deleted}
 
 
+def _verify_target(name: str, url: str) -> dict:
+    try:
+        engine = secondary_engines.get(name, url)
+    except Exception as exc:
+        return {'status': 'error', 'error': type(exc).__name__}
+    return verify_engine(engine)
+
+
 @app.post('/admin/db/verify-production')
-def verify_production_db(_: str = Depends(get_admin_user)) -> dict[str, str]:
-    if not settings.production_database_url:
+def verify_production_db(_: str = Depends(get_admin_user)) -> dict:
+    targets = secondary_database_targets()
+    if not targets:
         raise HTTPException(status_code=400, detail='production_database_url not configured')
 
-    engine = create_engine(settings.production_database_url, future=True)
-    with engine.connect() as conn:
-        conn.execute(text('SELECT 1'))
-    return {'status': 'ok'}
-
+    results: dict[str, dict] = {}
+    pool = ThreadPoolExecutor(max_workers=len(targets), thread_name_prefix='db-verify')
+    try:
+        futures = {name: pool.submit(_verify_target, name, url) for name, url in targets.items()}
+        deadline = time.monotonic() + settings.db_verify_timeout_seconds
+        for name, future in futures.items():
+            try:
+                results[name] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeoutError:
+                results[name] = {'status': 'timeout'}
+    finally:
+        # a hung target keeps its thread, but the request returns at the deadline instead of waiting for it
+        pool.shutdown(wait=False, cancel_futures=True)
+    status = 'ok' if all(r['status'] == 'ok' for r in results.values()) else 'error'
+    return {'status': status, 'targets': results}
 
 
 @app.delete('/me/data', status_code=204)
@@ -473,6 +610,13 @@ def delete_my_data(user_id: str = Depends(get_current_user)) -> Response:
     with get_session() as session:
         for rec in session.execute(select(ImportJobRecord).where(ImportJobRecord.user_id == user_id)).scalars().all():
             session.delete(rec)
+        for rec in session.execute(
+            select(ImportJobArchiveRecord).where(ImportJobArchiveRecord.user_id == user_id)
+        ).scalars().all():
+            session.delete(rec)
+        session.execute(delete(ImportItemRecord).where(ImportItemRecord.user_id == user_id))
+        session.execute(delete(ImportPayloadRecord).where(ImportPayloadRecord.user_id == user_id))
+        session.execute(delete(ReviewCardRecord).where(ReviewCardRecord.user_id == user_id))
         for rec in session.execute(select(IdempotencyRecord).where(IdempotencyRecord.user_id == user_id)).scalars().all():
             session.delete(rec)
         for rec in session.execute(select(RevokedTokenRecord).where(RevokedTokenRecord.user_id == user_id)).scalars().all():
@@ -483,6 +627,8 @@ def delete_my_data(user_id: str = Depends(get_current_user)) -> Response:
         cred = session.get(UserCredentialRecord, user_id)
         if cred:
             session.delete(cred)
+    vocab_index.forget(user_id)
+    read_router.mark_write(user_id)
     return Response(status_code=204)
 
 
@@ -491,21 +637,101 @@ def list_my_imports(
     offset: int = Query(default=0, ge=0),
     limit: int = Query(default=20, ge=1, le=100),
     user_id: str = Depends(get_current_user),
-) -> ImportListResponse:
-    with get_session() as session:
-        query = select(ImportJobRecord).where(ImportJobRecord.user_id == user_id).order_by(ImportJobRecord.created_at.desc())
-        rows = session.execute(query.offset(offset).limit(limit)).scalars().all()
+) -> Response:
+    hot = select(
+        ImportJobRecord.job_id, ImportJobRecord.status, ImportJobRecord.progress_percent, ImportJobRecord.created_at
+    ).where(ImportJobRecord.user_id == user_id)
+    archived = select(
+        ImportJobArchiveRecord.job_id,
+        ImportJobArchiveRecord.status,
+        literal(100).label('progress_percent'),
+        ImportJobArchiveRecord.created_at,
+    ).where(ImportJobArchiveRecord.user_id == user_id)
+    jobs = union_all(hot, archived).subquery()
+    with get_read_session(user_id) as session:
+        query = select(jobs).order_by(jobs.c.created_at.desc())
+        rows = session.execute(query.offset(offset).limit(limit)).all()
         total = session.execute(
             select(func.count()).select_from(ImportJobRecord).where(ImportJobRecord.user_id == user_id)
+        ).scalar_one() + session.execute(
+            select(func.count()).select_from(ImportJobArchiveRecord).where(ImportJobArchiveRecord.user_id == user_id)
         ).scalar_one()
 
-    items = [
-        ImportJob(
-            job_id=r.job_id,
-            status=r.status,
-            progress_percent=r.progress_percent,
-            created_at=r.created_at,
+    # rows are already typed by the columns they come from; encode them as they are instead of one model per row
+    body = dumps({'items': [row._asdict() for row in rows], 'total': total, 'offset': offset, 'limit': limit})
+    return Response(content=body, media_type='application/json')
+
+
+@app.get('/me/export')
+def export_my_imports(request: Request, compress: bool = Query(default=False), user_id: str = Depends(get_current_user)) -> StreamingResponse:
+    enforce_rate_limit(request, user_id)
+    chunks = export_imports(user_id, settings.export_window_rows, settings.export_yield_per)
+    filename = f'imports-{utc_now():%Y%m%d}.ndjson'
+    if compress:
+        return StreamingResponse(
+            gzip_stream(chunks, settings.export_gzip_level),
+            media_type='application/gzip',
+            headers={'Content-Disposition': f'attachment; filename="{filename}.gz"'},
         )
-        for r in rows
-    ]
-    return ImportListResponse(items=items, total=total, offset=offset, limit=limit)
+    return StreamingResponse(chunks, media_type='application/x-ndjson', headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+
+@app.get('/me/vocabulary', response_model=VocabularyResponse)
+def my_vocabulary(
+    request: Request,
+    kind: Literal['word', 'phrase'] = Query(default='phrase'),
+    limit: int = Query(default=20, ge=1, le=200),
+    min_occurrences: int = Query(default=1, ge=1),
+    user_id: str = Depends(get_current_user),
+) -> VocabularyResponse:
+    enforce_rate_limit(request, user_id)
+    # served from the in-memory index; a refresh only reads jobs completed since the last one and their items
+    ranked = vocab_index.top(user_id, kind, limit, min_occurrences)
+    return VocabularyResponse(
+        kind=kind,
+        items=[VocabularyTerm(text=text, occurrences=occurrences) for text, occurrences in ranked],
+        imports=vocab_index.imports(user_id),
+    )
+
+
+def _review_card(card) -> ReviewCard:
+    return ReviewCard(
+        card_id=card.card_id,
+        front=card.front,
+        back=card.back,
+        due_at=card.due_at,
+        interval_days=card.interval_days,
+        repetitions=card.repetitions,
+        lapses=card.lapses,
+    )
+
+
+@app.post('/me/cards', response_model=DueCardsResponse)
+def create_cards(payload: CardCreateRequest, request: Request, user_id: str = Depends(get_current_user)) -> DueCardsResponse:
+    enforce_rate_limit(request, user_id)
+    rows = add_cards(user_id, [(card.front, card.back) for card in payload.cards])
+    read_router.mark_write(user_id)
+    return DueCardsResponse(items=[ReviewCard(**row) for row in rows])
+
+
+@app.get('/me/cards/due', response_model=DueCardsResponse)
+def list_due_cards(
+    request: Request,
+    limit: int = Query(default=20, ge=1, le=100),
+    user_id: str = Depends(get_current_user),
+) -> DueCardsResponse:
+    enforce_rate_limit(request, user_id)
+    return DueCardsResponse(items=[_review_card(card) for card in due_cards(user_id, limit)])
+
+
+@app.post('/me/cards/{card_id}/review', response_model=ReviewCard)
+def review_card(card_id: str, payload: ReviewRequest, request: Request, user_id: str = Depends(get_current_user)) -> ReviewCard:
+    enforce_rate_limit(request, user_id)
+    try:
+        card = record_review(user_id, card_id, payload.grade)
+    except ReviewConflict:
+        raise HTTPException(status_code=409, detail='card was already reviewed, refetch due cards')
+    if card is None:
+        raise HTTPException(status_code=404, detail='card not found')
+    read_router.mark_write(user_id)
+    return _review_card(card)
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import json
+import time
+from uuid import uuid4
+
+from app.alerts import alerts
+from app.capture import build_record, traffic_capture
+from app.config import settings
+from app.observability import app_logger, metrics, now_ms
+
+# probes come from inside the cluster over plain http
+HTTPS_EXEMPT_PATHS = frozenset({'/health', '/ready'})
+_CAPTURED_METHODS = frozenset({'POST', 'PUT', 'PATCH'})
+_HTTPS_REQUIRED_BODY = json.dumps({'detail': 'https required'}).encode('utf-8')
+
+
+def security_headers(hsts_enabled: bool) -> list[tuple[bytes, bytes]]:
+    headers = [
+        (b'x-content-type-options', b'nosniff'),
+        (b'x-frame-options', b'DENY'),
+        (b'referrer-policy', b'no-referrer'),
+    ]
+    if hsts_enabled:
+        headers.append((b'strict-transport-security', b'max-age=31536000; includeSubDomains; preload'))
+    return headers
+
+
+class RequestContextMiddleware:
+    # plain ASGI instead of @app.middleware('http'): no extra task or response stream per request,
+    # and the fixed response headers are encoded once here rather than set one by one
+    def __init__(self, app, enforce_https: bool | None = None, hsts_enabled: bool | None = None):
+        self.app = app
+        self.enforce_https = settings.enforce_https if enforce_https is None else enforce_https
+        self.header_block = security_headers(settings.hsts_enabled if hsts_enabled is None else hsts_enabled)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        start = now_ms()
+        request_id = forwarded_proto = authorization = None
+        for name, value in scope['headers']:
+            if name == b'x-request-id':
+                request_id = value.decode('latin-1')
+            elif name == b'x-forwarded-proto':
+                forwarded_proto = value.decode('latin-1')
+            elif name == b'authorization':
+                authorization = value.decode('latin-1')
+        if not request_id:
+            request_id = str(uuid4())
+
+        path = scope['path']
+        api_version = b'unversioned'
+        if path.startswith('/v1/'):
+            # a copy, so the server's scope and anything logged from it keep the original path
+            path = path[3:]
+            scope = {**scope, 'path': path, 'raw_path': path.encode('latin-1')}
+            api_version = b'v1'
+        scope.setdefault('state', {})['request_id'] = request_id
+        extra_headers = [(b'x-request-id', request_id.encode('latin-1')), (b'x-api-version', api_version), *self.header_block]
+
+        if self.enforce_https and (forwarded_proto or scope.get('scheme')) != 'https' and path not in HTTPS_EXEMPT_PATHS:
+            await self._reject_plain_http(scope, send, start, request_id, extra_headers)
+            return
+
+        method = scope['method']
+        captured = traffic_capture.sampled()
+        started_at = time.time()
+        body_chunks: list[bytes] | None = [] if captured and method in _CAPTURED_METHODS else None
+        response = {'status': 500, 'content_length': None}
+
+        async def receive_wrapper():
+            message = await receive()
+            if message['type'] == 'http.request':
+                # the endpoint reads the body anyway, so the capture copies it in passing
+                body_chunks.append(message.get('body', b''))
+            return message
+
+        async def send_wrapper(message) -> None:
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+                headers = list(message.get('headers', ()))
+                has_cache_control = False
+                for name, value in headers:
+                    if name == b'cache-control':
+                        has_cache_control = True
+                    elif name == b'content-length':
+                        response['content_length'] = value
+                headers.extend(extra_headers)
+                if not has_cache_control:
+                    headers.append((b'cache-control', b'no-store'))
+                message = {**message, 'headers': headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper if body_chunks is not None else receive, send_wrapper)
+        except Exception as exc:
+            latency = now_ms() - start
+            metrics.record_request(latency, 500)
+            if captured:
+                self._capture(scope, authorization, started_at, latency, 500, body_chunks, None)
+            app_logger.error(
+                'request failed',
+                extra={'request_id': request_id, 'path': path, 'method': method, 'status_code': 500, 'latency_ms': round(latency, 2)},
+            )
+            alerts.notify_error('api_exception', f'path={path} request_id={request_id} error={exc}')
+            raise
+
+        latency = now_ms() - start
+        status_code = response['status']
+        metrics.record_request(latency, status_code)
+        app_logger.info(
+            'request completed',
+            extra={'request_id': request_id, 'path': path, 'method': method, 'status_code': status_code, 'latency_ms': round(latency, 2)},
+        )
+        if captured:
+            self._capture(scope, authorization, started_at, latency, status_code, body_chunks, response['content_length'])
+
+    async def _reject_plain_http(self, scope, send, start: float, request_id: str, extra_headers: list) -> None:
+        headers = [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(_HTTPS_REQUIRED_BODY)).encode('latin-1')),
+            *extra_headers,
+            (b'cache-control', b'no-store'),
+        ]
+        await send({'type': 'http.response.start', 'status': 400, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': _HTTPS_REQUIRED_BODY})
+        latency = now_ms() - start
+        metrics.record_request(latency, 400)
+        app_logger.warning(
+            'https required',
+            extra={'request_id': request_id, 'path': scope['path'], 'method': scope['method'], 'status_code': 400, 'latency_ms': round(latency, 2)},
+        )
+
+    @staticmethod
+    def _capture(scope, authorization, started_at, latency, status_code, body_chunks, content_length) -> None:
+        route = scope.get('route')
+        traffic_capture.submit(
+            build_record(
+                started_at,
+                scope['method'],
+                scope['path'],
+                getattr(route, 'path', None),
+                scope.get('query_string', b'').decode('latin-1'),
+                status_code,
+                latency,
+                b''.join(body_chunks) if body_chunks else None,
+                int(content_length) if content_length else None,
+                authorization,
+            )
+        )
@@ -1,14 +1,40 @@
 from __future__ import annotations
 
+import atexit
 import json
 import logging
+import queue
+import random
 import statistics
 import time
 from collections import Counter, deque
 from dataclasses import dataclass
+from logging.handlers import QueueHandler, QueueListener
+
+from app.config import settings
+
+try:
+    import orjson
+except Exception:  # pragma: no cover - optional dependency at runtime
+    orjson = None
 
 
 class JsonFormatter(logging.Formatter):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._time_cache: tuple[int, str] = (-1, '')
+
+    def formatTime(self, record: logging.LogRecord, datefmt: str | None = None) -> str:
+        if datefmt:
+            return super().formatTime(record, datefmt)
+        # strftime dominates formatting cost; the seconds prefix only changes once per second
+        second = int(record.created)
+        cached_second, prefix = self._time_cache
+        if second != cached_second:
+            prefix = time.strftime(self.default_time_format, self.converter(record.created))
+            self._time_cache = (second, prefix)
+        return self.default_msec_format % (prefix, record.msecs)
+
     def format(self, record: logging.LogRecord) -> str:
         payload = {
             'level': record.levelname,
@@ -20,32 +46,176 @@ class JsonFormatter(logging.Formatter):
             value = getattr(record, key, None)
             if value is not None:
                 payload[key] = value
+        if orjson is not None:
+            return orjson.dumps(payload, default=str).decode('utf-8')
         return json.dumps(payload, ensure_ascii=False)
 
 
+class SuccessSampleFilter(logging.Filter):
+    def __init__(self, sample_rate: float):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.sample_rate >= 1.0 or record.msg != 'request completed':
+            return True
+        status_code = getattr(record, 'status_code', None)
+        if status_code is None or not 200 <= status_code < 300:
+            return True
+        if random.random() < self.sample_rate:
+            return True
+        metrics.record_log_sampled_out()
+        return False
+
+
+class DroppingQueueHandler(QueueHandler):
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.record_log_dropped()
+
+
+class BatchStreamHandler(logging.StreamHandler):
+    def __init__(self, stream=None, batch_size: int = 256):
+        super().__init__(stream)
+        self.batch_size = batch_size
+        self._buffer: list[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self._buffer.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+            return
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            if self._buffer and self.stream:
+                self.stream.write(self.terminator.join(self._buffer) + self.terminator)
+                self._buffer.clear()
+            super().flush()
+        finally:
+            self.release()
+
+
+class BatchingQueueListener(QueueListener):
+    def handle(self, record: logging.LogRecord) -> None:
+        super().handle(record)
+        # write out whatever has been buffered once the backlog is drained
+        if self.queue.empty():
+            for handler in self.handlers:
+                handler.flush()
+
+    def stop(self) -> None:
+        super().stop()
+        for handler in self.handlers:
+            try:
+                handler.flush()
+            except (OSError, ValueError):
+                # the stream may already be closed at interpreter shutdown, as in logging.shutdown()
+                pass
+
+
+_log_listener: QueueListener | None = None
+
+
 def configure_logging() -> logging.Logger:
+    global _log_listener
     logger = logging.getLogger('app')
     if logger.handlers:
         return logger
     logger.setLevel(logging.INFO)
-    handler = logging.StreamHandler()
-    handler.setFormatter(JsonFormatter())
+
+    if settings.log_async:
+        stream_handler = BatchStreamHandler(batch_size=settings.log_batch_size)
+        stream_handler.setFormatter(JsonFormatter())
+        handler: logging.Handler = DroppingQueueHandler(queue.Queue(maxsize=settings.log_queue_size))
+        _log_listener = BatchingQueueListener(handler.queue, stream_handler)
+        _log_listener.start()
+        atexit.register(stop_logging)
+    else:
+        handler = logging.StreamHandler()
+        handler.setFormatter(JsonFormatter())
+
+    handler.addFilter(SuccessSampleFilter(settings.log_success_sample_rate))
     logger.addHandler(handler)
     return logger
 
 
+def stop_logging() -> None:
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+
+ALERT_OUTCOMES = ('sent', 'coalesced', 'retried', 'dropped', 'failed')
+REFRESH_TOKEN_EVENTS = ('rotated', 'reused', 'revoked', 'redis_error')
+BREAKER_STATES = ('closed', 'open', 'half_open')
+QUEUE_LATENCY_BUCKETS = (0.1, 0.5, 1, 5, 15, 30, 60, 300, 900, 3600, 4 * 3600, 24 * 3600)
+
+
 @dataclass
 class LatencyStats:
     p50_ms: float
     p95_ms: float
 
 
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+    def to_prometheus(self, name: str, labels: str) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f'{name}_sum{{{labels}}} {round(self.sum, 3)}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
 class MetricsStore:
     def __init__(self, max_samples: int = 5000):
         self._latencies = deque(maxlen=max_samples)
         self._status = Counter()
         self._refresh_revoke_hits = 0
         self._worker_job_durations = deque(maxlen=max_samples)
+        self._alerts = Counter()
+        self._capture = Counter()
+        self._export_rows = Counter()
+        self._refresh_tokens = Counter()
+        self._breakers: dict[str, str] = {}
+        self._breaker_rejected = Counter()
+        self._redis_fallbacks = Counter()
+        self._queue_outbox_depth = 0
+        self._startup: dict[str, float] = {}
+        self._log_records_dropped = 0
+        self._log_records_sampled_out = 0
+        self._cache: dict[str, Counter] = {}
+        self._analysis = Counter()
+        self._db_reads = Counter()
+        self._analysis_batch_durations = deque(maxlen=max_samples)
+        self._queue_wait: dict[str, Histogram] = {}
+        self._job_completion: dict[str, Histogram] = {}
+        self._autoscale = {'concurrency': 0, 'desired_workers': 0, 'required_slots': 0.0, 'service_time_seconds': 0.0}
 
     def record_request(self, latency_ms: float, status_code: int) -> None:
         self._latencies.append(latency_ms)
@@ -58,23 +228,99 @@ class MetricsStore:
     def record_worker_duration(self, ms: float) -> None:
         self._worker_job_durations.append(ms)
 
-    def latency_stats(self) -> LatencyStats:
-        if not self._latencies:
+    def record_alert(self, outcome: str) -> None:
+        self._alerts[outcome] += 1
+
+    def record_capture(self, outcome: str) -> None:
+        self._capture[outcome] += 1
+
+    def record_export_rows(self, kind: str, count: int) -> None:
+        self._export_rows[kind] += count
+
+    def record_refresh_token(self, event: str) -> None:
+        self._refresh_tokens[event] += 1
+
+    def record_breaker_state(self, name: str, state: str) -> None:
+        self._breakers[name] = state
+
+    def record_breaker_rejected(self, name: str) -> None:
+        self._breaker_rejected[name] += 1
+
+    def record_redis_fallback(self, component: str) -> None:
+        self._redis_fallbacks[component] += 1
+
+    def record_queue_outbox_depth(self, depth: int) -> None:
+        self._queue_outbox_depth = depth
+
+    def record_startup_phase(self, phase: str, seconds: float) -> None:
+        self._startup[phase] = round(seconds, 4)
+
+    def record_log_dropped(self) -> None:
+        self._log_records_dropped += 1
+
+    def record_log_sampled_out(self) -> None:
+        self._log_records_sampled_out += 1
+
+    def record_cache(self, name: str, outcome: str) -> None:
+        self._cache.setdefault(name, Counter())[outcome] += 1
+
+    def cache_stats(self) -> dict:
+        stats = {}
+        for name, counts in list(self._cache.items()):
+            hits = counts['local_hit'] + counts['redis_hit']
+            lookups = hits + counts['miss']
+            stats[name] = {
+                'local_hit': counts['local_hit'],
+                'redis_hit': counts['redis_hit'],
+                'miss': counts['miss'],
+                'redis_error': counts['redis_error'],
+                'hit_ratio': round(hits / lookups, 4) if lookups else 0.0,
+            }
+        return stats
+
+    def record_analysis_batch(self, size: int, ms: float) -> None:
+        self._analysis['batches'] += 1
+        self._analysis['items'] += size
+        self._analysis_batch_durations.append(ms)
+
+    def record_analysis_timeout(self) -> None:
+        self._analysis['timeouts'] += 1
+
+    def record_analysis_rejected(self) -> None:
+        self._analysis['rejected'] += 1
+
+    @staticmethod
+    def _percentiles(samples: deque) -> LatencyStats:
+        if not samples:
             return LatencyStats(0.0, 0.0)
-        values = sorted(self._latencies)
+        values = sorted(samples)
         p50 = statistics.median(values)
         p95_index = max(0, min(len(values) - 1, int(len(values) * 0.95) - 1))
         p95 = values[p95_index]
         return LatencyStats(round(p50, 2), round(p95, 2))
 
+    def record_autoscale(self, concurrency: int, desired_workers: int, required_slots: float, service_time_seconds: float) -> None:
+        self._autoscale = {
+            'concurrency': concurrency,
+            'desired_workers': desired_workers,
+            'required_slots': required_slots,
+            'service_time_seconds': service_time_seconds,
+        }
+
+    def record_queue_wait(self, lane: str, seconds: float) -> None:
+        self._queue_wait.setdefault(lane, Histogram(QUEUE_LATENCY_BUCKETS)).observe(seconds)
+
+    def record_job_completion(self, lane: str, seconds: float) -> None:
+        self._job_completion.setdefault(lane, Histogram(QUEUE_LATENCY_BUCKETS)).observe(seconds)
+
+    def record_db_read(self, target: str) -> None:
+        self._db_reads[target] += 1
+
+    def latency_stats(self) -> LatencyStats:
+        return self._percentiles(self._latencies)
+
     def worker_latency_stats(self) -> LatencyStats:
-        if not self._worker_job_durations:
-            return LatencyStats(0.0, 0.0)
-        values = sorted(self._worker_job_durations)
-        p50 = statistics.median(values)
-        p95_index = max(0, min(len(values) - 1, int(len(values) * 0.95) - 1))
-        p95 = values[p95_index]
-        return LatencyStats(round(p50, 2), round(p95, 2))
+        return self._percentiles(self._worker_job_durations)
 
     def snapshot(self) -> dict:
         request_stats = self.latency_stats()
@@ -89,6 +335,32 @@ class MetricsStore:
                 '5xx': self._status['5xx'] / total if total else 0.0,
             },
             'refresh_revoke_hit_rate': self._refresh_revoke_hits / total if total else 0.0,
+            'alerts': {outcome: self._alerts[outcome] for outcome in ALERT_OUTCOMES},
+            'log_records': {'dropped': self._log_records_dropped, 'sampled_out': self._log_records_sampled_out},
+            'traffic_capture': {outcome: self._capture[outcome] for outcome in ('written', 'dropped')},
+            'export_rows': {kind: self._export_rows[kind] for kind in ('job', 'item')},
+            'refresh_tokens': {event: self._refresh_tokens[event] for event in REFRESH_TOKEN_EVENTS},
+            'circuit_breakers': {
+                name: {'state': state, 'rejected': self._breaker_rejected[name]} for name, state in list(self._breakers.items())
+            },
+            'redis_fallbacks': dict(self._redis_fallbacks),
+            'queue_outbox_depth': self._queue_outbox_depth,
+            'startup_seconds': dict(self._startup),
+            'cache': self.cache_stats(),
+            'db_reads': dict(self._db_reads),
+            'autoscale': dict(self._autoscale),
+            'queue_latency_seconds': {
+                kind: {lane: {'count': h.count, 'avg': round(h.sum / h.count, 3) if h.count else 0.0} for lane, h in list(histograms.items())}
+                for kind, histograms in (('enqueue_to_start', self._queue_wait), ('enqueue_to_complete', self._job_completion))
+            },
+            'analysis': {
+                'batches': self._analysis['batches'],
+                'items': self._analysis['items'],
+                'avg_batch_size': round(self._analysis['items'] / self._analysis['batches'], 2) if self._analysis['batches'] else 0.0,
+                'batch_p95_ms': self._percentiles(self._analysis_batch_durations).p95_ms,
+                'timeouts': self._analysis['timeouts'],
+                'rejected': self._analysis['rejected'],
+            },
         }
 
     def to_prometheus(self) -> str:
@@ -106,7 +378,71 @@ class MetricsStore:
             f"app_status_ratio{{code=\"5xx\"}} {snap['status_ratio']['5xx']}",
             '# TYPE app_refresh_revoke_hit_rate gauge',
             f"app_refresh_revoke_hit_rate {snap['refresh_revoke_hit_rate']}",
+            '# TYPE app_log_records_dropped_total counter',
+            f"app_log_records_dropped_total {snap['log_records']['dropped']}",
+            '# TYPE app_log_records_sampled_out_total counter',
+            f"app_log_records_sampled_out_total {snap['log_records']['sampled_out']}",
+            '# TYPE app_alerts_total counter',
         ]
+        lines.extend(f'app_alerts_total{{outcome="{outcome}"}} {count}' for outcome, count in snap['alerts'].items())
+        lines.append('# TYPE app_startup_phase_seconds gauge')
+        lines.extend(f'app_startup_phase_seconds{{phase="{phase}"}} {seconds}' for phase, seconds in snap['startup_seconds'].items())
+        lines.append('# TYPE app_traffic_capture_records_total counter')
+        lines.extend(
+            f'app_traffic_capture_records_total{{outcome="{outcome}"}} {count}'
+            for outcome, count in snap['traffic_capture'].items()
+        )
+        lines.append('# TYPE app_circuit_breaker_state gauge')
+        for name, breaker in snap['circuit_breakers'].items():
+            # one series per state, 1 for the current one, so alerts can match on state="open"
+            lines.extend(f'app_circuit_breaker_state{{name="{name}",state="{state}"}} {int(breaker["state"] == state)}' for state in BREAKER_STATES)
+        lines.append('# TYPE app_circuit_breaker_rejected_total counter')
+        lines.extend(f'app_circuit_breaker_rejected_total{{name="{name}"}} {breaker["rejected"]}' for name, breaker in snap['circuit_breakers'].items())
+        lines.append('# TYPE app_redis_fallback_total counter')
+        lines.extend(f'app_redis_fallback_total{{component="{component}"}} {count}' for component, count in snap['redis_fallbacks'].items())
+        lines.append('# TYPE app_queue_outbox_depth gauge')
+        lines.append(f"app_queue_outbox_depth {snap['queue_outbox_depth']}")
+        lines.append('# TYPE app_refresh_token_events_total counter')
+        lines.extend(f'app_refresh_token_events_total{{event="{event}"}} {count}' for event, count in snap['refresh_tokens'].items())
+        lines.append('# TYPE app_export_rows_total counter')
+        lines.extend(f'app_export_rows_total{{kind="{kind}"}} {count}' for kind, count in snap['export_rows'].items())
+        lines.extend([
+            '# TYPE app_analysis_batches_total counter',
+            f"app_analysis_batches_total {snap['analysis']['batches']}",
+            '# TYPE app_analysis_items_total counter',
+            f"app_analysis_items_total {snap['analysis']['items']}",
+            '# TYPE app_analysis_batch_p95_ms gauge',
+            f"app_analysis_batch_p95_ms {snap['analysis']['batch_p95_ms']}",
+            '# TYPE app_analysis_timeouts_total counter',
+            f"app_analysis_timeouts_total {snap['analysis']['timeouts']}",
+            '# TYPE app_analysis_rejected_total counter',
+            f"app_analysis_rejected_total {snap['analysis']['rejected']}",
+        ])
+        lines.extend([
+            '# TYPE app_worker_desired_workers gauge',
+            f"app_worker_desired_workers {snap['autoscale']['desired_workers']}",
+            '# TYPE app_worker_concurrency gauge',
+            f"app_worker_concurrency {snap['autoscale']['concurrency']}",
+            '# TYPE app_worker_required_slots gauge',
+            f"app_worker_required_slots {snap['autoscale']['required_slots']}",
+            '# TYPE app_worker_service_time_seconds gauge',
+            f"app_worker_service_time_seconds {snap['autoscale']['service_time_seconds']}",
+        ])
+        for name, histograms in (
+            ('app_queue_wait_seconds', self._queue_wait),
+            ('app_job_completion_seconds', self._job_completion),
+        ):
+            lines.append(f'# TYPE {name} histogram')
+            for lane, histogram in list(histograms.items()):
+                lines.extend(histogram.to_prometheus(name, f'lane="{lane}"'))
+        lines.append('# TYPE app_db_reads_total counter')
+        lines.extend(f'app_db_reads_total{{target="{target}"}} {count}' for target, count in snap['db_reads'].items())
+        lines.append('# TYPE app_cache_requests_total counter')
+        for name, stats in snap['cache'].items():
+            for outcome in ('local_hit', 'redis_hit', 'miss', 'redis_error'):
+                lines.append(f'app_cache_requests_total{{cache="{name}",outcome="{outcome}"}} {stats[outcome]}')
+        lines.append('# TYPE app_cache_hit_ratio gauge')
+        lines.extend(f'app_cache_hit_ratio{{cache="{name}"}} {stats["hit_ratio"]}' for name, stats in snap['cache'].items())
         return '\n'.join(lines) + '\n'
 
 
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from app.config import settings
+from app.observability import app_logger
+from app.schemas import GOAL_TYPES, PLAN_MAX_MINUTES, PLAN_MIN_MINUTES, CalculatedPlan
+
+DEFAULT_LANGUAGE = '*'
+
+
+class PlanRatios(BaseModel):
+    words_per_minute: float = Field(default=0.8, ge=0)
+    sentences_per_minute: float = Field(default=0.3, ge=0)
+    chat_turns_per_minute: float = Field(default=0.25, ge=0)
+    min_words: int = Field(default=4, ge=0)
+    min_sentences: int = Field(default=2, ge=0)
+    min_chat_turns: int = Field(default=2, ge=0)
+
+
+class PlanRatioOverrides(BaseModel):
+    words_per_minute: Optional[float] = Field(default=None, ge=0)
+    sentences_per_minute: Optional[float] = Field(default=None, ge=0)
+    chat_turns_per_minute: Optional[float] = Field(default=None, ge=0)
+    min_words: Optional[int] = Field(default=None, ge=0)
+    min_sentences: Optional[int] = Field(default=None, ge=0)
+    min_chat_turns: Optional[int] = Field(default=None, ge=0)
+
+
+class PlanRules(BaseModel):
+    version: str = 'builtin'
+    default: PlanRatios = PlanRatios()
+    goal_types: dict[str, PlanRatioOverrides] = {}
+    languages: dict[str, PlanRatioOverrides] = {}
+
+    def ratios_for(self, goal_type: str, language: str) -> PlanRatios:
+        merged = self.default.model_dump()
+        for overrides in (self.goal_types.get(goal_type), self.languages.get(language)):
+            if overrides is not None:
+                merged.update(overrides.model_dump(exclude_none=True))
+        return PlanRatios(**merged)
+
+
+def load_plan_rules(path: str | None = None) -> PlanRules:
+    path = path or settings.onboarding_rules_path
+    if not path:
+        return PlanRules()
+    return PlanRules.model_validate_json(Path(path).read_text(encoding='utf-8'))
+
+
+def compute_plan(minutes_per_day: int, ratios: PlanRatios) -> CalculatedPlan:
+    words_count = max(ratios.min_words, int(minutes_per_day * ratios.words_per_minute))
+    sentences_count = max(ratios.min_sentences, int(minutes_per_day * ratios.sentences_per_minute))
+    chat_turns = max(ratios.min_chat_turns, int(minutes_per_day * ratios.chat_turns_per_minute))
+    return CalculatedPlan(
+        minutes_per_day=minutes_per_day,
+        words_count=words_count,
+        sentences_count=sentences_count,
+        chat_turns=chat_turns,
+        plan_preview=f"{minutes_per_day} min/day → {words_count} words + {sentences_count} sentences + {chat_turns} chat turns",
+    )
+
+
+@dataclass(frozen=True)
+class PlanEntry:
+    body: bytes
+    etag: str
+
+
+def _rules_stamp(path: str | None) -> tuple[int, int] | None:
+    if not path:
+        return None
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class PlanTable:
+    # every process serves plans from its own table, so each one watches the rules file and rebuilds
+    # when it changes; processes agree again within one check interval and ETags stop flapping
+    def __init__(self, path: str | None = None, check_interval_seconds: float | None = None):
+        self.path = path
+        self.check_interval_seconds = (
+            settings.onboarding_rules_check_interval_seconds if check_interval_seconds is None else check_interval_seconds
+        )
+        self._table: tuple[dict[tuple[str, str, int], PlanEntry], frozenset[str], str] = ({}, frozenset(), '')
+        self._lock = threading.Lock()
+        self._stamp: tuple[int, int] | None = None
+        self._next_check = 0.0
+
+    def __len__(self) -> int:
+        return len(self._table[0])
+
+    @property
+    def rules_path(self) -> str | None:
+        return self.path or settings.onboarding_rules_path
+
+    @property
+    def rules_version(self) -> str:
+        return self._table[2]
+
+    def build(self, rules: PlanRules) -> None:
+        entries: dict[tuple[str, str, int], PlanEntry] = {}
+        for goal_type in GOAL_TYPES:
+            for language in (DEFAULT_LANGUAGE, *rules.languages):
+                ratios = rules.ratios_for(goal_type, language)
+                for minutes in range(PLAN_MIN_MINUTES, PLAN_MAX_MINUTES + 1):
+                    body = compute_plan(minutes, ratios).model_dump_json().encode('utf-8')
+                    etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+                    entries[(goal_type, language, minutes)] = PlanEntry(body=body, etag=etag)
+        # swap in one assignment so concurrent lookups never see a half-built table
+        self._table = (entries, frozenset(rules.languages), rules.version)
+
+    def _load(self) -> None:
+        path = self.rules_path
+        # stat before reading, so a write that lands mid-read is picked up by the next check
+        stamp = _rules_stamp(path)
+        self.build(load_plan_rules(path))
+        self._stamp = stamp
+        self._next_check = time.monotonic() + self.check_interval_seconds
+
+    def reload(self) -> None:
+        with self._lock:
+            self._load()
+
+    def _reload_if_changed(self) -> None:
+        path = self.rules_path
+        if not path or time.monotonic() < self._next_check or not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._next_check = time.monotonic() + self.check_interval_seconds
+            stamp = _rules_stamp(path)
+            if stamp == self._stamp:
+                return
+            # a broken file is reported once per change and the last good table keeps serving
+            self._stamp = stamp
+            self.build(load_plan_rules(path))
+        except Exception as exc:
+            app_logger.warning(f'onboarding rules reload from {path} failed: {exc}')
+        finally:
+            self._lock.release()
+
+    def ensure_built(self) -> None:
+        if self._table[0]:
+            self._reload_if_changed()
+            return
+        with self._lock:
+            if not self._table[0]:
+                self._load()
+
+    def lookup(self, goal_type: str, target_language: str, minutes_per_day: int) -> PlanEntry:
+        self.ensure_built()
+        entries, languages, _ = self._table
+        language = target_language if target_language in languages else DEFAULT_LANGUAGE
+        return entries[(goal_type, language, minutes_per_day)]
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(',')]
+    return '*' in candidates or etag in candidates or f'W/{etag}' in candidates
+
+
+plan_table = PlanTable()
@@ -1,15 +1,41 @@
 from __future__ import annotations
 
-from collections import deque
-from datetime import datetime, timezone
-from dataclasses import dataclass
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
 
 from app.config import settings
+from app.observability import metrics
+from app.redis_clients import UNAVAILABLE_ERRORS, redis_clients
 
-try:
-    import redis
-except Exception:  # pragma: no cover
-    redis = None
+
+def parse_lanes(spec: str) -> dict[str, int]:
+    lanes: dict[str, int] = {}
+    for item in spec.split(','):
+        name, _, weight = item.strip().partition(':')
+        if name:
+            lanes[name] = max(1, int(weight or 1))
+    if not lanes:
+        raise ValueError('at least one queue lane is required')
+    return lanes
+
+
+@dataclass(frozen=True)
+class QueuedJob:
+    job_id: str
+    user_id: str = ''
+    lane: str = ''
+    enqueued_at: float = 0.0
+    # backend handle for removing this exact entry (the stored Redis member)
+    receipt: str = field(default='', compare=False, repr=False)
+
+
+@dataclass
+class LaneMetrics:
+    depth: int
+    oldest_job_age_seconds: int
 
 
 @dataclass
@@ -17,73 +43,393 @@ class QueueMetrics:
     main_depth: int
     dlq_depth: int
     oldest_job_age_seconds: int
+    lanes: dict[str, LaneMetrics] = field(default_factory=dict)
 
 
-class InMemoryQueue:
+class WeightedLanePicker:
+    # smooth weighted round-robin (as in nginx upstreams): lanes are interleaved in proportion
+    # to their weight instead of in bursts, and empty lanes do not accumulate credit
+    def __init__(self, weights: dict[str, int]):
+        self.weights = weights
+        self._credit = {lane: 0 for lane in weights}
+
+    def pick(self, ready: list[str]) -> str | None:
+        if not ready:
+            return None
+        total = 0
+        for lane in ready:
+            self._credit[lane] += self.weights[lane]
+            total += self.weights[lane]
+        best = max(ready, key=lambda lane: self._credit[lane])
+        self._credit[best] -= total
+        return best
+
+
+class _FairLane:
+    # one sub-queue per user served round-robin, so a bulk upload only delays its own owner
     def __init__(self):
-        self._q: deque[tuple[str, datetime]] = deque()
-        self._dlq: deque[tuple[str, datetime]] = deque()
+        self.users: OrderedDict[str, deque[QueuedJob]] = OrderedDict()
+        self.depth = 0
+
+    def push(self, job: QueuedJob) -> None:
+        self.users.setdefault(job.user_id, deque()).append(job)
+        self.depth += 1
 
-    def enqueue(self, job_id: str) -> None:
-        self._q.append((job_id, datetime.now(timezone.utc)))
+    def pop(self) -> QueuedJob:
+        user_id, jobs = next(iter(self.users.items()))
+        job = jobs.popleft()
+        if jobs:
+            self.users.move_to_end(user_id)
+        else:
+            del self.users[user_id]
+        self.depth -= 1
+        return job
 
-    def dequeue(self) -> str | None:
-        if not self._q:
+    def oldest_enqueued_at(self) -> float | None:
+        if not self.users:
             return None
-        return self._q.popleft()[0]
+        return min(jobs[0].enqueued_at for jobs in self.users.values())
+
+
+def _age(now: float, enqueued_at: float | None) -> int:
+    return max(0, int(now - enqueued_at)) if enqueued_at is not None else 0
+
+
+def _build_metrics(lanes: dict[str, LaneMetrics], dlq_depth: int) -> QueueMetrics:
+    return QueueMetrics(
+        main_depth=sum(lane.depth for lane in lanes.values()),
+        dlq_depth=dlq_depth,
+        oldest_job_age_seconds=max((lane.oldest_job_age_seconds for lane in lanes.values()), default=0),
+        lanes=lanes,
+    )
+
+
+class InMemoryQueue:
+    # enqueues come from request threads while workers, admin ticks and /metrics read concurrently;
+    # the lanes, picker credit and DLQ only change under this lock
+    def __init__(self, lanes: dict[str, int] | None = None):
+        self.lane_weights = lanes or parse_lanes(settings.queue_lanes)
+        self.default_lane = next(iter(self.lane_weights))
+        self._lanes = {name: _FairLane() for name in self.lane_weights}
+        self._picker = WeightedLanePicker(self.lane_weights)
+        self._dlq: deque[QueuedJob] = deque()
+        self._lock = threading.Lock()
+
+    def _resolve_lane(self, lane: str | None) -> str:
+        return lane if lane in self.lane_weights else self.default_lane
+
+    def _push(self, job_id: str, user_id: str, lane: str | None) -> None:
+        lane = self._resolve_lane(lane)
+        self._lanes[lane].push(QueuedJob(job_id, user_id, lane, time.time()))
+
+    def enqueue(self, job_id: str, user_id: str = '', lane: str | None = None) -> None:
+        with self._lock:
+            self._push(job_id, user_id, lane)
+
+    def dequeue(self) -> QueuedJob | None:
+        with self._lock:
+            lane = self._picker.pick([name for name, fair in self._lanes.items() if fair.depth])
+            if lane is None:
+                return None
+            return self._lanes[lane].pop()
+
+    def enqueue_dead_letter(self, job_id: str, user_id: str = '', lane: str | None = None) -> None:
+        with self._lock:
+            self._dlq.append(QueuedJob(job_id, user_id, self._resolve_lane(lane), time.time()))
+
+    def dead_letters(self, after: float | None = None, limit: int = 100) -> list[QueuedJob]:
+        with self._lock:
+            entries = [entry for entry in self._dlq if after is None or entry.enqueued_at > after]
+        return entries[:limit]
+
+    def redrive(self, entries: list[QueuedJob]) -> int:
+        wanted = {(entry.job_id, entry.enqueued_at): entry for entry in entries}
+        kept: deque[QueuedJob] = deque()
+        moved = 0
+        with self._lock:
+            for dead in self._dlq:
+                entry = wanted.pop((dead.job_id, dead.enqueued_at), None)
+                if entry is None:
+                    kept.append(dead)
+                    continue
+                self._push(entry.job_id, entry.user_id, entry.lane)
+                moved += 1
+            self._dlq = kept
+        return moved
 
-    def enqueue_dead_letter(self, job_id: str) -> None:
-        self._dlq.append((job_id, datetime.now(timezone.utc)))
+    def ping(self) -> bool:
+        return True
 
     def metrics(self) -> QueueMetrics:
-        oldest = 0
-        now = datetime.now(timezone.utc)
-        if self._q:
-            oldest = int((now - self._q[0][1]).total_seconds())
-        return QueueMetrics(main_depth=len(self._q), dlq_depth=len(self._dlq), oldest_job_age_seconds=oldest)
+        now = time.time()
+        with self._lock:
+            lanes = {
+                name: LaneMetrics(depth=fair.depth, oldest_job_age_seconds=_age(now, fair.oldest_enqueued_at()))
+                for name, fair in self._lanes.items()
+            }
+            dlq_depth = len(self._dlq)
+        return _build_metrics(lanes, dlq_depth)
+
+
+# KEYS[1] = lane credit hash, KEYS[2] = legacy single list, KEYS[3] = legacy enqueue-time zset
+# ARGV = key prefix, then lane/weight pairs
+_DEQUEUE_SCRIPT = """
+local prefix = ARGV[1]
+local best, best_credit, total = nil, nil, 0
+local credits = {}
+for i = 2, #ARGV, 2 do
+    local lane, weight = ARGV[i], tonumber(ARGV[i + 1])
+    if redis.call('LLEN', prefix .. ':' .. lane .. ':users') > 0 then
+        local credit = tonumber(redis.call('HGET', KEYS[1], lane) or '0') + weight
+        credits[lane] = credit
+        total = total + weight
+        if best == nil or credit > best_credit then
+            best, best_credit = lane, credit
+        end
+    end
+end
+if best == nil then
+    local legacy = redis.call('LPOP', KEYS[2])
+    if legacy then
+        redis.call('ZREM', KEYS[3], legacy)
+        return {'', legacy}
+    end
+    return nil
+end
+for lane, credit in pairs(credits) do
+    if lane == best then
+        credit = credit - total
+    end
+    redis.call('HSET', KEYS[1], lane, credit)
+end
+local users = prefix .. ':' .. best .. ':users'
+local user = redis.call('LPOP', users)
+local jobs = prefix .. ':' .. best .. ':u:' .. user
+local payload = redis.call('LPOP', jobs)
+if redis.call('LLEN', jobs) > 0 then
+    redis.call('RPUSH', users, user)
+end
+redis.call('ZREM', prefix .. ':' .. best .. ':enqueued', payload)
+return {best, payload}
+"""
+
+_PUSH_FUNCTION = """
+local function push(prefix, lane, user, payload, enqueued_at)
+    if redis.call('RPUSH', prefix .. ':' .. lane .. ':u:' .. user, payload) == 1 then
+        redis.call('RPUSH', prefix .. ':' .. lane .. ':users', user)
+    end
+    redis.call('ZADD', prefix .. ':' .. lane .. ':enqueued', enqueued_at, payload)
+end
+"""
+
+# ARGV = key prefix, lane, user_id, payload, enqueued_at
+_ENQUEUE_SCRIPT = _PUSH_FUNCTION + """
+push(ARGV[1], ARGV[2], ARGV[3], ARGV[4], ARGV[5])
+"""
+
+# KEYS[1] = dead-letter zset; ARGV = key prefix, then (dead-letter member, lane, user_id, payload, enqueued_at)
+# per job. Entries already taken by a concurrent redrive are skipped, so a batch can be replayed safely.
+_REDRIVE_SCRIPT = _PUSH_FUNCTION + """
+local moved = 0
+for i = 2, #ARGV, 5 do
+    if redis.call('ZREM', KEYS[1], ARGV[i]) == 1 then
+        push(ARGV[1], ARGV[i + 1], ARGV[i + 2], ARGV[i + 3], ARGV[i + 4])
+        moved = moved + 1
+    end
+end
+return moved
+"""
+
+# KEYS[1] = pre-zset dead-letter list, KEYS[2] = dead-letter zset; ARGV[1] = now
+_MIGRATE_DEAD_LETTERS_SCRIPT = """
+local moved = 0
+local job_id = redis.call('LPOP', KEYS[1])
+while job_id do
+    -- distinct scores keep the paging cursor exact
+    local score = tonumber(ARGV[1]) + moved * 0.000001
+    redis.call('ZADD', KEYS[2], score, cjson.encode({job_id = job_id, user_id = '', lane = '', failed_at = score}))
+    moved = moved + 1
+    job_id = redis.call('LPOP', KEYS[1])
+end
+return moved
+"""
+
+# KEYS = one enqueued zset per lane, then the dead-letter zset, the pre-zset dead-letter list and
+# the legacy main list; returns depth and oldest score per lane, then the dead-letter and legacy
+# depths, from one consistent snapshot
+_METRICS_SCRIPT = """
+local result = {}
+for i = 1, #KEYS - 3 do
+    local first = redis.call('ZRANGE', KEYS[i], 0, 0, 'WITHSCORES')
+    result[#result + 1] = redis.call('ZCARD', KEYS[i])
+    result[#result + 1] = first[2] or ''
+end
+result[#result + 1] = redis.call('ZCARD', KEYS[#KEYS - 2]) + redis.call('LLEN', KEYS[#KEYS - 1])
+result[#result + 1] = redis.call('LLEN', KEYS[#KEYS])
+return result
+"""
 
 
 class RedisQueue:
-    def __init__(self, redis_url: str, queue_name: str, dead_letter_queue_name: str):
-        if redis is None:
-            raise RuntimeError('redis package not installed')
-        self.client = redis.Redis.from_url(redis_url, decode_responses=True)
+    def __init__(self, client, queue_name: str, dead_letter_queue_name: str, lanes: dict[str, int] | None = None):
+        self.client = client
         self.queue_name = queue_name
         self.dead_letter_queue_name = dead_letter_queue_name
-        self.enqueue_time_zset = f'{queue_name}:enqueue_times'
+        self.lane_weights = lanes or parse_lanes(settings.queue_lanes)
+        self.default_lane = next(iter(self.lane_weights))
+        self.lane_credit_key = f'{queue_name}:lane_credit'
+        # per-job scores from before lanes; only drained, never written
+        self.legacy_enqueue_time_key = f'{queue_name}:enqueue_times'
+        # dead letters are scored by failure time so they can be paged and removed by cursor
+        self.dead_letter_key = f'{dead_letter_queue_name}:entries'
+        self._lane_args = [item for lane, weight in self.lane_weights.items() for item in (lane, weight)]
+        self._enqueue = self.client.register_script(_ENQUEUE_SCRIPT)
+        self._dequeue = self.client.register_script(_DEQUEUE_SCRIPT)
+        self._metrics = self.client.register_script(_METRICS_SCRIPT)
+        self._redrive = self.client.register_script(_REDRIVE_SCRIPT)
+        self._migrate_dead_letters = self.client.register_script(_MIGRATE_DEAD_LETTERS_SCRIPT)
+        self._metrics_keys = [
+            *(self._enqueued_key(lane) for lane in self.lane_weights),
+            self.dead_letter_key,
+            dead_letter_queue_name,
+            queue_name,
+        ]
+
+    def _resolve_lane(self, lane: str | None) -> str:
+        return lane if lane in self.lane_weights else self.default_lane
+
+    def _enqueued_key(self, lane: str) -> str:
+        return f'{self.queue_name}:{lane}:enqueued'
+
+    def _push_args(self, job_id: str, user_id: str, lane: str | None) -> list:
+        lane = self._resolve_lane(lane)
+        enqueued_at = time.time()
+        payload = json.dumps({'job_id': job_id, 'user_id': user_id, 'enqueued_at': enqueued_at})
+        return [lane, user_id, payload, enqueued_at]
+
+    def enqueue(self, job_id: str, user_id: str = '', lane: str | None = None) -> None:
+        self._enqueue(args=[self.queue_name, *self._push_args(job_id, user_id, lane)])
+
+    def dequeue(self) -> QueuedJob | None:
+        result = self._dequeue(
+            keys=[self.lane_credit_key, self.queue_name, self.legacy_enqueue_time_key],
+            args=[self.queue_name, *self._lane_args],
+        )
+        if not result:
+            return None
+        lane, payload = result
+        if not lane:
+            # plain job id left in the pre-lanes list by an older deployment
+            return QueuedJob(job_id=payload)
+        data = json.loads(payload)
+        return QueuedJob(data['job_id'], data['user_id'], lane, data['enqueued_at'])
 
-    def enqueue(self, job_id: str) -> None:
-        now_ts = int(datetime.now(timezone.utc).timestamp())
-        pipe = self.client.pipeline()
-        pipe.rpush(self.queue_name, job_id)
-        pipe.zadd(self.enqueue_time_zset, {job_id: now_ts})
-        pipe.execute()
+    def enqueue_dead_letter(self, job_id: str, user_id: str = '', lane: str | None = None) -> None:
+        failed_at = time.time()
+        payload = json.dumps({'job_id': job_id, 'user_id': user_id, 'lane': self._resolve_lane(lane), 'failed_at': failed_at})
+        self.client.zadd(self.dead_letter_key, {payload: failed_at})
 
-    def dequeue(self) -> str | None:
-        job_id = self.client.lpop(self.queue_name)
-        if job_id:
-            self.client.zrem(self.enqueue_time_zset, job_id)
-        return job_id
+    def dead_letters(self, after: float | None = None, limit: int = 100) -> list[QueuedJob]:
+        self._migrate_dead_letters(keys=[self.dead_letter_queue_name, self.dead_letter_key], args=[time.time()])
+        members = self.client.zrangebyscore(self.dead_letter_key, f'({after}' if after is not None else '-inf', '+inf', start=0, num=limit)
+        entries = []
+        for member in members:
+            data = json.loads(member)
+            # enqueued_at holds the failure time, which is also the paging cursor
+            entries.append(QueuedJob(data['job_id'], data['user_id'], data['lane'], data['failed_at'], receipt=member))
+        return entries
 
-    def enqueue_dead_letter(self, job_id: str) -> None:
-        self.client.rpush(self.dead_letter_queue_name, job_id)
+    def redrive(self, entries: list[QueuedJob]) -> int:
+        args: list = [self.queue_name]
+        for entry in entries:
+            args.extend([entry.receipt, *self._push_args(entry.job_id, entry.user_id, entry.lane)])
+        if len(args) == 1:
+            return 0
+        return int(self._redrive(keys=[self.dead_letter_key], args=args))
+
+    def ping(self) -> bool:
+        return self.client.ping()
 
     def metrics(self) -> QueueMetrics:
-        main_depth = self.client.llen(self.queue_name)
-        dlq_depth = self.client.llen(self.dead_letter_queue_name)
-        oldest_job_age_seconds = 0
-        if main_depth > 0:
-            first = self.client.zrange(self.enqueue_time_zset, 0, 0, withscores=True)
-            if first:
-                oldest_ts = int(first[0][1])
-                oldest_job_age_seconds = max(0, int(datetime.now(timezone.utc).timestamp()) - oldest_ts)
-        return QueueMetrics(main_depth=main_depth, dlq_depth=dlq_depth, oldest_job_age_seconds=oldest_job_age_seconds)
-
-
-def build_queue() -> InMemoryQueue | RedisQueue:
-    if settings.queue_mode == 'redis' and settings.redis_url:
-        try:
-            return RedisQueue(settings.redis_url, settings.queue_name, settings.dead_letter_queue_name)
-        except Exception:
-            pass
+        results = self._metrics(keys=self._metrics_keys)
+        now = time.time()
+        lanes = {}
+        for index, lane in enumerate(self.lane_weights):
+            depth, oldest = results[2 * index], results[2 * index + 1]
+            lanes[lane] = LaneMetrics(depth=int(depth), oldest_job_age_seconds=_age(now, float(oldest) if oldest else None))
+        dlq_depth, legacy_depth = results[-2], results[-1]
+        if legacy_depth:
+            lanes[self.default_lane].depth += int(legacy_depth)
+        return _build_metrics(lanes, int(dlq_depth))
+
+
+class QueueUnavailable(RuntimeError):
+    pass
+
+
+class OutboxQueue:
+    # an enqueue must not fail the API request because Redis blinked: while it is unreachable jobs wait in a
+    # bounded local outbox and are pushed in order by the next call that gets through. The outbox is only
+    # in memory; jobs lost with the process keep their 'queued' row in the database.
+    def __init__(self, queue: RedisQueue, max_pending: int = 10000):
+        self.queue = queue
+        self.max_pending = max_pending
+        self._outbox: deque[tuple[str, str, str | None]] = deque()
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str):
+        return getattr(self.queue, name)
+
+    @property
+    def outbox_depth(self) -> int:
+        return len(self._outbox)
+
+    def enqueue(self, job_id: str, user_id: str = '', lane: str | None = None) -> None:
+        if self._outbox:
+            self.flush()
+        if not self._outbox:
+            try:
+                self.queue.enqueue(job_id, user_id, lane)
+                return
+            except UNAVAILABLE_ERRORS:
+                metrics.record_redis_fallback('queue_outbox')
+        with self._lock:
+            if len(self._outbox) >= self.max_pending:
+                raise QueueUnavailable(f'redis unavailable and {self.max_pending} jobs already waiting locally')
+            self._outbox.append((job_id, user_id, lane))
+            metrics.record_queue_outbox_depth(len(self._outbox))
+
+    def flush(self) -> int:
+        pushed = 0
+        with self._lock:
+            while self._outbox:
+                try:
+                    self.queue.enqueue(*self._outbox[0])
+                except UNAVAILABLE_ERRORS:
+                    break
+                self._outbox.popleft()
+                pushed += 1
+            metrics.record_queue_outbox_depth(len(self._outbox))
+        return pushed
+
+    def dequeue(self) -> QueuedJob | None:
+        if self._outbox:
+            self.flush()
+        return self.queue.dequeue()
+
+    def ping(self) -> bool:
+        # the readiness probe runs every few seconds, so a recovered Redis drains the outbox without traffic
+        result = self.queue.ping()
+        if self._outbox:
+            self.flush()
+        return result
+
+
+def build_queue() -> InMemoryQueue | OutboxQueue:
+    if settings.queue_mode == 'redis':
+        client = redis_clients.get()
+        if client is not None:
+            return OutboxQueue(
+                RedisQueue(client, settings.queue_name, settings.dead_letter_queue_name), settings.queue_outbox_max
+            )
     return InMemoryQueue()
@@ -4,11 +4,8 @@ from collections import defaultdict, deque
 from datetime import datetime, timedelta, timezone
 
 from app.config import settings
-
-try:
-    import redis
-except Exception:  # pragma: no cover - optional dependency at runtime
-    redis = None
+from app.observability import metrics
+from app.redis_clients import UNAVAILABLE_ERRORS, redis_clients
 
 
 class InMemoryRateLimiter:
@@ -32,11 +29,9 @@ class InMemoryRateLimiter:
 
 
 class RedisRateLimiter:
-    def __init__(self, per_minute: int = 120, redis_url: str = 'redis://localhost:6379/0'):
-        if redis is None:
-            raise RuntimeError('redis package is not installed')
+    def __init__(self, client, per_minute: int = 120):
         self.per_minute = per_minute
-        self.client = redis.Redis.from_url(redis_url, decode_responses=True)
+        self.client = client
 
     def allow(self, key: str) -> bool:
         now = datetime.now(timezone.utc)
@@ -47,10 +42,33 @@ class RedisRateLimiter:
         return count <= self.per_minute
 
 
-def build_rate_limiter() -> InMemoryRateLimiter | RedisRateLimiter:
-    if settings.redis_url:
+class FallbackRateLimiter:
+    # counts live in Redis so every instance shares them; while Redis is unreachable (or the breaker is
+    # open) each process enforces the limit on its own instead of failing the request
+    def __init__(self, primary: RedisRateLimiter, fallback: InMemoryRateLimiter):
+        self.primary = primary
+        self.fallback = fallback
+
+    @property
+    def per_minute(self) -> int:
+        return self.primary.per_minute
+
+    @per_minute.setter
+    def per_minute(self, value: int) -> None:
+        self.primary.per_minute = value
+        self.fallback.per_minute = value
+
+    def allow(self, key: str) -> bool:
         try:
-            return RedisRateLimiter(settings.rate_limit_per_minute, settings.redis_url)
-        except Exception:
-            pass
-    return InMemoryRateLimiter(settings.rate_limit_per_minute)
+            return self.primary.allow(key)
+        except UNAVAILABLE_ERRORS:
+            metrics.record_redis_fallback('rate_limit')
+            return self.fallback.allow(key)
+
+
+def build_rate_limiter() -> InMemoryRateLimiter | FallbackRateLimiter:
+    local = InMemoryRateLimiter(settings.rate_limit_per_minute)
+    client = redis_clients.get()
+    if client is None:
+        return local
+    return FallbackRateLimiter(RedisRateLimiter(client, settings.rate_limit_per_minute), local)
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable
+
+from app.config import settings
+from app.observability import app_logger, metrics
+
+try:
+    import redis
+except Exception:  # pragma: no cover - optional dependency at runtime
+    redis = None
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+
+class CircuitOpenError(ConnectionError):
+    pass
+
+
+# failures that say something about Redis itself; a script or type error means Redis answered
+TRIPPING_ERRORS: tuple[type[BaseException], ...] = (
+    (redis.ConnectionError, redis.TimeoutError, OSError) if redis is not None else (OSError,)
+)
+# errors after which a command certainly or possibly did not reach Redis, so callers may take a fallback
+UNAVAILABLE_ERRORS = (CircuitOpenError, *TRIPPING_ERRORS)
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, reset_seconds: float = 10.0, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+        metrics.record_breaker_state(name, CLOSED)
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_seconds:
+                # exactly one trial call; everyone else keeps failing fast until it reports back
+                self._transition(HALF_OPEN)
+                return True
+            metrics.record_breaker_rejected(self.name)
+            return False
+
+    def record_success(self) -> None:
+        if self._state == CLOSED and not self._failures:
+            return
+        with self._lock:
+            self._failures = 0
+            if self._state != CLOSED:
+                self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or (self._state == CLOSED and self._failures >= self.failure_threshold):
+                self._opened_at = self._clock()
+                self._transition(OPEN)
+
+    def _transition(self, state: str) -> None:
+        self._state = state
+        metrics.record_breaker_state(self.name, state)
+        log = app_logger.warning if state == OPEN else app_logger.info
+        log(f'circuit {self.name} is now {state}')
+
+
+class GuardedRedis:
+    # a redis.Redis whose commands go through the breaker: while it is open they raise CircuitOpenError
+    # at once instead of each waiting out a socket timeout
+    def __init__(self, client, breaker: CircuitBreaker):
+        self.client = client
+        self.breaker = breaker
+
+    def call(self, fn: Callable, *args, **kwargs):
+        if not self.breaker.allow():
+            raise CircuitOpenError(f'{self.breaker.name} circuit is open')
+        try:
+            result = fn(*args, **kwargs)
+        except TRIPPING_ERRORS:
+            self.breaker.record_failure()
+            raise
+        except Exception:
+            self.breaker.record_success()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def register_script(self, script: str):
+        registered = self.client.register_script(script)
+        return lambda keys=None, args=None: self.call(registered, keys=keys, args=args)
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self.client, name)
+        if not callable(attribute):
+            return attribute
+        return lambda *args, **kwargs: self.call(attribute, *args, **kwargs)
+
+
+class RedisClients:
+    # one bounded pool per (decode_responses, timeout) profile, shared by every component in the process
+    def __init__(self, redis_url: str | None, breaker: CircuitBreaker):
+        self.redis_url = redis_url
+        self.breaker = breaker
+        self._clients: dict[tuple[bool, float], GuardedRedis] = {}
+        self._lock = threading.Lock()
+
+    def get(self, decode_responses: bool = True, socket_timeout: float | None = None) -> GuardedRedis | None:
+        if not self.redis_url or redis is None:
+            return None
+        timeout = settings.redis_socket_timeout_seconds if socket_timeout is None else socket_timeout
+        key = (decode_responses, timeout)
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = self._clients[key] = GuardedRedis(redis.Redis(connection_pool=self._pool(decode_responses, timeout)), self.breaker)
+        return client
+
+    def _pool(self, decode_responses: bool, timeout: float):
+        # a blocking pool caps connections per process and makes a burst wait briefly for a free one
+        return redis.BlockingConnectionPool.from_url(
+            self.redis_url,
+            max_connections=settings.redis_max_connections,
+            timeout=settings.redis_pool_timeout_seconds,
+            socket_timeout=timeout,
+            socket_connect_timeout=min(timeout, settings.redis_connect_timeout_seconds),
+            socket_keepalive=True,
+            health_check_interval=settings.redis_health_check_interval_seconds,
+            decode_responses=decode_responses,
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            for client in self._clients.values():
+                client.client.connection_pool.disconnect()
+            self._clients.clear()
+
+
+redis_breaker = CircuitBreaker(
+    'redis',
+    failure_threshold=settings.redis_breaker_failure_threshold,
+    reset_seconds=settings.redis_breaker_reset_seconds,
+)
+redis_clients = RedisClients(settings.redis_url, redis_breaker)
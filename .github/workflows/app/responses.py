@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from dataclasses import replace
+from datetime import datetime
+from functools import wraps
+from typing import Any, Callable
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from starlette.responses import Response
+
+from app.config import settings
+
+try:
+    import orjson
+except Exception:  # pragma: no cover - optional dependency at runtime
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        # same form pydantic writes, so a payload does not change shape with the encoder
+        text = value.isoformat()
+        return text[:-6] + 'Z' if text.endswith('+00:00') else text
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+    return json.dumps(content, ensure_ascii=False, separators=(',', ':'), default=_default).encode('utf-8')
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _trusted_call(call: Callable, model: type[BaseModel], status_code: int) -> Callable:
+    serializer = model.__pydantic_serializer__
+
+    def respond(result):
+        # only the exact declared model: a subclass could carry fields the response model would have dropped
+        if type(result) is model:
+            return Response(content=serializer.to_json(result, by_alias=True), status_code=status_code, media_type='application/json')
+        return result
+
+    if asyncio.iscoroutinefunction(call):
+
+        @wraps(call)
+        async def endpoint(**values):
+            return respond(await call(**values))
+
+    else:
+
+        @wraps(call)
+        def endpoint(**values):
+            return respond(call(**values))
+
+    endpoint.trusted_response = True
+    return endpoint
+
+
+class TrustedModelRoute(APIRoute):
+    # a model built by the handler was validated on construction; FastAPI would dump it,
+    # validate the dump against response_model again and only then encode it
+    def get_route_handler(self):
+        if self._trusts_handler_models():
+            self.dependant = replace(self.dependant, call=_trusted_call(self.dependant.call, self.response_model, self.status_code or 200))
+        return super().get_route_handler()
+
+    def _trusts_handler_models(self) -> bool:
+        model = self.response_model
+        return (
+            settings.trusted_response_models
+            and isinstance(model, type)
+            and issubclass(model, BaseModel)
+            and not getattr(self.dependant.call, 'trusted_response', False)
+            # an injected Response carries headers and cookies that only the regular path merges in
+            and self.dependant.response_param_name is None
+            and self.response_model_include is None
+            and self.response_model_exclude is None
+            and not self.response_model_exclude_unset
+            and not self.response_model_exclude_defaults
+            and not self.response_model_exclude_none
+        )
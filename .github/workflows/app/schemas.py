@@ -3,6 +3,11 @@ from typing import Literal, Optional
 
 from pydantic import BaseModel, Field, field_validator
 
+GoalType = Literal['business', 'daily', 'both']
+GOAL_TYPES: tuple[str, ...] = ('business', 'daily', 'both')
+PLAN_MIN_MINUTES = 5
+PLAN_MAX_MINUTES = 120
+
 
 class TokenPair(BaseModel):
     access_token: str
@@ -42,10 +47,26 @@ class HealthResponse(BaseModel):
     version: str
 
 
+class DependencyCheck(BaseModel):
+    status: str
+    latency_ms: float
+    last_checked_at: Optional[datetime] = None
+    last_success_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+
 class ReadyResponse(BaseModel):
-    status: Literal['ready', 'degraded']
+    status: Literal['ready', 'degraded', 'starting']
     db: str
     redis: str
+    queue: str = 'ok'
+    checks: dict[str, DependencyCheck] = {}
+    checked_at: Optional[datetime] = None
+
+
+class LaneMetricsResponse(BaseModel):
+    depth: int
+    oldest_job_age_seconds: int
 
 
 class QueueMetricsResponse(BaseModel):
@@ -53,12 +74,52 @@ class QueueMetricsResponse(BaseModel):
     dlq_depth: int
     oldest_job_age_seconds: int
     alert: bool
+    desired_workers: int
+    worker_concurrency: int
+    lanes: dict[str, LaneMetricsResponse] = {}
+
+
+class DeadLetterItem(BaseModel):
+    job_id: str
+    user_id: str
+    lane: str
+    failed_at: datetime
+    status: Optional[str] = None
+    attempts: int
+    last_error: Optional[str] = None
+    signature: str
+    signature_id: str
+
+
+class DeadLetterPage(BaseModel):
+    items: list[DeadLetterItem]
+    next_cursor: Optional[float] = None
+
+
+class DeadLetterGroup(BaseModel):
+    signature_id: str
+    signature: str
+    count: int
+    sample_job_ids: list[str]
+
+
+class RedriveRequest(BaseModel):
+    signature: Optional[str] = None
+    limit: int = Field(default=100, ge=1, le=1000)
+    after: Optional[float] = None
+
+
+class RedriveResponse(BaseModel):
+    redriven: int
+    scanned: int
+    next_cursor: Optional[float] = None
+    done: bool
 
 
 class OnboardingGoal(BaseModel):
-    goal_type: Literal['business', 'daily', 'both'] = 'both'
+    goal_type: GoalType = 'both'
     target_language: str = 'English'
-    minutes_per_day: int = Field(ge=5, le=120)
+    minutes_per_day: int = Field(ge=PLAN_MIN_MINUTES, le=PLAN_MAX_MINUTES)
 
 
 class CalculatedPlan(BaseModel):
@@ -102,3 +163,41 @@ class ImportListResponse(BaseModel):
     total: int
     offset: int
     limit: int
+
+
+class VocabularyTerm(BaseModel):
+    text: str
+    occurrences: int
+
+
+class VocabularyResponse(BaseModel):
+    kind: Literal['word', 'phrase']
+    items: list[VocabularyTerm]
+    imports: int
+
+
+class CardInput(BaseModel):
+    front: str = Field(min_length=1, max_length=500)
+    back: Optional[str] = Field(default=None, max_length=500)
+
+
+class CardCreateRequest(BaseModel):
+    cards: list[CardInput] = Field(min_length=1, max_length=500)
+
+
+class ReviewCard(BaseModel):
+    card_id: str
+    front: str
+    back: Optional[str] = None
+    due_at: datetime
+    interval_days: float
+    repetitions: int
+    lapses: int
+
+
+class DueCardsResponse(BaseModel):
+    items: list[ReviewCard]
+
+
+class ReviewRequest(BaseModel):
+    grade: int = Field(ge=0, le=5)
@@ -4,12 +4,32 @@ from uuid import uuid4
 import hashlib
 import hmac
 import os
+import re
 
 import jwt
 
 from app.config import settings
 
 
+_PII_PATTERNS = (
+    # email
+    (re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+"), "[EMAIL]"),
+    # phone variants
+    (re.compile(r"\b(?:\+?\d{1,3}[ -]?)?(?:\d{2,4}[ -]?)?\d{3,4}[ -]?\d{4}\b"), "[PHONE]"),
+    # possible account number and resident-id like patterns
+    (re.compile(r"\b\d{6}-?\d{7}\b"), "[NATIONAL_ID]"),
+    (re.compile(r"\b\d{2,6}-\d{2,6}-\d{2,6}\b"), "[ACCOUNT]"),
+    # rough address masking (Korean road names)
+    (re.compile(r"[가-힣0-9\- ]{2,}(로|길|동|구|시)\s*\d+(-\d+)?"), "[ADDRESS]"),
+)
+
+
+def mask_pii(text: str, max_length: int = 500) -> str:
+    for pattern, replacement in _PII_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text[:max_length]
+
+
 def utc_now() -> datetime:
     return datetime.now(timezone.utc)
 
@@ -31,13 +51,14 @@ def verify_password(password: str, stored: str) -> bool:
         return False
 
 
-def _create_token(sub: str, token_type: str, expires_delta: timedelta) -> str:
+def _create_token(sub: str, token_type: str, expires_delta: timedelta, jti: str | None = None, **claims) -> str:
     payload = {
         'sub': sub,
         'type': token_type,
-        'jti': str(uuid4()),
+        'jti': jti or str(uuid4()),
         'iat': utc_now(),
         'exp': utc_now() + expires_delta,
+        **claims,
     }
     return jwt.encode(payload, settings.jwt_secret, algorithm=settings.jwt_algorithm)
 
@@ -46,8 +67,10 @@ def create_access_token(user_id: str) -> str:
     return _create_token(user_id, 'access', timedelta(minutes=settings.access_token_exp_minutes))
 
 
-def create_refresh_token(user_id: str) -> str:
-    return _create_token(user_id, 'refresh', timedelta(days=settings.refresh_token_exp_days))
+def create_refresh_token(user_id: str, family: str | None = None, jti: str | None = None) -> str:
+    # every token rotated from one login shares a family, so reuse of any of them can revoke the whole chain
+    claims = {'fam': family} if family else {}
+    return _create_token(user_id, 'refresh', timedelta(days=settings.refresh_token_exp_days), jti=jti, **claims)
 
 
 def decode_token(token: str, expected_type: Optional[str] = None) -> dict:
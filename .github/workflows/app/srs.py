@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+from uuid import uuid4
+
+from sqlalchemy import bindparam, insert, select, update
+
+from app.config import settings
+from app.db import ReviewCardRecord, get_read_session, get_session
+from app.observability import app_logger
+
+try:
+    import numpy
+except Exception:  # pragma: no cover - optional dependency at runtime
+    numpy = None
+
+PASSING_GRADE = 3
+
+
+class ReviewConflict(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class Sm2Parameters:
+    initial_ease: float = 2.5
+    min_ease: float = 1.3
+    first_interval_days: float = 1.0
+    second_interval_days: float = 6.0
+    lapse_interval_days: float = 10 / (24 * 60)
+    interval_modifier: float = 1.0
+    max_interval_days: float = 365.0
+
+
+@dataclass(frozen=True)
+class CardState:
+    ease: float
+    interval_days: float
+    repetitions: int
+    lapses: int
+
+
+def build_parameters(**overrides) -> Sm2Parameters:
+    return replace(
+        Sm2Parameters(
+            initial_ease=settings.srs_initial_ease,
+            min_ease=settings.srs_min_ease,
+            interval_modifier=settings.srs_interval_modifier,
+            max_interval_days=settings.srs_max_interval_days,
+        ),
+        **overrides,
+    )
+
+
+def schedule(state: CardState, grade: int, reviewed_at: datetime, params: Sm2Parameters) -> tuple[CardState, datetime]:
+    if grade < PASSING_GRADE:
+        # a lapse restarts the learning steps; the card comes back within the same session
+        interval = params.lapse_interval_days
+        repetitions, lapses = 0, state.lapses + 1
+    else:
+        if state.repetitions == 0:
+            interval = params.first_interval_days
+        elif state.repetitions == 1:
+            interval = params.second_interval_days
+        else:
+            interval = state.interval_days * state.ease
+        interval = min(params.max_interval_days, interval * params.interval_modifier)
+        repetitions, lapses = state.repetitions + 1, state.lapses
+    miss = 5 - grade
+    ease = max(params.min_ease, state.ease + 0.1 - miss * (0.08 + miss * 0.02))
+    return CardState(ease, interval, repetitions, lapses), reviewed_at + timedelta(days=interval)
+
+
+def add_cards(
+    user_id: str,
+    cards: Iterable[tuple[str, str | None]],
+    source_job_id: str | None = None,
+    params: Sm2Parameters | None = None,
+    now: datetime | None = None,
+) -> list[dict]:
+    params = params or build_parameters()
+    now = now or datetime.now(timezone.utc)
+    rows = [
+        {
+            'card_id': str(uuid4()),
+            'user_id': user_id,
+            'front': front,
+            'back': back,
+            'source_job_id': source_job_id,
+            'ease': params.initial_ease,
+            'interval_days': 0.0,
+            'repetitions': 0,
+            'lapses': 0,
+            'reviews': 0,
+            # new cards are due immediately, ordered by creation
+            'due_at': now,
+            'created_at': now,
+            'updated_at': now,
+        }
+        for front, back in cards
+    ]
+    if rows:
+        with get_session() as session:
+            session.execute(insert(ReviewCardRecord), rows)
+    return rows
+
+
+def due_cards(user_id: str, limit: int, now: datetime | None = None, primary: bool = False) -> list:
+    now = now or datetime.now(timezone.utc)
+    # one range scan on (user_id, due_at); the index already yields rows in due order
+    with get_read_session(user_id, primary=primary) as session:
+        return session.execute(
+            select(ReviewCardRecord)
+            .where(ReviewCardRecord.user_id == user_id, ReviewCardRecord.due_at <= now)
+            .order_by(ReviewCardRecord.due_at)
+            .limit(limit)
+        ).scalars().all()
+
+
+def record_review(
+    user_id: str,
+    card_id: str,
+    grade: int,
+    params: Sm2Parameters | None = None,
+    now: datetime | None = None,
+) -> ReviewCardRecord | None:
+    params = params or build_parameters()
+    now = now or datetime.now(timezone.utc)
+    with get_session() as session:
+        card = session.get(ReviewCardRecord, card_id)
+        if card is None or card.user_id != user_id:
+            return None
+        state, due_at = schedule(CardState(card.ease, card.interval_days, card.repetitions, card.lapses), grade, now, params)
+        values = {
+            'ease': state.ease,
+            'interval_days': state.interval_days,
+            'repetitions': state.repetitions,
+            'lapses': state.lapses,
+            'reviews': card.reviews + 1,
+            'due_at': due_at,
+            'last_reviewed_at': now,
+            'updated_at': now,
+        }
+        # compare-and-set on the review counter: a retried or concurrent submit cannot advance the card twice
+        result = session.execute(
+            update(ReviewCardRecord)
+            .where(ReviewCardRecord.card_id == card_id, ReviewCardRecord.reviews == card.reviews)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            raise ReviewConflict('card was reviewed concurrently')
+        session.expunge(card)
+    for name, value in values.items():
+        setattr(card, name, value)
+    return card
+
+
+def _rescale(
+    intervals: list[float], eases: list[float], ratio: float, params: Sm2Parameters
+) -> tuple[list[float], list[float]]:
+    if numpy is not None:
+        scaled = numpy.minimum(numpy.asarray(intervals, dtype=numpy.float64) * ratio, params.max_interval_days)
+        floored = numpy.maximum(numpy.asarray(eases, dtype=numpy.float64), params.min_ease)
+        return scaled.tolist(), floored.tolist()
+    return (
+        [min(interval * ratio, params.max_interval_days) for interval in intervals],
+        [max(ease, params.min_ease) for ease in eases],
+    )
+
+
+def reschedule_cards(
+    previous: Sm2Parameters,
+    current: Sm2Parameters,
+    user_id: str | None = None,
+    batch_size: int | None = None,
+    max_batches: int | None = None,
+) -> int:
+    batch_size = batch_size or settings.srs_reschedule_batch_size
+    ratio = current.interval_modifier / previous.interval_modifier
+    table = ReviewCardRecord.__table__
+    # compare-and-set on the review counter, as in record_review: a card reviewed after the batch was
+    # read keeps that review, which was already scheduled with the current parameters
+    rescale = (
+        update(table)
+        .where(table.c.card_id == bindparam('key_card_id'), table.c.reviews == bindparam('key_reviews'))
+        .values(
+            interval_days=bindparam('new_interval_days'),
+            ease=bindparam('new_ease'),
+            due_at=bindparam('new_due_at'),
+            updated_at=bindparam('new_updated_at'),
+        )
+    )
+    rescheduled = 0
+    skipped = 0
+    batches = 0
+    after = ''
+    while max_batches is None or batches < max_batches:
+        # keyset pagination on the primary key; each batch is one short transaction
+        with get_session() as session:
+            query = (
+                select(
+                    ReviewCardRecord.card_id,
+                    ReviewCardRecord.ease,
+                    ReviewCardRecord.interval_days,
+                    ReviewCardRecord.last_reviewed_at,
+                    ReviewCardRecord.reviews,
+                )
+                .where(ReviewCardRecord.card_id > after, ReviewCardRecord.repetitions > 0)
+                .order_by(ReviewCardRecord.card_id)
+                .limit(batch_size)
+            )
+            if user_id is not None:
+                query = query.where(ReviewCardRecord.user_id == user_id)
+            rows = session.execute(query).all()
+            if not rows:
+                break
+            intervals, eases = _rescale([row.interval_days for row in rows], [row.ease for row in rows], ratio, current)
+            now = datetime.now(timezone.utc)
+            updated = session.connection().execute(
+                rescale,
+                [
+                    {
+                        'key_card_id': row.card_id,
+                        'key_reviews': row.reviews,
+                        'new_interval_days': interval,
+                        'new_ease': ease,
+                        'new_due_at': (row.last_reviewed_at or now) + timedelta(days=interval),
+                        'new_updated_at': now,
+                    }
+                    for row, interval, ease in zip(rows, intervals, eases)
+                ],
+            ).rowcount
+        rescheduled += updated
+        skipped += len(rows) - updated
+        batches += 1
+        after = rows[-1].card_id
+        if len(rows) < batch_size:
+            break
+
+    app_logger.info(
+        f'rescheduled {rescheduled} review cards (interval ratio {ratio:.3f}), '
+        f'{skipped} skipped as reviewed meanwhile'
+    )
+    return rescheduled
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from sqlalchemy.exc import IntegrityError
+
+from app.config import settings
+from app.db import RevokedTokenRecord, get_read_session, get_session
+from app.lazy import Lazy
+from app.observability import app_logger, metrics
+from app.redis_clients import UNAVAILABLE_ERRORS, redis_clients
+from app.security import create_refresh_token
+
+ROTATED, REUSED, REVOKED = 'rotated', 'reused', 'revoked'
+
+# KEYS[1] = family key; ARGV = presented jti, next jti, ttl seconds.
+# The family holds the jti of its only live token. Presenting any other token of the family means an
+# old one was replayed, so the family is dropped and every token in it stops working.
+_ROTATE_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if not current then
+    return 0
+end
+if current == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    return 1
+end
+redis.call('DEL', KEYS[1])
+return 2
+"""
+_OUTCOMES = {0: REVOKED, 1: ROTATED, 2: REUSED}
+
+
+def _ttl_seconds() -> int:
+    return settings.refresh_token_exp_days * 86400
+
+
+def _expires_at(payload: dict) -> datetime:
+    return datetime.fromtimestamp(payload['exp'], tz=timezone.utc)
+
+
+class DatabaseTokenStore:
+    # the revoked_tokens table: one row per rotated token, plus a 'fam:' row once a family is revoked
+
+    @staticmethod
+    def _family_key(family: str) -> str:
+        return f'fam:{family}'
+
+    def start(self, family: str, user_id: str, jti: str) -> None:
+        # a family is live until revoked, so there is nothing to write up front
+        return None
+
+    def is_revoked(self, family: str) -> bool:
+        with get_read_session(primary=True) as session:
+            return session.get(RevokedTokenRecord, self._family_key(family)) is not None
+
+    def rotate(self, payload: dict, next_jti: str) -> str:
+        if self.is_revoked(payload['fam']):
+            return REVOKED
+        if not self.retire(payload):
+            self.revoke(payload)
+            return REUSED
+        return ROTATED
+
+    def retire(self, payload: dict) -> bool:
+        # the primary key makes this insert the compare-and-set: only one caller can retire a jti
+        try:
+            with get_session() as session:
+                session.add(RevokedTokenRecord(jti=payload['jti'], user_id=payload['sub'], token_type='refresh', expires_at=_expires_at(payload)))
+        except IntegrityError:
+            return False
+        return True
+
+    def revoke(self, payload: dict) -> None:
+        key = self._family_key(payload['fam'])
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=_ttl_seconds())
+        try:
+            with get_session() as session:
+                if session.get(RevokedTokenRecord, key) is None:
+                    session.add(RevokedTokenRecord(jti=key, user_id=payload['sub'], token_type='family', expires_at=expires_at))
+        except IntegrityError:
+            pass
+
+
+class TokenStoreUnavailable(RuntimeError):
+    pass
+
+
+class RedisTokenStore:
+    # one key per family with the refresh lifetime as TTL; a rotation is a primary-key read of the
+    # table plus a single script call. Revocations are also written to the table, so they survive
+    # the key being unreachable or lost
+
+    def __init__(self, client, fallback: DatabaseTokenStore | None = None, key_prefix: str = 'rtfam'):
+        self.client = client
+        self.fallback = fallback or DatabaseTokenStore()
+        self.key_prefix = key_prefix
+        self._rotate = client.register_script(_ROTATE_SCRIPT)
+
+    def _key(self, family: str) -> str:
+        return f'{self.key_prefix}:{family}'
+
+    def _degraded(self, operation: str, exc: Exception) -> None:
+        metrics.record_refresh_token('redis_error')
+        app_logger.warning(f'token store {operation} failed on redis: {exc}')
+
+    def _forget(self, family: str) -> None:
+        try:
+            self.client.delete(self._key(family))
+        except UNAVAILABLE_ERRORS as exc:
+            # the table row already revokes the family; the key is checked against it on every rotation
+            self._degraded('revoke', exc)
+
+    def start(self, family: str, user_id: str, jti: str) -> None:
+        try:
+            self.client.set(self._key(family), jti, ex=_ttl_seconds())
+        except UNAVAILABLE_ERRORS as exc:
+            # the family never reaches Redis, so its first refresh answers revoked and the user signs in again
+            self._degraded('start', exc)
+
+    def rotate(self, payload: dict, next_jti: str) -> str:
+        family = payload['fam']
+        # a revocation whose key delete did not reach Redis is still in the table
+        if self.fallback.is_revoked(family):
+            self._forget(family)
+            return REVOKED
+        try:
+            result = self._rotate(keys=[self._key(family)], args=[payload['jti'], next_jti, _ttl_seconds()])
+        except UNAVAILABLE_ERRORS as exc:
+            # only Redis knows the live jti of a family, so rotating without it would accept stolen tokens
+            self._degraded('rotate', exc)
+            raise TokenStoreUnavailable('refresh token store unavailable') from exc
+        outcome = _OUTCOMES[int(result)]
+        if outcome == REUSED:
+            self.fallback.revoke(payload)
+        return outcome
+
+    def revoke(self, payload: dict) -> None:
+        self.fallback.revoke(payload)
+        self._forget(payload['fam'])
+
+
+def build_token_store() -> DatabaseTokenStore | RedisTokenStore:
+    if settings.token_store_backend == 'redis':
+        client = redis_clients.get(socket_timeout=settings.token_store_redis_timeout_seconds)
+        if client is not None:
+            return RedisTokenStore(client)
+    return DatabaseTokenStore()
+
+
+token_store = Lazy(build_token_store, 'token_store')
+
+
+def issue_refresh_token(user_id: str) -> str:
+    family, jti = uuid4().hex, str(uuid4())
+    token_store.start(family, user_id, jti)
+    return create_refresh_token(user_id, family=family, jti=jti)
+
+
+def rotate_refresh_token(payload: dict) -> tuple[str, str | None]:
+    if 'fam' not in payload:
+        # issued before token families: retired through the table once, then moved onto a family
+        outcome = ROTATED if DatabaseTokenStore().retire(payload) else REUSED
+        metrics.record_refresh_token(outcome)
+        return outcome, issue_refresh_token(payload['sub']) if outcome == ROTATED else None
+
+    next_jti = str(uuid4())
+    outcome = token_store.rotate(payload, next_jti)
+    metrics.record_refresh_token(outcome)
+    if outcome != ROTATED:
+        if outcome == REUSED:
+            app_logger.warning(f"refresh token reuse detected, family revoked: user={payload['sub']}")
+        return outcome, None
+    return outcome, create_refresh_token(payload['sub'], family=payload['fam'], jti=next_jti)
+
+
+def revoke_refresh_token(payload: dict) -> None:
+    if 'fam' not in payload:
+        DatabaseTokenStore().retire(payload)
+        return
+    token_store.revoke(payload)
@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import heapq
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from sqlalchemy import func, select
+
+from app.config import settings
+from app.db import ImportItemRecord, ImportJobRecord, get_read_session
+
+try:
+    import numpy
+except Exception:  # pragma: no cover - optional dependency at runtime
+    numpy = None
+
+INDEXED_KINDS = ('word', 'phrase')
+_NUMPY_MIN_TERMS = 2048
+# completions are polled by updated_at; looking back a little covers a job whose commit landed after a
+# later-stamped one was already seen (the merge skips jobs it already holds)
+_COMPLETION_LOOKBACK = timedelta(seconds=60)
+_STOPWORDS = frozenset(
+    'a an and are as at be but by do for from had has have he her his i if in is it its me my no not of on or our '
+    'she so that the their them they this to up us was we were what when which who will with you your'.split()
+)
+
+
+def is_useful(kind: str, text: str) -> bool:
+    tokens = text.split()
+    if kind == 'word':
+        return len(text) > 2 and text not in _STOPWORDS
+    # a phrase made only of function words ("of the", "it is") is never worth recommending
+    return len(tokens) > 1 and not all(token in _STOPWORDS for token in tokens)
+
+
+class StringInterner:
+    # one per user, so evicting the user frees its ids; the strings themselves go through sys.intern, so a
+    # term common to many users is still stored once and freed with the last user holding it
+    def __init__(self):
+        self._ids: dict[str, int] = {}
+        self._strings: list[str] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def __getitem__(self, term_id: int) -> str:
+        return self._strings[term_id]
+
+    def intern(self, text: str) -> int:
+        term_id = self._ids.get(text)
+        if term_id is not None:
+            return term_id
+        with self._lock:
+            term_id = self._ids.get(text)
+            if term_id is None:
+                text = sys.intern(text)
+                term_id = len(self._strings)
+                self._strings.append(text)
+                self._ids[text] = term_id
+            return term_id
+
+    def lookup(self, text: str) -> int | None:
+        return self._ids.get(text)
+
+
+class TermCounts:
+    __slots__ = ('term_ids', 'counts', '_slots')
+
+    def __init__(self):
+        self.term_ids = array('I')
+        self.counts = array('I')
+        self._slots: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def add(self, term_id: int, count: int) -> None:
+        slot = self._slots.get(term_id)
+        if slot is None:
+            self._slots[term_id] = len(self.counts)
+            self.term_ids.append(term_id)
+            self.counts.append(count)
+        else:
+            self.counts[slot] += count
+
+    def get(self, term_id: int) -> int:
+        slot = self._slots.get(term_id)
+        return 0 if slot is None else self.counts[slot]
+
+    def top(self, k: int, min_count: int = 1) -> list[tuple[int, int]]:
+        size = len(self.counts)
+        if k <= 0 or size == 0:
+            return []
+        if numpy is not None and size >= _NUMPY_MIN_TERMS and k < size:
+            values = numpy.frombuffer(self.counts, dtype=f'u{self.counts.itemsize}').astype(numpy.int64)
+            candidates = numpy.argpartition(-values, k - 1)[:k]
+            # highest count first, earlier-seen term first on ties
+            slots = candidates[numpy.lexsort((candidates, -values[candidates]))].tolist()
+            del values, candidates
+        else:
+            slots = heapq.nsmallest(k, range(size), key=lambda slot: (-self.counts[slot], slot))
+        return [(self.term_ids[slot], self.counts[slot]) for slot in slots if self.counts[slot] >= min_count]
+
+
+@dataclass
+class UserVocabulary:
+    terms: dict[str, TermCounts] = field(default_factory=lambda: {kind: TermCounts() for kind in INDEXED_KINDS})
+    jobs: set[str] = field(default_factory=set)
+    interner: StringInterner = field(default_factory=StringInterner)
+    loaded: bool = False
+    # a held job known to have items; if they are gone the user's data was erased by another process
+    anchor_job: str | None = None
+    # updated_at of the newest completed job seen by a refresh
+    completed_through: datetime | None = None
+    refreshed_at: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class VocabularyIndex:
+    def __init__(self, max_users: int = 10_000, refresh_seconds: float = 5.0):
+        self.max_users = max_users
+        self.refresh_seconds = refresh_seconds
+        self._users: OrderedDict[str, UserVocabulary] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def _vocabulary(self, user_id: str, create: bool) -> UserVocabulary | None:
+        with self._lock:
+            vocabulary = self._users.get(user_id)
+            if vocabulary is not None:
+                self._users.move_to_end(user_id)
+            elif create:
+                vocabulary = self._users[user_id] = UserVocabulary()
+                while len(self._users) > self.max_users:
+                    self._users.popitem(last=False)
+            return vocabulary
+
+    def _merge_into(self, vocabulary: UserVocabulary, job_id: str, rows: Iterable[tuple[str, str, int]]) -> None:
+        if job_id in vocabulary.jobs:
+            return
+        vocabulary.jobs.add(job_id)
+        for kind, text, occurrences in rows:
+            if vocabulary.anchor_job is None:
+                vocabulary.anchor_job = job_id
+            counts = vocabulary.terms.get(kind)
+            if counts is not None and is_useful(kind, text):
+                counts.add(vocabulary.interner.intern(text), occurrences)
+
+    def merge(self, user_id: str, job_id: str, rows: Iterable[tuple[str, str, int]]) -> bool:
+        # only users already held in memory are updated; anyone else is loaded in full on first query
+        vocabulary = self._vocabulary(user_id, create=False)
+        if vocabulary is None:
+            return False
+        with vocabulary.lock:
+            self._merge_into(vocabulary, job_id, rows)
+        return True
+
+    @staticmethod
+    def _completed_jobs(session, user_id: str, vocabulary: UserVocabulary) -> set[str]:
+        completed = (ImportJobRecord.user_id == user_id, ImportJobRecord.status == 'completed')
+        if not vocabulary.loaded:
+            # first load: every job with items, archived ones included; the mark is taken first so a job
+            # completing meanwhile is picked up by the next poll
+            vocabulary.completed_through = session.execute(select(func.max(ImportJobRecord.updated_at)).where(*completed)).scalar()
+            vocabulary.loaded = True
+            return set(
+                session.execute(
+                    select(ImportItemRecord.job_id).where(ImportItemRecord.user_id == user_id).distinct()
+                ).scalars()
+            )
+        # afterwards only jobs completed since the last poll, found through the jobs' own index
+        query = select(ImportJobRecord.job_id, ImportJobRecord.updated_at).where(*completed)
+        if vocabulary.completed_through is not None:
+            query = query.where(ImportJobRecord.updated_at >= vocabulary.completed_through - _COMPLETION_LOOKBACK)
+        rows = session.execute(query).all()
+        if rows:
+            vocabulary.completed_through = max(row.updated_at for row in rows)
+        return {row.job_id for row in rows}
+
+    @staticmethod
+    def _anchor_exists(session, user_id: str, job_id: str) -> bool:
+        # one lookup on the job_id index per refresh
+        return session.execute(
+            select(ImportItemRecord.id).where(ImportItemRecord.job_id == job_id, ImportItemRecord.user_id == user_id).limit(1)
+        ).first() is not None
+
+    def _replace(self, user_id: str, stale: UserVocabulary) -> UserVocabulary:
+        fresh = UserVocabulary(lock=stale.lock)
+        with self._lock:
+            if self._users.get(user_id) is stale:
+                self._users[user_id] = fresh
+        return fresh
+
+    def refresh(self, user_id: str, force: bool = False) -> UserVocabulary:
+        vocabulary = self._vocabulary(user_id, create=True)
+        with vocabulary.lock:
+            now = time.monotonic()
+            if not force and vocabulary.refreshed_at and now - vocabulary.refreshed_at < self.refresh_seconds:
+                return vocabulary
+            # items of a job are committed together with its completion, so whole jobs are the merge unit
+            with get_read_session(user_id) as session:
+                if vocabulary.anchor_job is not None and not self._anchor_exists(session, user_id, vocabulary.anchor_job):
+                    # DELETE /me/data ran in another process, and the id may already belong to a new user
+                    vocabulary = self._replace(user_id, vocabulary)
+                job_ids = self._completed_jobs(session, user_id, vocabulary)
+                for job_id in sorted(job_ids - vocabulary.jobs):
+                    rows = session.execute(
+                        select(ImportItemRecord.kind, ImportItemRecord.text, ImportItemRecord.occurrences).where(
+                            ImportItemRecord.job_id == job_id,
+                            ImportItemRecord.kind.in_(INDEXED_KINDS),
+                        )
+                    )
+                    self._merge_into(vocabulary, job_id, rows)
+            vocabulary.refreshed_at = now
+        return vocabulary
+
+    def top(self, user_id: str, kind: str, limit: int = 20, min_occurrences: int = 1) -> list[tuple[str, int]]:
+        vocabulary = self.refresh(user_id)
+        with vocabulary.lock:
+            ranked = vocabulary.terms[kind].top(limit, min_occurrences)
+            return [(vocabulary.interner[term_id], count) for term_id, count in ranked]
+
+    def lookup(self, user_id: str, kind: str, texts: Iterable[str]) -> dict[str, int]:
+        vocabulary = self.refresh(user_id)
+        found = {}
+        with vocabulary.lock:
+            counts = vocabulary.terms[kind]
+            for text in texts:
+                term_id = vocabulary.interner.lookup(text)
+                found[text] = 0 if term_id is None else counts.get(term_id)
+        return found
+
+    def imports(self, user_id: str) -> int:
+        vocabulary = self._vocabulary(user_id, create=False)
+        return 0 if vocabulary is None else len(vocabulary.jobs)
+
+    def forget(self, user_id: str) -> None:
+        with self._lock:
+            self._users.pop(user_id, None)
+
+
+def build_vocab_index() -> VocabularyIndex:
+    return VocabularyIndex(max_users=settings.vocab_index_max_users, refresh_seconds=settings.vocab_index_refresh_seconds)
+
+
+vocab_index = build_vocab_index()
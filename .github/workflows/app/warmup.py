@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable
+
+from app.config import settings
+from app.db import engine
+from app.importer import compress_content, parse_import
+from app.lazy import registry
+from app.observability import app_logger, metrics
+from app.schemas import (
+    ChatAnalyzeRequest,
+    ImportJob,
+    ImportListResponse,
+    ImportRequest,
+    OnboardingGoal,
+    TokenPair,
+    UserLoginRequest,
+)
+from app.security import create_access_token, decode_token, mask_pii
+
+_SAMPLE_CHAT = '[Mina] [오후 3:12] Call me at 010-1234-5678, I would like to book a table.'
+
+
+@dataclass
+class StartupReport:
+    phases: dict[str, float] = field(default_factory=dict)
+    errors: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def total_ms(self) -> float:
+        return round(sum(self.phases.values()), 2)
+
+    def run(self, phase: str, step: Callable[[], object], required: bool = False) -> None:
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception as exc:
+            if required:
+                # a schema or config problem must stop the deploy rather than serve broken routes
+                raise
+            # a cold dependency must not keep the process from starting; /ready reports it separately
+            self.errors[phase] = f'{type(exc).__name__}: {exc}'
+            app_logger.warning(f'warm-up step {phase} failed: {exc}')
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.phases[phase] = round(elapsed, 2)
+            metrics.record_startup_phase(phase, elapsed / 1000)
+
+    def as_dict(self) -> dict:
+        return {'total_ms': self.total_ms, 'phases': dict(self.phases), 'errors': dict(self.errors)}
+
+
+def open_db_pool(connections: int) -> None:
+    # check out several connections at once so the pool keeps that many open for the first requests
+    held = []
+    try:
+        for _ in range(max(1, connections)):
+            conn = engine.connect()
+            held.append(conn)
+            conn.exec_driver_sql('SELECT 1')
+    finally:
+        for conn in held:
+            conn.close()
+
+
+def build_singletons() -> None:
+    for singleton in list(registry.values()):
+        singleton.get()
+
+
+def ping_queue() -> None:
+    registry['queue'].ping()
+
+
+def prime_validators() -> None:
+    # pydantic builds validators up front, but the first call still pays for serializer and FastAPI field setup
+    ChatAnalyzeRequest.model_validate({'text': 'maybe later', 'tone_preference': 'business'})
+    ImportRequest.model_validate({'channel': 'daily', 'content': 'hello'})
+    OnboardingGoal.model_validate({'goal_type': 'business', 'minutes_per_day': 10})
+    UserLoginRequest.model_validate({'user_id': 'warmup', 'password': 'Warmup123A'})
+    job = ImportJob(job_id='warmup', status='queued', progress_percent=0, created_at=datetime.now(timezone.utc))
+    ImportListResponse(items=[job], total=1, offset=0, limit=20).model_dump_json()
+    TokenPair(access_token='warmup', refresh_token='warmup').model_dump_json()
+
+
+def prime_text_pipeline() -> None:
+    mask_pii(_SAMPLE_CHAT)
+    parse_import(compress_content(_SAMPLE_CHAT)[0])
+    decode_token(create_access_token('warmup'), expected_type='access')
+
+
+def run_warmup(
+    extra_steps: dict[str, Callable[[], object]] | None = None,
+    required_steps: dict[str, Callable[[], object]] | None = None,
+) -> StartupReport:
+    report = StartupReport()
+    for phase, step in (required_steps or {}).items():
+        report.run(phase, step, required=True)
+    for phase, step in (extra_steps or {}).items():
+        report.run(phase, step)
+    report.run('singletons', build_singletons)
+    report.run('db_pool', lambda: open_db_pool(settings.warmup_db_connections))
+    report.run('queue', ping_queue)
+    report.run('validators', prime_validators)
+    report.run('text_pipeline', prime_text_pipeline)
+    summary = ', '.join(f'{phase}={ms}ms' for phase, ms in report.phases.items())
+    app_logger.info(f'startup warm-up finished in {report.total_ms}ms ({summary})')
+    return report
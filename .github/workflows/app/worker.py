@@ -1,66 +1,196 @@
 from __future__ import annotations
 
 import time
-from datetime import datetime, timezone
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, insert, select, update
 
 from app.alerts import alerts
+from app.autoscale import autoscaler
 from app.config import settings
-from app.db import ImportJobRecord, get_session
+from app.db import ImportItemRecord, ImportJobRecord, ImportPayloadRecord, get_read_session, get_session, read_router
+from app.importer import item_rows, parse_import
+from app.lazy import Lazy
 from app.observability import app_logger, metrics, now_ms
 from app.queue import build_queue
-
-queue = build_queue()
-
-
-def _process_job_payload(job: ImportJobRecord) -> None:
-    if 'FORCE_FAIL' in job.content:
+from app.vocab_index import vocab_index
+
+queue = Lazy(build_queue, 'queue')
+
+
+class ProgressCheckpoint:
+    def __init__(self, job_id: str, size_bytes: int, step_percent: int):
+        self.job_id = job_id
+        self.size_bytes = max(1, size_bytes)
+        self.step_percent = max(1, step_percent)
+        self.reported = 0
+
+    def __call__(self, position: int) -> None:
+        # 100 is only written together with the extracted items
+        percent = min(99, position * 100 // self.size_bytes)
+        if percent < self.reported + self.step_percent:
+            return
+        self.reported = percent
+        with get_session() as session:
+            session.execute(
+                update(ImportJobRecord)
+                .where(ImportJobRecord.job_id == self.job_id)
+                .values(progress_percent=percent, updated_at=datetime.now(timezone.utc))
+                .execution_options(synchronize_session=False)
+            )
+
+
+def _run_import(job_id: str, user_id: str, preview: str) -> int:
+    if 'FORCE_FAIL' in preview:
         raise RuntimeError('forced processing failure')
+    with get_session() as session:
+        payload = session.get(ImportPayloadRecord, job_id)
+        if payload is None:
+            raise RuntimeError('import payload missing')
+        blob, size_bytes = payload.content, payload.size_bytes
+
+    result = parse_import(
+        blob,
+        chunk_size=settings.import_chunk_bytes,
+        max_sentences=settings.import_max_sentences,
+        on_progress=ProgressCheckpoint(job_id, size_bytes, settings.import_progress_step_percent),
+    )
+    rows = item_rows(result, job_id, user_id)
+
+    # items, completion and payload removal commit together, so a retry starts from a clean slate
+    with get_session() as session:
+        session.execute(delete(ImportItemRecord).where(ImportItemRecord.job_id == job_id))
+        for offset in range(0, len(rows), settings.import_item_batch_size):
+            session.execute(insert(ImportItemRecord), rows[offset:offset + settings.import_item_batch_size])
+        session.execute(delete(ImportPayloadRecord).where(ImportPayloadRecord.job_id == job_id))
+        session.execute(
+            update(ImportJobRecord)
+            .where(ImportJobRecord.job_id == job_id)
+            .values(status='completed', progress_percent=100, last_error=None, updated_at=datetime.now(timezone.utc))
+            .execution_options(synchronize_session=False)
+        )
+    vocab_index.merge(user_id, job_id, ((row['kind'], row['text'], row['occurrences']) for row in rows))
+    return len(rows)
+
+
+def _seconds_since(created_at: datetime) -> float:
+    if created_at.tzinfo is None:
+        # sqlite hands back naive datetimes
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (datetime.now(timezone.utc) - created_at).total_seconds())
 
 
 def process_next_job() -> str | None:
     start = now_ms()
-    job_id = queue.dequeue()
-    if not job_id:
+    entry = queue.dequeue()
+    if entry is None:
         return None
+    job_id = entry.job_id
+    lane = entry.lane or queue.default_lane
+    if entry.enqueued_at:
+        metrics.record_queue_wait(lane, max(0.0, time.time() - entry.enqueued_at))
 
     with get_session() as session:
+        # delivery is at least once (outbox retries, stale-job sweeps), so the queued -> processing
+        # switch is the claim: a duplicate of a job that is running or finished is dropped here. The
+        # job id is still returned, since None would tell the caller the queue is empty
+        claimed = session.execute(
+            update(ImportJobRecord)
+            .where(ImportJobRecord.job_id == job_id, ImportJobRecord.status == 'queued')
+            .values(status='processing', updated_at=datetime.now(timezone.utc))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not claimed:
+            return job_id
         job = session.get(ImportJobRecord, job_id)
-        if not job:
-            return None
-
-        job.status = 'processing'
-        job.updated_at = datetime.now(timezone.utc)
-
-        try:
-            _process_job_payload(job)
-            next_progress = min(job.progress_percent + 25, 100)
-            job.progress_percent = next_progress
-            job.status = 'completed' if next_progress == 100 else 'queued'
-            job.last_error = None
-            job.updated_at = datetime.now(timezone.utc)
-            if next_progress < 100:
-                queue.enqueue(job_id)
-        except Exception as exc:
+        user_id, created_at, preview = job.user_id, job.created_at, job.content_preview_masked or ''
+
+    try:
+        # a single streaming pass over the upload; progress is checkpointed as bytes are consumed
+        _run_import(job_id, user_id, preview)
+        metrics.record_job_completion(lane, _seconds_since(created_at))
+    except Exception as exc:
+        with get_session() as session:
+            job = session.get(ImportJobRecord, job_id)
+            if job is None:
+                # the user erased their data while the import ran; there is nothing left to retry
+                app_logger.info('worker job dropped, job was deleted', extra={'job_id': job_id})
+                return job_id
             job.attempts += 1
             job.last_error = str(exc)
             job.updated_at = datetime.now(timezone.utc)
-
-            if job.attempts < settings.max_job_retries:
-                backoff_s = settings.backoff_base_seconds ** job.attempts
-                job.status = 'queued'
-                time.sleep(min(backoff_s, 5))
-                queue.enqueue(job_id)
-            else:
-                job.status = 'failed'
-                queue.enqueue_dead_letter(job_id)
-                alerts.notify_error('worker_job_failed', f'job_id={job_id} error={exc}')
+            retry = job.attempts < settings.max_job_retries
+            job.status = 'queued' if retry else 'failed'
+            attempts = job.attempts
+
+        # pushed only once the status is committed, or a fast worker could find the job still processing
+        if retry:
+            time.sleep(min(settings.backoff_base_seconds ** attempts, 5))
+            queue.enqueue(job_id, user_id, lane)
+        else:
+            queue.enqueue_dead_letter(job_id, user_id, lane)
+            alerts.notify_error('worker_job_failed', f'job_id={job_id} error={exc}')
 
     duration = now_ms() - start
     metrics.record_worker_duration(duration)
+    autoscaler.observe_duration(duration / 1000)
     app_logger.info('worker job processed', extra={'job_id': job_id, 'latency_ms': round(duration, 2)})
     return job_id
 
 
+def requeue_stale_jobs(older_than_seconds: int | None = None, limit: int | None = None) -> int:
+    # a job that is queued in the database but on no queue (an outbox entry lost with its process) would
+    # wait forever. It counts as lost once it has waited older_than_seconds longer than the oldest job
+    # still on its lane, so a backed-up lane is not padded with copies of jobs that are merely waiting
+    older_than_seconds = settings.queue_requeue_stale_after_seconds if older_than_seconds is None else older_than_seconds
+    limit = limit or settings.queue_requeue_batch_size
+    now = datetime.now(timezone.utc)
+    lanes = queue.metrics().lanes
+    # rows from before lanes were stored go to the lowest-priority lane rather than jumping ahead
+    fallback_lane = next(reversed(queue.lane_weights))
+    cutoffs = {
+        lane: now - timedelta(seconds=older_than_seconds + (lanes[lane].oldest_job_age_seconds if lane in lanes else 0))
+        for lane in queue.lane_weights
+    }
+    with get_read_session(primary=True) as session:
+        stale = session.execute(
+            select(ImportJobRecord.job_id, ImportJobRecord.user_id, ImportJobRecord.lane)
+            .where(ImportJobRecord.status == 'queued', ImportJobRecord.updated_at < max(cutoffs.values()))
+            .order_by(ImportJobRecord.updated_at)
+            .limit(limit)
+        ).all()
+
+    requeued = 0
+    for job_id, user_id, lane in stale:
+        lane = lane if lane in cutoffs else fallback_lane
+        # touching updated_at claims the row, so sweeps in other workers do not push it too
+        with get_session() as session:
+            claimed = session.execute(
+                update(ImportJobRecord)
+                .where(
+                    ImportJobRecord.job_id == job_id,
+                    ImportJobRecord.status == 'queued',
+                    ImportJobRecord.updated_at < cutoffs[lane],
+                )
+                .values(updated_at=datetime.now(timezone.utc))
+                .execution_options(synchronize_session=False)
+            ).rowcount
+        if claimed:
+            queue.enqueue(job_id, user_id, lane)
+            requeued += 1
+    if requeued:
+        app_logger.warning(f'requeued {requeued} import jobs lost from their queue lanes')
+    return requeued
+
+
+def _sweep() -> None:
+    try:
+        requeue_stale_jobs()
+    except Exception as exc:
+        app_logger.warning(f'stale job sweep failed: {exc}')
+
+
 def process_batch(max_jobs: int = 50) -> list[str]:
     processed: list[str] = []
     for _ in range(max_jobs):
@@ -71,8 +201,40 @@ def process_batch(max_jobs: int = 50) -> list[str]:
     return processed
 
 
+def _rescale() -> int:
+    try:
+        return autoscaler.update(queue.metrics()).concurrency
+    except Exception as exc:
+        app_logger.warning(f'autoscaler update failed: {exc}')
+        return autoscaler.concurrency
+
+
 def worker_forever(poll_interval_seconds: int = 1) -> None:
+    read_router.start()
+    executor = ThreadPoolExecutor(max_workers=settings.worker_max_concurrency, thread_name_prefix='import-worker')
+    in_flight: set[Future] = set()
+    concurrency = _rescale()
+    next_rescale = time.monotonic() + settings.autoscale_interval_seconds
+    next_sweep = time.monotonic()
     while True:
-        processed = process_batch(max_jobs=100)
-        if not processed:
+        if time.monotonic() >= next_rescale:
+            concurrency = _rescale()
+            next_rescale = time.monotonic() + settings.autoscale_interval_seconds
+        if time.monotonic() >= next_sweep:
+            _sweep()
+            next_sweep = time.monotonic() + settings.queue_requeue_interval_seconds
+
+        # shrinking only stops refilling; jobs already running are allowed to finish
+        while len(in_flight) < concurrency:
+            in_flight.add(executor.submit(process_next_job))
+
+        done, in_flight = wait(in_flight, timeout=poll_interval_seconds, return_when=FIRST_COMPLETED)
+        idle = False
+        for future in done:
+            exc = future.exception()
+            if exc is not None:
+                app_logger.error(f'worker job crashed: {exc}')
+            elif future.result() is None:
+                idle = True
+        if idle:
             time.sleep(max(1, poll_interval_seconds))
@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import platform
+import statistics
+import sys
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.middleware import RequestContextMiddleware
+from app.observability import JsonFormatter, MetricsStore, app_logger
+from app.queue import InMemoryQueue
+from app.rate_limit import InMemoryRateLimiter
+from app.security import create_access_token, decode_token, hash_password, mask_pii, verify_password
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+
+CHAT_LINE = (
+    '[민지] [오후 3:12] Hi! I would like to book a table for four tomorrow at 7. '
+    'You can reach me at minji.kim@example.com or 010-1234-5678 if anything changes, thanks so much!'
+)
+CHAT_EXPORT = '\n'.join(
+    f'[Jun] [오후 3:{i % 60:02d}] Could you send the updated deck before the meeting? It is on the shared drive.'
+    for i in range(40)
+)
+
+CASES: dict[str, Callable[[], Callable[[], object]]] = {}
+
+
+def case(name: str):
+    # each case is a setup function returning the zero-argument callable that is timed
+    def register(setup: Callable[[], Callable[[], object]]):
+        CASES[name] = setup
+        return setup
+
+    return register
+
+
+@case('security.create_access_token')
+def _create_access_token():
+    return lambda: create_access_token('bench_user_0001')
+
+
+@case('security.decode_token')
+def _decode_token():
+    token = create_access_token('bench_user_0001')
+    return lambda: decode_token(token, expected_type='access')
+
+
+@case('security.hash_password')
+def _hash_password():
+    return lambda: hash_password('CorrectHorse123', salt='0123456789abcdef')
+
+
+@case('security.verify_password')
+def _verify_password():
+    stored = hash_password('CorrectHorse123')
+    return lambda: verify_password('CorrectHorse123', stored)
+
+
+@case('security.mask_pii.chat_line')
+def _mask_pii_line():
+    return lambda: mask_pii(CHAT_LINE)
+
+
+@case('security.mask_pii.chat_export')
+def _mask_pii_export():
+    return lambda: mask_pii(CHAT_EXPORT, max_length=len(CHAT_EXPORT))
+
+
+@case('rate_limit.in_memory.allow_10k_keys')
+def _rate_limit_allow():
+    limiter = InMemoryRateLimiter(per_minute=1_000_000)
+    keys = itertools.cycle([f'user_{i}:/chat/analyze' for i in range(10_000)])
+    return lambda: limiter.allow(next(keys))
+
+
+@case('queue.in_memory.enqueue_dequeue')
+def _queue_roundtrip():
+    queue = InMemoryQueue({'interactive': 4, 'bulk': 1})
+    # a standing backlog across many users, so dequeue pays for the fairness rotation
+    for i in range(5_000):
+        queue.enqueue(f'backlog-{i}', f'user_{i % 1_000}', 'bulk' if i % 5 == 0 else 'interactive')
+    counter = itertools.count()
+
+    def roundtrip():
+        i = next(counter)
+        queue.enqueue(f'job-{i}', f'user_{i % 1_000}')
+        queue.dequeue()
+
+    return roundtrip
+
+
+@case('metrics.record_request')
+def _record_request():
+    store = MetricsStore()
+    statuses = itertools.cycle([200] * 18 + [404, 500])
+    return lambda: store.record_request(42.5, next(statuses))
+
+
+@case('metrics.to_prometheus')
+def _to_prometheus():
+    store = MetricsStore()
+    for i in range(5_000):
+        store.record_request(float(i % 300), 200 if i % 50 else 500)
+        store.record_worker_duration(float(i % 900))
+        store.record_queue_wait('interactive', (i % 120) / 10)
+        store.record_cache('chat_analyze', 'local_hit' if i % 3 else 'miss')
+    return store.to_prometheus
+
+
+@case('logging.json_formatter.format')
+def _json_format():
+    formatter = JsonFormatter()
+    record = logging.LogRecord('app', logging.INFO, __file__, 1, 'request completed', None, None)
+    record.request_id = '5f0c6a2e-9d3b-4c55-8f1e-2b7f0e9c1a44'
+    record.path = '/chat/analyze'
+    record.method = 'POST'
+    record.status_code = 200
+    record.latency_ms = 12.34
+    return lambda: formatter.format(record)
+
+
+def _asgi_call(app, path: str) -> Callable[[], object]:
+    from starlette.responses import PlainTextResponse, StreamingResponse
+
+    async def chunks():
+        for _ in range(16):
+            yield b'x' * 512
+
+    async def endpoint(scope, receive, send):
+        if scope['path'] == '/stream':
+            response = StreamingResponse(chunks(), media_type='application/x-ndjson')
+        else:
+            response = PlainTextResponse('ok')
+        await response(scope, receive, send)
+
+    # request lines have their own case above; here they would only flood stderr
+    app_logger.disabled = True
+    wrapped = app(endpoint)
+    scope = {
+        'type': 'http', 'method': 'GET', 'path': path, 'raw_path': path.encode(), 'query_string': b'',
+        'scheme': 'https', 'headers': [(b'host', b'bench'), (b'x-request-id', b'bench')], 'state': {},
+    }
+
+    async def receive():
+        # StreamingResponse keeps listening for a disconnect; never delivering one mirrors a live client
+        await asyncio.Event().wait()
+
+    async def send(message):
+        pass
+
+    loop = asyncio.new_event_loop()
+    return lambda: loop.run_until_complete(wrapped(dict(scope), receive, send))
+
+
+@case('middleware.asgi.health')
+def _middleware_health():
+    return _asgi_call(RequestContextMiddleware, '/v1/health')
+
+
+@case('middleware.asgi.stream_16_chunks')
+def _middleware_stream():
+    return _asgi_call(RequestContextMiddleware, '/stream')
+
+
+def measure(fn: Callable[[], object], repeat: int, min_time: float) -> dict:
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    # autorange targets 0.2s per run; scale up when a longer sample is requested
+    number = max(1, int(number * max(1.0, min_time / 0.2)))
+    per_op_ns = [elapsed / number * 1e9 for elapsed in timer.repeat(repeat=repeat, number=number)]
+    return {
+        'min_ns': round(min(per_op_ns), 1),
+        'median_ns': round(statistics.median(per_op_ns), 1),
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+def run(names: list[str], repeat: int, min_time: float) -> dict:
+    results = {}
+    for name in names:
+        results[name] = measure(CASES[name](), repeat, min_time)
+        print(f'{name:<40} {_format_ns(results[name]["min_ns"]):>12}/op  (median {_format_ns(results[name]["median_ns"])})')
+    return {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    print(f'\n{"benchmark":<40} {"baseline":>12} {"current":>12} {"change":>8}')
+    for name, result in current['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if previous is None:
+            print(f'{name:<40} {"-":>12} {_format_ns(result["min_ns"]):>12} {"new":>8}')
+            continue
+        # min is the least noisy estimate of the code's own cost on a shared box
+        change = result['min_ns'] / previous['min_ns'] - 1
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f'{name:<40} {_format_ns(previous["min_ns"]):>12} {_format_ns(result["min_ns"]):>12} {change:>+8.1%}{flag}')
+    if baseline.get('machine') != current['machine'] or baseline.get('python') != current['python']:
+        print(f"\nnote: baseline was recorded on {baseline.get('machine')}/python {baseline.get('python')}")
+    return regressions
+
+
+def _format_ns(value: float) -> str:
+    for unit, scale in (('s', 1e9), ('ms', 1e6), ('us', 1e3)):
+        if value >= scale:
+            return f'{value / scale:.2f}{unit}'
+    return f'{value:.0f}ns'
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Microbenchmarks for the request hot path')
+    parser.add_argument('--filter', default='', help='Only run benchmarks whose name contains this text')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2, help='Seconds per timed run')
+    parser.add_argument('--save', type=Path, default=None, help='Write results as a JSON baseline')
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed slowdown before failing (0.25 = 25%%)')
+    parser.add_argument('--no-compare', action='store_true')
+    parser.add_argument('--list', action='store_true', help='List benchmark names and exit')
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if args.list:
+        print('\n'.join(CASES))
+        return 0
+    names = [name for name in CASES if args.filter in name]
+    if not names:
+        print(f'no benchmark matches {args.filter!r}')
+        return 2
+
+    current = run(names, args.repeat, args.min_time)
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(current, indent=2, sort_keys=True) + '\n')
+        print(f'\nsaved results to {args.save}')
+    if args.no_compare or args.save == args.baseline:
+        return 0
+    if not args.baseline.exists():
+        print(f'\nno baseline at {args.baseline}; record one with --save {args.baseline}')
+        return 0
+
+    regressions = compare(current, json.loads(args.baseline.read_text()), args.threshold)
+    if regressions:
+        print(f'\n{len(regressions)} benchmark(s) slower than baseline by more than {args.threshold:.0%}: {", ".join(regressions)}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
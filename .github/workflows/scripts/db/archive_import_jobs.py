@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.archive import archive_completed_jobs, drop_empty_partitions, ensure_partitions
+from app.config import settings
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Archive old completed import jobs and maintain import_jobs partitions')
+    parser.add_argument('--older-than-days', type=int, default=settings.import_archive_after_days)
+    parser.add_argument('--batch-size', type=int, default=settings.import_archive_batch_size)
+    parser.add_argument('--max-batches', type=int, default=None, help='Stop after this many batches')
+    parser.add_argument('--months-ahead', type=int, default=settings.import_partition_months_ahead)
+    parser.add_argument('--skip-partitions', action='store_true', help='Only archive, do not create or drop partitions')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    if not args.skip_partitions:
+        for name in ensure_partitions(args.months_ahead):
+            print(f'created partition {name}')
+
+    archived = archive_completed_jobs(
+        older_than_days=args.older_than_days,
+        batch_size=args.batch_size,
+        max_batches=args.max_batches,
+    )
+    print(f'archived {archived} jobs')
+
+    if not args.skip_partitions:
+        for name in drop_empty_partitions(args.older_than_days):
+            print(f'dropped partition {name}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.config import settings
+from app.srs import build_parameters, reschedule_cards
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Reschedule reviewed SRS cards after a scheduling parameter change')
+    parser.add_argument('--interval-modifier', type=float, required=True, help='New interval modifier (set SRS_INTERVAL_MODIFIER to match afterwards)')
+    parser.add_argument('--previous-interval-modifier', type=float, default=settings.srs_interval_modifier)
+    parser.add_argument('--max-interval-days', type=float, default=settings.srs_max_interval_days)
+    parser.add_argument('--min-ease', type=float, default=settings.srs_min_ease)
+    parser.add_argument('--user-id', default=None, help='Only reschedule this user\'s cards')
+    parser.add_argument('--batch-size', type=int, default=settings.srs_reschedule_batch_size)
+    parser.add_argument('--max-batches', type=int, default=None, help='Stop after this many batches')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    previous = build_parameters(interval_modifier=args.previous_interval_modifier)
+    current = build_parameters(
+        interval_modifier=args.interval_modifier,
+        max_interval_days=args.max_interval_days,
+        min_ease=args.min_ease,
+    )
+    rescheduled = reschedule_cards(
+        previous,
+        current,
+        user_id=args.user_id,
+        batch_size=args.batch_size,
+        max_batches=args.max_batches,
+    )
+    print(f'rescheduled {rescheduled} cards')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+PASSWORD = 'LoadTest123A'
+CHAT_TEXTS = (
+    'maybe later',
+    'can you send me the file by tomorrow',
+    'I will check and get back to you',
+    'sorry for the late reply, the meeting ran long',
+    'would you like to grab coffee this afternoon',
+)
+# one-off setup and batch routes: reported and counted for errors, but not held to the per-request p95 budget
+UNGATED_ROUTES = frozenset({'POST /auth/signup', 'POST /auth/login', 'POST /admin/worker/tick'})
+IMPORT_CONTENT = '\n'.join(
+    f'[Mina] [오후 3:{i:02d}] I would like to book a table for four people tomorrow evening.' for i in range(30)
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Drive app.main:app in-process over ASGI and gate on the latency SLO')
+    parser.add_argument('--users', type=int, default=20, help='Concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds of steady traffic after signup')
+    parser.add_argument('--think-ms', type=float, default=0.0, help='Pause between a user\'s requests')
+    parser.add_argument('--tick-interval', type=float, default=0.5, help='Seconds between worker ticks')
+    parser.add_argument('--p95-ms', type=float, default=None, help='Per-route p95 budget (default: SLO_P95_LATENCY_MS)')
+    parser.add_argument('--max-error-rate', type=float, default=0.005, help='Allowed share of failed requests')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', type=Path, default=None, help='Also write the report as JSON')
+    parser.add_argument('--use-env', action='store_true', help='Keep DATABASE_URL/QUEUE_MODE/REDIS_URL from the environment')
+    return parser.parse_args()
+
+
+def configure_environment(use_env: bool) -> None:
+    # must run before app modules are imported: settings and engines are created at import time
+    if not use_env:
+        os.environ['DATABASE_URL'] = f"sqlite:///{Path(tempfile.mkdtemp(prefix='asgi-load-')) / 'load.db'}"
+        os.environ['QUEUE_MODE'] = 'inmemory'
+        os.environ['REDIS_URL'] = ''
+        os.environ['REPLICA_DATABASE_URLS'] = ''
+    os.environ['ENFORCE_HTTPS'] = 'false'
+    os.environ['ALLOW_SELF_REGISTRATION'] = 'true'
+    # the harness measures request cost, not the per-user limiter
+    os.environ.setdefault('RATE_LIMIT_PER_MINUTE', '1000000')
+    os.environ.setdefault('LOG_SUCCESS_SAMPLE_RATE', '0.0')
+
+
+@dataclass
+class RouteStats:
+    latencies_ms: list[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: dict[int, int] = field(default_factory=lambda: defaultdict(int))
+
+
+class Recorder:
+    def __init__(self):
+        self.routes: dict[str, RouteStats] = defaultdict(RouteStats)
+
+    async def request(self, client, route: str, method: str, url: str, expected: tuple[int, ...] = (200,), **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except Exception:
+            response = None
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        stats = self.routes[route]
+        stats.latencies_ms.append(elapsed_ms)
+        status = response.status_code if response is not None else 0
+        stats.statuses[status] += 1
+        if status not in expected:
+            stats.errors += 1
+        return response
+
+
+class VirtualUser:
+    def __init__(self, index: int, client, recorder: Recorder, rng: random.Random, think_s: float):
+        self.user_id = f'load_{index:05d}'
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.think_s = think_s
+        self.headers: dict[str, str] = {}
+
+    async def start(self) -> bool:
+        credentials = {'user_id': self.user_id, 'password': PASSWORD}
+        await self.recorder.request(
+            self.client, 'POST /auth/signup', 'POST', '/auth/signup', (200, 409), json={**credentials, 'terms_accepted': True}
+        )
+        response = await self.recorder.request(self.client, 'POST /auth/login', 'POST', '/auth/login', json=credentials)
+        if response is None or response.status_code != 200:
+            return False
+        self.headers = {'Authorization': f"Bearer {response.json()['access_token']}"}
+        return True
+
+    async def chat_analyze(self) -> None:
+        body = {'text': self.rng.choice(CHAT_TEXTS), 'tone_preference': self.rng.choice(('business', 'daily'))}
+        await self.recorder.request(self.client, 'POST /chat/analyze', 'POST', '/chat/analyze', headers=self.headers, json=body)
+
+    async def calculate_plan(self) -> None:
+        body = {'goal_type': 'business', 'target_language': 'English', 'minutes_per_day': self.rng.choice((5, 10, 20, 30))}
+        await self.recorder.request(
+            self.client, 'POST /onboarding/calculate-plan', 'POST', '/onboarding/calculate-plan', headers=self.headers, json=body
+        )
+
+    async def public_plan(self) -> None:
+        minutes = self.rng.choice((10, 15, 30))
+        await self.recorder.request(self.client, 'GET /onboarding/plan', 'GET', f'/onboarding/plan?minutes_per_day={minutes}')
+
+    async def import_and_poll(self) -> None:
+        response = await self.recorder.request(
+            self.client, 'POST /import', 'POST', '/import', headers=self.headers, json={'channel': 'daily', 'content': IMPORT_CONTENT}
+        )
+        if response is None or response.status_code != 200:
+            return
+        job_id = response.json()['job_id']
+        for _ in range(3):
+            await asyncio.sleep(0.2)
+            poll = await self.recorder.request(self.client, 'GET /import/{job_id}', 'GET', f'/import/{job_id}', headers=self.headers)
+            if poll is None or poll.status_code != 200 or poll.json()['status'] in ('completed', 'failed'):
+                break
+
+    async def run(self, deadline: float) -> None:
+        actions = (self.chat_analyze, self.calculate_plan, self.public_plan, self.import_and_poll)
+        weights = (6, 2, 2, 1)
+        while time.monotonic() < deadline:
+            await self.rng.choices(actions, weights)[0]()
+            if self.think_s:
+                await asyncio.sleep(self.think_s)
+
+
+async def tick_worker(client, recorder: Recorder, headers: dict[str, str], interval: float, deadline: float) -> None:
+    while time.monotonic() < deadline:
+        await recorder.request(client, 'POST /admin/worker/tick', 'POST', '/admin/worker/tick?max_jobs=50', headers=headers)
+        await asyncio.sleep(interval)
+
+
+async def run_load(args: argparse.Namespace) -> tuple[Recorder, float]:
+    import httpx
+
+    from app.db import UserRoleRecord, get_session
+    from app.main import app
+    from app.observability import app_logger
+
+    # per-job worker logs would drown the report; warnings and errors still come through
+    app_logger.setLevel(logging.WARNING)
+
+    recorder = Recorder()
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://loadtest', timeout=30.0) as client:
+            admin = VirtualUser(0, client, recorder, random.Random(args.seed), 0.0)
+            admin.user_id = 'load_admin'
+            with get_session() as session:
+                if not session.get(UserRoleRecord, admin.user_id):
+                    session.add(UserRoleRecord(user_id=admin.user_id, role='admin'))
+            if not await admin.start():
+                raise RuntimeError('admin login failed')
+
+            users = [VirtualUser(i + 1, client, recorder, random.Random(args.seed + i + 1), args.think_ms / 1000) for i in range(args.users)]
+            started = await asyncio.gather(*(user.start() for user in users))
+            users = [user for user, ok in zip(users, started) if ok]
+
+            began = time.monotonic()
+            deadline = began + args.duration
+            await asyncio.gather(
+                tick_worker(client, recorder, admin.headers, args.tick_interval, deadline),
+                *(user.run(deadline) for user in users),
+            )
+            elapsed = time.monotonic() - began
+    return recorder, elapsed
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    return statistics.quantiles(sorted_values, n=100, method='inclusive')[pct - 1]
+
+
+def build_report(recorder: Recorder, elapsed: float, p95_budget_ms: float, max_error_rate: float) -> dict:
+    routes = {}
+    total = errors = 0
+    for route, stats in sorted(recorder.routes.items()):
+        values = sorted(stats.latencies_ms)
+        total += len(values)
+        errors += stats.errors
+        routes[route] = {
+            'requests': len(values),
+            'errors': stats.errors,
+            'rps': round(len(values) / elapsed, 1) if elapsed else 0.0,
+            'p50_ms': round(_percentile(values, 50), 2),
+            'p95_ms': round(_percentile(values, 95), 2),
+            'p99_ms': round(_percentile(values, 99), 2),
+            'statuses': dict(sorted(stats.statuses.items())),
+            'gated': route not in UNGATED_ROUTES,
+        }
+    error_rate = errors / total if total else 0.0
+    breaches = [
+        f"{route}: p95 {data['p95_ms']}ms > {p95_budget_ms}ms"
+        for route, data in routes.items()
+        if data['gated'] and data['p95_ms'] > p95_budget_ms
+    ]
+    if error_rate > max_error_rate:
+        breaches.append(f'error rate {error_rate:.2%} > {max_error_rate:.2%}')
+    return {
+        'duration_seconds': round(elapsed, 2),
+        'requests': total,
+        'errors': errors,
+        'error_rate': round(error_rate, 5),
+        'throughput_rps': round(total / elapsed, 1) if elapsed else 0.0,
+        'p95_budget_ms': p95_budget_ms,
+        'routes': routes,
+        'breaches': breaches,
+    }
+
+
+def print_report(report: dict) -> None:
+    print(f"\n{'route':<34} {'reqs':>7} {'err':>5} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for route, data in report['routes'].items():
+        print(
+            f"{route:<34} {data['requests']:>7} {data['errors']:>5} {data['rps']:>8} "
+            f"{data['p50_ms']:>8.1f}ms {data['p95_ms']:>7.1f}ms {data['p99_ms']:>7.1f}ms"
+            f"{'' if data['gated'] else '  (not gated)'}"
+        )
+    print(
+        f"\n{report['requests']} requests in {report['duration_seconds']}s ({report['throughput_rps']} rps), "
+        f"error rate {report['error_rate']:.2%}, p95 budget {report['p95_budget_ms']}ms"
+    )
+    for breach in report['breaches']:
+        print(f'SLO BREACH {breach}')
+
+
+def main() -> int:
+    args = parse_args()
+    configure_environment(args.use_env)
+    from app.config import settings
+
+    p95_budget_ms = args.p95_ms if args.p95_ms is not None else float(settings.slo_p95_latency_ms)
+    recorder, elapsed = asyncio.run(run_load(args))
+    report = build_report(recorder, elapsed, p95_budget_ms, args.max_error_rate)
+    print_report(report)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2) + '\n')
+    return 1 if report['breaches'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
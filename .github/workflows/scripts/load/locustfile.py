@@ -1,11 +1,18 @@
+from uuid import uuid4
+
 from locust import HttpUser, between, task
 
+PASSWORD = 'LoadTest123A'
+
 
 class ApiUser(HttpUser):
     wait_time = between(1, 2)
 
     def on_start(self):
-        res = self.client.post('/auth/login', json={'user_id': 'load_user'})
+        # needs ALLOW_SELF_REGISTRATION=true on the target; each simulated user gets its own account
+        credentials = {'user_id': f'load_{uuid4().hex[:12]}', 'password': PASSWORD}
+        self.client.post('/auth/signup', json={**credentials, 'terms_accepted': True})
+        res = self.client.post('/auth/login', json=credentials)
         token = res.json()['access_token']
         self.headers = {'Authorization': f'Bearer {token}'}
 
@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import json
+import re
+import statistics
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+PASSWORD = 'ReplayUser123A'
+# credentials are redacted in captures, and admin routes need roles the replay accounts do not have
+SKIPPED_PREFIXES = ('/auth/', '/admin/')
+_PATH_PARAM = re.compile(r'\{(\w+)\}')
+
+
+def load_trace(path: Path, limit: int | None = None) -> list[dict]:
+    opener = gzip.open if path.suffix == '.gz' else open
+    records = []
+    with opener(path, 'rt', encoding='utf-8') as handle:
+        for line in handle:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+            if limit is not None and len(records) >= limit:
+                break
+    records.sort(key=lambda record: record['ts'])
+    return records
+
+
+def _percentile(sorted_values: list[float], pct: int) -> float:
+    if not sorted_values:
+        return 0.0
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    return statistics.quantiles(sorted_values, n=100, method='inclusive')[pct - 1]
+
+
+class Replayer:
+    def __init__(self, client, records: list[dict], speed: float):
+        self.client = client
+        self.records = records
+        self.speed = speed
+        self.headers: dict[str, dict[str, str]] = {}
+        # ids returned to each user during the replay (job_id, card_id, ...) stand in for the captured ones
+        self.learned_ids: dict[str, dict[str, str]] = defaultdict(dict)
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.status_changed: dict[str, int] = defaultdict(int)
+        self.lag_ms: list[float] = []
+        self.skipped: dict[str, int] = defaultdict(int)
+
+    async def login(self, pseudonym: str) -> None:
+        credentials = {'user_id': f'replay_{pseudonym}', 'password': PASSWORD}
+        await self.client.post('/auth/signup', json={**credentials, 'terms_accepted': True})
+        response = await self.client.post('/auth/login', json=credentials)
+        response.raise_for_status()
+        self.headers[pseudonym] = {'Authorization': f"Bearer {response.json()['access_token']}"}
+
+    def _path(self, record: dict) -> str:
+        user = record.get('user')
+        learned = self.learned_ids.get(user, {}) if user else {}
+        route = record['route']
+        if learned and _PATH_PARAM.search(route):
+            path = _PATH_PARAM.sub(lambda match: learned.get(match.group(1), match.group(0)), route)
+            if '{' not in path:
+                return path
+        return record['path']
+
+    async def send(self, record: dict) -> None:
+        route = f"{record['method']} {record['route']}"
+        if record['req_bytes'] and 'body' not in record:
+            # the body was too large or not JSON, so there is nothing faithful to send
+            self.skipped[f'{route} (no body)'] += 1
+            return
+        user = record.get('user')
+        path = self._path(record)
+        if record.get('query'):
+            path = f"{path}?{record['query']}"
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(
+                record['method'], path, headers=self.headers.get(user, {}), json=record.get('body')
+            )
+            status = response.status_code
+        except Exception:
+            response, status = None, 0
+        self.latencies[route].append((time.perf_counter() - started) * 1000)
+        if status == 0 or status >= 500:
+            self.errors[route] += 1
+        if status != record['status']:
+            self.status_changed[route] += 1
+        if user and response is not None and 'application/json' in response.headers.get('content-type', ''):
+            try:
+                payload = response.json()
+            except ValueError:
+                payload = None
+            if isinstance(payload, dict):
+                self.learned_ids[user].update(
+                    (key, value) for key, value in payload.items() if key.endswith('_id') and isinstance(value, str)
+                )
+
+    async def _play(self, records: list[dict], origin: float, start: float) -> None:
+        # records of one user run strictly in order: a request never starts before the previous one finished
+        for record in records:
+            due = start + (record['ts'] - origin) / self.speed
+            delay = due - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                self.lag_ms.append(-delay * 1000)
+            await self.send(record)
+
+    async def run(self) -> float:
+        playable = []
+        for record in self.records:
+            if record['route'].startswith(SKIPPED_PREFIXES):
+                self.skipped[f"{record['method']} {record['route']}"] += 1
+            else:
+                playable.append(record)
+        if not playable:
+            return 0.0
+
+        users = sorted({record['user'] for record in playable if record.get('user')})
+        await asyncio.gather(*(self.login(user) for user in users))
+
+        per_user: dict[str, list[dict]] = defaultdict(list)
+        anonymous = []
+        for record in playable:
+            if record.get('user'):
+                per_user[record['user']].append(record)
+            else:
+                anonymous.append([record])
+
+        origin = playable[0]['ts']
+        start = time.monotonic()
+        await asyncio.gather(*(self._play(records, origin, start) for records in [*per_user.values(), *anonymous]))
+        return time.monotonic() - start
+
+    def report(self, elapsed: float) -> dict:
+        routes = {}
+        for route, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            routes[route] = {
+                'requests': len(values),
+                'errors': self.errors[route],
+                'status_changed': self.status_changed[route],
+                'p50_ms': round(_percentile(values, 50), 2),
+                'p95_ms': round(_percentile(values, 95), 2),
+                'p99_ms': round(_percentile(values, 99), 2),
+            }
+        lag = sorted(self.lag_ms)
+        return {
+            'speed': self.speed,
+            'elapsed_seconds': round(elapsed, 2),
+            'requests': sum(data['requests'] for data in routes.values()),
+            'late_requests': len(lag),
+            'late_p95_ms': round(_percentile(lag, 95), 2),
+            'skipped': dict(sorted(self.skipped.items())),
+            'routes': routes,
+        }
+
+
+async def replay(args: argparse.Namespace) -> dict:
+    import httpx
+
+    records = load_trace(args.trace, args.limit)
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    async with httpx.AsyncClient(base_url=args.target, timeout=args.timeout, limits=limits) as client:
+        replayer = Replayer(client, records, args.speed)
+        elapsed = await replayer.run()
+    return replayer.report(elapsed)
+
+
+def print_report(report: dict) -> None:
+    print(f"\n{'route':<40} {'reqs':>6} {'err':>5} {'Δstatus':>8} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for route, data in report['routes'].items():
+        print(
+            f"{route:<40} {data['requests']:>6} {data['errors']:>5} {data['status_changed']:>8} "
+            f"{data['p50_ms']:>7.1f}ms {data['p95_ms']:>7.1f}ms {data['p99_ms']:>7.1f}ms"
+        )
+    print(f"\n{report['requests']} requests replayed at {report['speed']}x in {report['elapsed_seconds']}s")
+    if report['late_requests']:
+        # the replayer itself could not keep up; latencies at this speed are pessimistic
+        print(f"{report['late_requests']} requests started behind schedule (p95 {report['late_p95_ms']}ms)")
+    for route, count in report['skipped'].items():
+        print(f'skipped {count:>6}  {route}')
+
+
+def diff_reports(before: dict, after: dict, threshold: float) -> list[str]:
+    regressions = []
+    print(f"\n{'route':<40} {'p50 before':>11} {'p50 after':>10} {'p95 before':>11} {'p95 after':>10} {'Δp95':>8}")
+    for route in sorted(set(before['routes']) | set(after['routes'])):
+        old, new = before['routes'].get(route), after['routes'].get(route)
+        if old is None or new is None:
+            print(f"{route:<40} {'only in ' + ('after' if old is None else 'before'):>54}")
+            continue
+        change = new['p95_ms'] / old['p95_ms'] - 1 if old['p95_ms'] else 0.0
+        flag = ''
+        if change > threshold:
+            regressions.append(route)
+            flag = '  REGRESSION'
+        print(
+            f"{route:<40} {old['p50_ms']:>9.1f}ms {new['p50_ms']:>8.1f}ms {old['p95_ms']:>9.1f}ms {new['p95_ms']:>8.1f}ms "
+            f"{change:>+8.1%}{flag}"
+        )
+    return regressions
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Replay captured production traffic and compare builds')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run = sub.add_parser('replay', help='Re-issue a capture against a running instance (needs ALLOW_SELF_REGISTRATION=true)')
+    run.add_argument('trace', type=Path, help='NDJSON capture, optionally .gz')
+    run.add_argument('--target', default='http://localhost:8000')
+    run.add_argument('--speed', type=float, default=1.0, help='Time compression, 1 to 50')
+    run.add_argument('--limit', type=int, default=None, help='Only replay the first N records')
+    run.add_argument('--max-connections', type=int, default=100)
+    run.add_argument('--timeout', type=float, default=30.0)
+    run.add_argument('--out', type=Path, default=None, help='Write the report as JSON (input for diff)')
+
+    diff = sub.add_parser('diff', help='Compare two replay reports, e.g. before and after a change')
+    diff.add_argument('before', type=Path)
+    diff.add_argument('after', type=Path)
+    diff.add_argument('--threshold', type=float, default=0.2, help='p95 slowdown that fails the diff (0.2 = 20%%)')
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if args.command == 'diff':
+        regressions = diff_reports(json.loads(args.before.read_text()), json.loads(args.after.read_text()), args.threshold)
+        if regressions:
+            print(f'\np95 regressed by more than {args.threshold:.0%} on: {", ".join(regressions)}')
+            return 1
+        return 0
+
+    if not 1.0 <= args.speed <= 50.0:
+        print('--speed must be between 1 and 50')
+        return 2
+    report = asyncio.run(replay(args))
+    print_report(report)
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2) + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
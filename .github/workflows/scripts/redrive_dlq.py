@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.config import settings
+from app.dlq import list_dead_letters, redrive_dead_letters, summarize_dead_letters
+from app.queue import build_queue
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Inspect and redrive the import dead-letter queue')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    show = sub.add_parser('list', help='Page through dead letters with their last error')
+    show.add_argument('--after', type=float, default=None, help='Cursor printed by a previous page')
+    show.add_argument('--limit', type=int, default=50)
+
+    summary = sub.add_parser('summary', help='Group dead letters by error signature')
+    summary.add_argument('--scan-limit', type=int, default=100_000)
+
+    redrive = sub.add_parser('redrive', help='Move dead letters back onto the main queue')
+    redrive.add_argument('--signature', default=None, help='Signature text or signature id from `summary`')
+    redrive.add_argument('--limit', type=int, default=None, help='Stop after this many jobs')
+    redrive.add_argument('--after', type=float, default=None, help='Resume from a cursor printed by an earlier run')
+    redrive.add_argument('--batch-size', type=int, default=settings.dlq_redrive_batch_size)
+    redrive.add_argument('--rate', type=float, default=settings.dlq_redrive_rate_per_second, help='Jobs per second')
+    redrive.add_argument('--max-main-depth', type=int, default=settings.dlq_redrive_max_main_depth, help='Pause while the main queue is deeper than this')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    queue = build_queue()
+
+    if args.command == 'list':
+        letters, next_cursor = list_dead_letters(queue, after=args.after, limit=args.limit)
+        for letter in letters:
+            print(f'{letter.entry.job_id}\t{letter.entry.user_id}\t{letter.status}\t{letter.signature_id}\t{letter.last_error}')
+        print(f'next cursor: {next_cursor}')
+    elif args.command == 'summary':
+        for group in summarize_dead_letters(queue, scan_limit=args.scan_limit):
+            print(f"{group['count']:>8}  {group['signature_id']}  {group['signature']}")
+    else:
+        result = redrive_dead_letters(
+            queue,
+            signature=args.signature,
+            limit=args.limit,
+            batch_size=args.batch_size,
+            rate_per_second=args.rate,
+            max_main_depth=args.max_main_depth,
+            after=args.after,
+            on_batch=lambda progress: print(
+                f'redriven={progress.redriven} scanned={progress.scanned} cursor={progress.cursor}', flush=True
+            ),
+        )
+        print(f'redrive {"complete" if result.done else "stopped"}: {result.redriven} jobs, resume with --after {result.cursor}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,17 @@
-from sqlalchemy import create_engine, text
-
 from app.config import settings
+from app.db import EngineRegistry, verify_engine
 
 
 def main() -> None:
     target = settings.production_database_url or settings.database_url
-    engine = create_engine(target, future=True)
-    with engine.connect() as conn:
-        conn.execute(text('SELECT 1'))
-    print('db connection ok')
+    registry = EngineRegistry(max_engines=1, pool_size=1)
+    try:
+        result = verify_engine(registry.get('verify', target))
+    finally:
+        registry.dispose_all()
+    if result['status'] != 'ok':
+        raise SystemExit(f"db connection failed: {result['error']}")
+    print(f"db connection ok (server {result['server_version']}, connect {result['connect_ms']} ms)")
 
 
 if __name__ == '__main__':
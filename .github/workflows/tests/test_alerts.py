@@ -0,0 +1,54 @@
+import threading
+import time
+
+from app.alerts import AlertClient, AlertDispatcher
+from app.observability import metrics
+
+
+def test_notify_error_does_not_block_and_coalesces_by_title():
+    release = threading.Event()
+    delivered = []
+
+    def slow_deliver(alert):
+        release.wait(2)
+        delivered.append((alert.sink, alert.title, alert.occurrences))
+
+    dispatcher = AlertDispatcher(slow_deliver, coalesce_window_seconds=60)
+    client = AlertClient('http://slack.invalid/hook', None, dispatcher=dispatcher)
+
+    started = time.monotonic()
+    client.notify_error('api_exception', 'first')
+    for i in range(5):
+        client.notify_error('api_exception', f'again {i}')
+    assert time.monotonic() - started < 0.5
+    release.set()
+    assert dispatcher.close(timeout=2)
+
+    assert {(sink, title) for sink, title, _ in delivered} == {('slack', 'api_exception')}
+    assert sum(count for _, _, count in delivered) == 6
+    assert len(delivered) <= 2
+
+
+def test_bounded_queue_drops_and_failed_deliveries_retry():
+    before = dict(metrics.snapshot()['alerts'])
+    attempts = []
+
+    def flaky_deliver(alert):
+        attempts.append(alert.attempts)
+        if len(attempts) == 1:
+            raise RuntimeError('webhook down')
+
+    dispatcher = AlertDispatcher(flaky_deliver, max_pending=1, retry_backoff_seconds=0.01)
+    with dispatcher._cond:
+        assert dispatcher.submit('slack', 'a', 'x')
+        assert not dispatcher.submit('slack', 'b', 'y')
+    deadline = time.monotonic() + 2
+    while dispatcher.pending_count() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert dispatcher.close(timeout=2)
+    assert attempts == [0, 1]
+
+    after = metrics.snapshot()['alerts']
+    assert after['dropped'] - before['dropped'] == 1
+    assert after['retried'] - before['retried'] == 1
+    assert after['sent'] - before['sent'] == 1
@@ -0,0 +1,45 @@
+import threading
+import time
+
+import pytest
+
+from app.analysis import EngineTimeout, LocalRewriteEngine, MicroBatcher
+
+
+class RecordingEngine(LocalRewriteEngine):
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.batch_sizes = []
+
+    def analyze_batch(self, items):
+        self.batch_sizes.append(len(items))
+        time.sleep(self.delay)
+        return super().analyze_batch(items)
+
+
+def test_concurrent_requests_are_grouped_into_batches():
+    engine = RecordingEngine(delay=0.01)
+    batcher = MicroBatcher(engine, max_batch_size=16, max_wait_ms=20, max_concurrency=1)
+    results = []
+
+    def call(i):
+        results.append(batcher.analyze(f'thanks {i}', 'daily', timeout=2))
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(32)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    batcher.close()
+
+    assert len(results) == 32
+    assert results[0][0] == ('daily', 'Thanks a lot!')
+    assert sum(engine.batch_sizes) == 32
+    assert len(engine.batch_sizes) < 32
+
+
+def test_slow_engine_times_out_per_request():
+    batcher = MicroBatcher(RecordingEngine(delay=0.2), max_wait_ms=0)
+    with pytest.raises(EngineTimeout):
+        batcher.analyze('sorry', 'business', timeout=0.05)
+    batcher.close()
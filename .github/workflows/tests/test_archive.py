@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from app.archive import archive_completed_jobs
+from app.db import ImportJobArchiveRecord, ImportJobRecord, get_session
+
+
+def _job(user_id, status, age_days):
+    created_at = datetime.now(timezone.utc) - timedelta(days=age_days)
+    return ImportJobRecord(
+        job_id=str(uuid4()),
+        user_id=user_id,
+        status=status,
+        progress_percent=100 if status == 'completed' else 0,
+        channel='daily',
+        content_sha256='0' * 64,
+        content_preview_masked='',
+        created_at=created_at,
+        updated_at=created_at,
+    )
+
+
+def test_archives_only_old_completed_jobs_in_batches():
+    user_id = f'archive-{uuid4().hex[:8]}'
+    jobs = [_job(user_id, 'completed', 90) for _ in range(3)] + [_job(user_id, 'completed', 1), _job(user_id, 'failed', 90)]
+    ids = [job.job_id for job in jobs]
+    with get_session() as session:
+        session.add_all(jobs)
+
+    assert archive_completed_jobs(older_than_days=30, batch_size=2) >= 3
+
+    with get_session() as session:
+        hot = {r.job_id for r in session.query(ImportJobRecord).filter_by(user_id=user_id)}
+        archived = session.query(ImportJobArchiveRecord).filter_by(user_id=user_id).all()
+        assert hot == {ids[3], ids[4]}
+        assert {r.job_id for r in archived} == set(ids[:3])
+        assert all(r.progress_percent == 100 and r.archived_at for r in archived)
+
+
+def test_job_model_matches_the_partitioned_schema():
+    # migration 0006 keys the partitioned Postgres table on (job_id, created_at) and drops the created_at index
+    table = ImportJobRecord.__table__
+    assert [column.name for column in table.primary_key.columns] == ['job_id', 'created_at']
+    assert 'ix_import_jobs_created_at' not in {index.name for index in table.indexes}
+    with get_session() as session:
+        job = _job('pk-user', 'queued', 0)
+        session.add(job)
+        session.flush()
+        assert session.get(ImportJobRecord, job.job_id) is job
@@ -0,0 +1,34 @@
+from app.autoscale import ConcurrencyController
+from app.queue import QueueMetrics
+
+
+def _metrics(depth, oldest=0):
+    return QueueMetrics(main_depth=depth, dlq_depth=0, oldest_job_age_seconds=oldest)
+
+
+def test_scales_with_littles_law_and_caps_at_limits():
+    controller = ConcurrencyController(max_concurrency=8, max_workers=5, target_wait_seconds=60, default_job_seconds=2.0)
+    assert controller.update(_metrics(0), now=0).concurrency == 1
+
+    # 600 jobs in 60s at 2s each needs 20 slots: 8 locally, 3 containers of 8
+    decision = controller.update(_metrics(600), now=1)
+    assert (decision.required_slots, decision.concurrency, decision.desired_workers) == (20.0, 8, 3)
+
+    controller.observe_duration(10.0)
+    assert controller.update(_metrics(600, oldest=600), now=2).desired_workers == 5
+
+
+def test_scale_down_waits_for_the_stabilization_window():
+    controller = ConcurrencyController(max_concurrency=4, target_wait_seconds=10, default_job_seconds=1.0, scale_down_window_seconds=60)
+    assert controller.update(_metrics(40), now=0).concurrency == 4
+
+    assert controller.update(_metrics(0), now=30).concurrency == 4
+    assert controller.update(_metrics(0), now=61).concurrency == 1
+
+
+def test_small_changes_inside_tolerance_are_ignored():
+    controller = ConcurrencyController(max_concurrency=100, target_wait_seconds=1, default_job_seconds=1.0, tolerance=0.1, scale_down_window_seconds=0)
+    assert controller.update(_metrics(20), now=0).concurrency == 20
+    assert controller.update(_metrics(21), now=1).concurrency == 20
+    assert controller.update(_metrics(19), now=2).concurrency == 20
+    assert controller.update(_metrics(30), now=3).concurrency == 30
@@ -0,0 +1,44 @@
+import time
+
+from app.cache import ResponseCache, TTLCache, cache_key, normalize_text
+from app.observability import metrics
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+def test_ttl_cache_evicts_by_size_and_expiry():
+    cache = TTLCache(max_entries=10, max_bytes=10, ttl_seconds=0.05)
+    cache.set('a', b'12345')
+    cache.set('b', b'12345')
+    assert cache.get('a') == b'12345'
+    cache.set('c', b'123')
+    assert cache.get('b') is None
+    assert cache.size_bytes <= 10
+
+    time.sleep(0.06)
+    assert cache.get('a') is None
+
+
+def test_shared_tier_fills_local_cache_and_counts_hits():
+    shared = FakeRedis()
+    writer = ResponseCache('test_tiers', TTLCache(), shared)
+    reader = ResponseCache('test_tiers', TTLCache(), shared)
+    key = cache_key('v1', 'business', normalize_text('  Maybe   LATER '))
+    assert key == cache_key('v1', 'business', normalize_text('maybe later'))
+
+    writer.get_or_compute(key, lambda: b'[]')
+    assert reader.get(key) == b'[]'
+    assert reader.get(key) == b'[]'
+
+    stats = metrics.cache_stats()['test_tiers']
+    assert (stats['miss'], stats['redis_hit'], stats['local_hit']) == (1, 1, 1)
+    assert stats['hit_ratio'] == round(2 / 3, 4)
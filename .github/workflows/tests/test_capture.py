@@ -0,0 +1,46 @@
+import gzip
+import json
+
+from fastapi.testclient import TestClient
+
+from app import main, middleware
+from app.capture import TrafficCapture, build_record, pseudonymize
+from app.config import settings
+from app.security import create_access_token
+
+
+def test_record_masks_pii_and_redacts_credentials():
+    token = create_access_token('capture_user')
+    body = json.dumps({'user_id': 'capture_user', 'password': 'Secret123A', 'content': 'call 010-1234-5678 or a@b.com'}).encode()
+    record = build_record(1.5, 'POST', '/import', '/import', 'email=a@b.com', 200, 12.345, body, 42, f'Bearer {token}')
+
+    assert record['body']['password'] == '<redacted>'
+    # the login id in the body maps to the same pseudonym as the token, never to the raw id
+    assert record['body']['user_id'] != 'capture_user'
+    assert record['body']['user_id'] == record['user']
+    assert '010-1234-5678' not in record['body']['content'] and 'a@b.com' not in record['body']['content']
+    assert 'a@b.com' not in record['query']
+    assert record['req_bytes'] == len(body) and record['resp_bytes'] == 42 and record['ms'] == 12.35
+    assert record['user'] == pseudonymize(f'Bearer {create_access_token("capture_user")}', settings.jwt_secret)
+    assert 'capture_user' not in record['user']
+
+
+def test_oversized_or_non_json_bodies_keep_only_their_size():
+    record = build_record(1.0, 'POST', '/import', None, '', 413, 1.0, b'x' * (settings.traffic_capture_max_body_bytes + 1), None, None)
+    assert 'body' not in record and 'user' not in record
+    assert record['route'] == '/import'
+
+
+def test_middleware_writes_sampled_requests_with_route_templates(tmp_path, monkeypatch):
+    capture = TrafficCapture(str(tmp_path / 'trace.ndjson.gz'), sample_rate=1.0)
+    monkeypatch.setattr(middleware, 'traffic_capture', capture)
+    client = TestClient(main.app)
+
+    assert client.get('/onboarding/plan?minutes_per_day=10').status_code == 200
+    assert client.get('/import/not-a-job').status_code in (401, 403)
+    capture.close()
+
+    with gzip.open(tmp_path / 'trace.ndjson.gz', 'rt') as handle:
+        records = [json.loads(line) for line in handle]
+    assert [record['route'] for record in records] == ['/onboarding/plan', '/import/{job_id}']
+    assert records[0]['query'] == 'minutes_per_day=10' and records[0]['status'] == 200
@@ -0,0 +1,53 @@
+import threading
+import time
+
+from app import main
+from app.config import settings
+from app.db import EngineRegistry, verify_engine
+
+
+def test_registry_reuses_engines_and_evicts_oldest(tmp_path):
+    registry = EngineRegistry(max_engines=2, pool_size=1)
+    url_a = f'sqlite:///{tmp_path}/a.db'
+    first = registry.get('production', url_a)
+    assert registry.get('production', url_a) is first
+
+    registry.get('replica_0', f'sqlite:///{tmp_path}/b.db')
+    registry.get('analytics', f'sqlite:///{tmp_path}/c.db')
+    assert registry.names() == ['replica_0', 'analytics']
+    registry.dispose_all()
+
+
+def test_verify_engine_reports_latency_and_version(tmp_path):
+    registry = EngineRegistry(pool_size=1)
+    result = verify_engine(registry.get('production', f'sqlite:///{tmp_path}/prod.db'))
+    registry.dispose_all()
+
+    assert result['status'] == 'ok'
+    assert result['server_version']
+    assert result['connect_ms'] >= 0
+    assert 'checked_out' in result['pool']
+
+
+def test_verify_production_returns_at_the_deadline_and_reports_bad_urls(monkeypatch, tmp_path):
+    release = threading.Event()
+    real_verify = main.verify_engine
+
+    def verify(engine):
+        if engine.url.database.endswith('hung.db'):
+            release.wait(5)
+        return real_verify(engine)
+
+    targets = {'production': f'sqlite:///{tmp_path}/hung.db', 'replica_0': 'not a url'}
+    monkeypatch.setattr(main, 'secondary_database_targets', lambda: targets)
+    monkeypatch.setattr(main, 'verify_engine', verify)
+    monkeypatch.setattr(settings, 'db_verify_timeout_seconds', 0.2)
+
+    started = time.monotonic()
+    result = main.verify_production_db('admin')
+    release.set()
+
+    assert time.monotonic() - started < 1
+    assert result['status'] == 'error'
+    assert result['targets']['production'] == {'status': 'timeout'}
+    assert result['targets']['replica_0']['status'] == 'error'
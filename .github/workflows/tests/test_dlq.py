@@ -0,0 +1,86 @@
+import time
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from app import main
+from app.config import settings
+from app.db import ImportJobRecord, get_session
+from app.dlq import error_signature, redrive_dead_letters, summarize_dead_letters
+from app.queue import InMemoryQueue
+from app.schemas import RedriveRequest
+
+
+def _failed_job(user_id, error):
+    now = datetime.now(timezone.utc)
+    job_id = str(uuid4())
+    with get_session() as session:
+        session.add(ImportJobRecord(
+            job_id=job_id,
+            user_id=user_id,
+            status='failed',
+            attempts=3,
+            channel='daily',
+            content_sha256='0' * 64,
+            content_preview_masked='',
+            last_error=error,
+            created_at=now,
+            updated_at=now,
+        ))
+    return job_id
+
+
+def test_error_signature_ignores_ids_and_numbers():
+    first = error_signature(f'timeout after 30s fetching job {uuid4()}')
+    second = error_signature(f'timeout after 12s fetching job {uuid4()}')
+    assert first == second == 'timeout after <n>s fetching job <id>'
+
+
+def test_redrive_by_signature_is_batched_and_resumable():
+    queue = InMemoryQueue({'interactive': 1})
+    timeouts = [_failed_job('dlq-user', f'timeout after {i}s') for i in range(5)]
+    parse_error = _failed_job('dlq-user', 'unexpected token')
+    for job_id in [*timeouts, parse_error]:
+        queue.enqueue_dead_letter(job_id)
+
+    groups = {group['signature']: group['count'] for group in summarize_dead_letters(queue)}
+    assert groups == {'timeout after <n>s': 5, 'unexpected token': 1}
+
+    sleeps = []
+    first = redrive_dead_letters(queue, signature='timeout after <n>s', limit=3, batch_size=2, rate_per_second=100, max_main_depth=0, sleep=sleeps.append)
+    assert first.redriven == 3 and not first.done
+    assert sleeps
+
+    rest = redrive_dead_letters(queue, signature='timeout after <n>s', batch_size=2, max_main_depth=0, after=first.cursor, sleep=sleeps.append)
+    assert rest.redriven == 2 and rest.done
+
+    assert [entry.job_id for entry in queue.dead_letters()] == [parse_error]
+    assert queue.metrics().main_depth == 5
+    with get_session() as session:
+        statuses = {session.get(ImportJobRecord, job_id).status for job_id in timeouts}
+        assert statuses == {'queued'}
+
+
+def test_redrive_endpoint_refuses_a_busy_queue_and_does_not_pace(monkeypatch):
+    queue = InMemoryQueue()
+    user_id = f'endpoint-{uuid4().hex[:8]}'
+    for _ in range(3):
+        queue.enqueue_dead_letter(_failed_job(user_id, 'boom'), user_id)
+    monkeypatch.setattr(main, 'queue', queue)
+    monkeypatch.setattr(settings, 'dlq_redrive_rate_per_second', 0.5)
+    monkeypatch.setattr(settings, 'dlq_redrive_max_main_depth', 2)
+
+    queue.enqueue('busy-1')
+    queue.enqueue('busy-2')
+    with pytest.raises(HTTPException) as busy:
+        main.redrive_dlq(RedriveRequest(signature='boom'), 'admin')
+    assert busy.value.status_code == 429
+
+    queue.dequeue()
+    queue.dequeue()
+    started = time.monotonic()
+    result = main.redrive_dlq(RedriveRequest(signature='boom'), 'admin')
+    assert result.redriven == 3 and result.done
+    assert time.monotonic() - started < 1
@@ -0,0 +1,68 @@
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.db import ImportItemRecord, ImportJobArchiveRecord, ImportJobRecord, get_session
+from app.export import export_imports, gzip_stream
+from app.main import app
+from app.security import create_access_token
+
+
+def _seed(user_id: str, jobs: int, items_per_job: int) -> None:
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    with get_session() as session:
+        for index in range(jobs):
+            job_id = f'{user_id}-{index:03d}'
+            # pairs of jobs share a timestamp, so windows have to break ties on job_id
+            created_at = base + timedelta(minutes=index // 2)
+            session.add(ImportJobRecord(
+                job_id=job_id, user_id=user_id, status='completed', progress_percent=100, attempts=1, channel='daily',
+                content_sha256='0' * 64, content_preview_masked='hello', created_at=created_at, updated_at=created_at,
+            ))
+            for item in range(items_per_job):
+                session.add(ImportItemRecord(job_id=job_id, user_id=user_id, kind='word', text=f'w{item}', occurrences=item + 1))
+        session.add(ImportJobArchiveRecord(
+            job_id=f'{user_id}-old', user_id=user_id, status='completed', channel='daily', attempts=1,
+            created_at=base - timedelta(days=90), updated_at=base - timedelta(days=90),
+        ))
+
+
+def test_export_windows_cover_every_row_exactly_once():
+    user_id = f'export_{uuid4().hex[:8]}'
+    _seed(user_id, jobs=7, items_per_job=3)
+    _seed(f'{user_id}_other', jobs=2, items_per_job=1)
+
+    lines = [json.loads(line) for line in b''.join(export_imports(user_id, window_rows=2, yield_per=1)).splitlines()]
+
+    assert lines[0]['type'] == 'export' and lines[0]['user_id'] == user_id
+    jobs = [line for line in lines if line['type'] == 'job']
+    items = [line for line in lines if line['type'] == 'item']
+    assert sorted(job['job_id'] for job in jobs) == sorted([f'{user_id}-{i:03d}' for i in range(7)] + [f'{user_id}-old'])
+    assert len(items) == 21 and len({item['id'] for item in items}) == 21
+    assert all(item['job_id'].startswith(user_id + '-') for item in items)
+
+
+def test_export_endpoint_streams_plain_and_gzip():
+    user_id = f'export_{uuid4().hex[:8]}'
+    _seed(user_id, jobs=2, items_per_job=1)
+    client = TestClient(app)
+    headers = {'Authorization': f'Bearer {create_access_token(user_id)}'}
+
+    plain = client.get('/me/export', headers=headers)
+    assert plain.status_code == 200
+    assert plain.headers['content-type'] == 'application/x-ndjson'
+    # header, two jobs plus the archived one, two items
+    assert len(plain.content.splitlines()) == 1 + 3 + 2
+
+    packed = client.get('/me/export?compress=true', headers=headers)
+    assert packed.headers['content-type'] == 'application/gzip'
+    assert gzip.decompress(packed.content).splitlines()[1:] == plain.content.splitlines()[1:]
+
+
+def test_gzip_stream_is_a_complete_gzip_file():
+    chunks = [b'{"a":1}\n' * 100, b'', b'{"b":2}\n']
+    assert gzip.decompress(b''.join(gzip_stream(iter(chunks), settings.export_gzip_level))) == b''.join(chunks)
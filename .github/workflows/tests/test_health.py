@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from app.health import HealthMonitor
+
+
+def test_ready_serves_cached_result_between_refreshes():
+    calls = {'db': 0}
+
+    def db_check():
+        calls['db'] += 1
+
+    def broken_redis():
+        raise ConnectionError('down')
+
+    monitor = HealthMonitor({'db': db_check, 'redis': broken_redis, 'queue': None}, interval_seconds=60)
+    first = json.loads(monitor.ready_body())
+    second = json.loads(monitor.ready_body())
+
+    assert calls['db'] == 1
+    assert first == second
+    assert first['status'] == 'degraded'
+    assert first['redis'] == 'error'
+    assert first['queue'] == 'not_configured'
+    assert first['checks']['db']['last_success_at'] is not None
+    assert first['checks']['redis']['error'] == 'ConnectionError'
+
+
+def test_stale_results_report_degraded():
+    monitor = HealthMonitor({'db': lambda: None}, interval_seconds=60, stale_after_seconds=0)
+    assert json.loads(monitor.ready_body())['status'] == 'degraded'
+
+
+def test_ready_reports_starting_until_warm_up_finishes():
+    monitor = HealthMonitor({'db': lambda: None}, interval_seconds=60, require_warmup=True)
+    assert json.loads(monitor.ready_body())['status'] == 'starting'
+    monitor.mark_warm()
+    assert json.loads(monitor.ready_body())['status'] == 'ready'
+
+
+def test_warm_up_builds_lazy_singletons_and_survives_failing_steps():
+    from app.lazy import Lazy, registry
+    from app.warmup import run_warmup
+
+    built = []
+    singleton = Lazy(lambda: built.append('x') or object(), 'test_singleton')
+    try:
+        assert not singleton.built and built == []
+        report = run_warmup({'broken': lambda: 1 / 0})
+    finally:
+        registry.pop('test_singleton')
+
+    assert singleton.built and built == ['x']
+    assert 'ZeroDivisionError' in report.errors['broken']
+    assert {'singletons', 'db_pool', 'validators', 'text_pipeline'} <= set(report.phases)
+    assert report.total_ms >= 0
+
+
+def test_required_warm_up_steps_stop_startup():
+    from app.warmup import run_warmup
+
+    with pytest.raises(ZeroDivisionError):
+        run_warmup(required_steps={'plan_table': lambda: 1 / 0})
@@ -0,0 +1,100 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from app.db import ImportItemRecord, ImportJobRecord, ImportPayloadRecord, get_session
+from app.importer import compress_content, decode_chunks, parse_import
+from app.queue import InMemoryQueue
+
+KAKAO_EXPORT = '\n'.join([
+    '--------------- 2024년 1월 5일 금요일 ---------------',
+    '[Mina] [오후 3:12] I would like to order a coffee please.',
+    '[Jun] [오후 3:13] Sure, would you like milk with that?',
+    'It comes with a cookie too.',
+    '[Mina] [오후 3:14] 사진',
+    '[Mina] [오후 3:15] Call me at 010-1234-5678 when you would like to meet.',
+])
+
+WHATSAPP_EXPORT = '\n'.join([
+    '1/5/24, 3:12 PM - Sam: I would like to book a table.',
+    '1/5/24, 3:13 PM - Alex: <Media omitted>',
+    '1/5/24, 3:14 PM - Alex: Would you like a window seat?',
+])
+
+
+def test_parses_kakao_export_into_words_phrases_and_masked_sentences():
+    blob, _ = compress_content(KAKAO_EXPORT)
+    result = parse_import(blob, chunk_size=16)
+
+    assert result.messages == 4
+    assert result.words['like'] == 3
+    assert result.phrases['would like'] == 2
+    assert 'It comes with a cookie too.' in result.sentences
+    assert not any('010-1234-5678' in sentence for sentence in result.sentences)
+    assert result.bytes_processed == len(KAKAO_EXPORT.encode('utf-8'))
+
+
+def test_parses_whatsapp_export_and_skips_media():
+    blob, _ = compress_content(WHATSAPP_EXPORT)
+    result = parse_import(blob)
+
+    assert result.messages == 3
+    assert result.phrases['would like'] == 1
+    assert 'omitted' not in result.words
+
+
+def test_decoding_is_bounded_and_keeps_multibyte_characters_intact():
+    text = '안녕하세요 ' * 5000
+    blob, size = compress_content(text)
+    chunks = list(decode_chunks(blob, chunk_size=1000))
+
+    assert len(chunks) > 1
+    assert ''.join(chunk for chunk, _ in chunks) == text
+    assert chunks[-1][1] == size
+
+
+def test_progress_is_reported_as_bytes_are_consumed():
+    text = '\n'.join(f'[Mina] [오후 3:{i % 60:02d}] Message number {i} is here.' for i in range(2000))
+    blob, size = compress_content(text)
+    positions = []
+    parse_import(blob, chunk_size=4096, on_progress=positions.append)
+
+    assert len(positions) > 5
+    assert positions == sorted(positions)
+    assert positions[-1] <= size
+
+
+def test_worker_parses_import_and_completes_in_one_pass(monkeypatch):
+    from app import worker
+
+    job_id = str(uuid4())
+    user_id = f'import-{uuid4().hex[:8]}'
+    content, size_bytes = compress_content(KAKAO_EXPORT)
+    now = datetime.now(timezone.utc)
+    with get_session() as session:
+        session.add(ImportJobRecord(
+            job_id=job_id,
+            user_id=user_id,
+            status='queued',
+            progress_percent=0,
+            channel='daily',
+            content_sha256='0' * 64,
+            content_preview_masked='',
+            created_at=now,
+            updated_at=now,
+        ))
+        session.add(ImportPayloadRecord(job_id=job_id, user_id=user_id, content=content, size_bytes=size_bytes))
+
+    queue = InMemoryQueue({'interactive': 1})
+    queue.enqueue(job_id, user_id)
+    monkeypatch.setattr(worker, 'queue', queue)
+    assert worker.process_next_job() == job_id
+
+    with get_session() as session:
+        job = session.get(ImportJobRecord, job_id)
+        assert (job.status, job.progress_percent, job.attempts) == ('completed', 100, 0)
+        assert session.get(ImportPayloadRecord, job_id) is None
+        items = session.query(ImportItemRecord).filter_by(job_id=job_id).all()
+        kinds = {item.kind for item in items}
+        assert kinds == {'word', 'phrase', 'sentence'}
+        assert any(item.kind == 'phrase' and item.text == 'would like' and item.occurrences == 2 for item in items)
+    assert queue.metrics().main_depth == 0
@@ -0,0 +1,54 @@
+from fastapi.testclient import TestClient
+from starlette.responses import PlainTextResponse, StreamingResponse
+
+from app.config import settings
+from app.main import app
+from app.middleware import RequestContextMiddleware
+
+client = TestClient(app)
+
+
+def test_v1_prefix_request_id_and_security_headers():
+    res = client.get('/v1/health', headers={'X-Request-ID': 'req-123'})
+    assert res.status_code == 200
+    assert res.headers['x-request-id'] == 'req-123'
+    assert res.headers['x-api-version'] == 'v1'
+    assert res.headers['x-content-type-options'] == 'nosniff'
+    assert res.headers['x-frame-options'] == 'DENY'
+    assert res.headers['cache-control'] == 'no-store'
+
+    plain = client.get('/health')
+    assert plain.headers['x-api-version'] == 'unversioned'
+    assert plain.headers['x-request-id'] != 'req-123'
+
+
+def test_cors_preflight_is_cacheable():
+    origin = settings.cors_allow_origins.split(',')[0].strip()
+    res = client.options('/chat/analyze', headers={'Origin': origin, 'Access-Control-Request-Method': 'POST'})
+    assert res.status_code == 200
+    assert res.headers['access-control-max-age'] == str(settings.cors_max_age_seconds)
+    assert res.headers['x-request-id']
+
+
+async def _inner(scope, receive, send):
+    if scope['path'] == '/stream':
+        response = StreamingResponse(iter([b'a', b'b', b'c']), headers={'Cache-Control': 'max-age=60'})
+    else:
+        response = PlainTextResponse(f"{scope['path']} {scope['state']['request_id']}")
+    await response(scope, receive, send)
+
+
+def test_plain_http_rejected_but_probes_and_streams_pass():
+    wrapped = TestClient(RequestContextMiddleware(_inner, enforce_https=True, hsts_enabled=True))
+
+    rejected = wrapped.get('/anything')
+    assert rejected.status_code == 400
+    assert rejected.json() == {'detail': 'https required'}
+    assert 'strict-transport-security' in rejected.headers
+
+    probe = wrapped.get('/v1/health', headers={'X-Request-ID': 'probe'})
+    assert probe.text == '/health probe'
+
+    stream = wrapped.get('/stream', headers={'X-Forwarded-Proto': 'https'})
+    assert stream.text == 'abc'
+    assert stream.headers['cache-control'] == 'max-age=60'
@@ -0,0 +1,63 @@
+import io
+import json
+import logging
+import queue
+
+from app.observability import (
+    BatchStreamHandler,
+    DroppingQueueHandler,
+    Histogram,
+    JsonFormatter,
+    SuccessSampleFilter,
+    metrics,
+)
+
+
+def _record(msg: str, status_code: int | None = None) -> logging.LogRecord:
+    record = logging.LogRecord('app', logging.INFO, __file__, 1, msg, None, None)
+    if status_code is not None:
+        record.status_code = status_code
+    return record
+
+
+def test_success_sampling_only_drops_2xx_request_lines():
+    sampler = SuccessSampleFilter(sample_rate=0.0)
+    assert not sampler.filter(_record('request completed', 200))
+    assert sampler.filter(_record('request completed', 500))
+    assert sampler.filter(_record('worker job processed'))
+
+
+def test_full_log_queue_counts_drops():
+    before = metrics.snapshot()['log_records']['dropped']
+    handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+    handler.handle(_record('first'))
+    handler.handle(_record('second'))
+    assert metrics.snapshot()['log_records']['dropped'] - before == 1
+
+
+def test_batch_handler_writes_json_lines_on_flush():
+    stream = io.StringIO()
+    handler = BatchStreamHandler(stream, batch_size=10)
+    handler.setFormatter(JsonFormatter())
+    handler.handle(_record('request completed', 200))
+    handler.handle(_record('request failed', 500))
+    assert stream.getvalue() == ''
+
+    handler.flush()
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [line['status_code'] for line in lines] == [200, 500]
+
+
+def test_histogram_exports_cumulative_buckets():
+    histogram = Histogram((1, 10))
+    for value in (0.5, 5, 5, 50):
+        histogram.observe(value)
+
+    lines = histogram.to_prometheus('app_queue_wait_seconds', 'lane="bulk"')
+    assert lines == [
+        'app_queue_wait_seconds_bucket{lane="bulk",le="1"} 1',
+        'app_queue_wait_seconds_bucket{lane="bulk",le="10"} 3',
+        'app_queue_wait_seconds_bucket{lane="bulk",le="+Inf"} 4',
+        'app_queue_wait_seconds_sum{lane="bulk"} 60.5',
+        'app_queue_wait_seconds_count{lane="bulk"} 4',
+    ]
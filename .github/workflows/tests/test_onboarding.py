@@ -0,0 +1,49 @@
+import json
+import os
+
+from app.onboarding import PlanRules, PlanTable, etag_matches, load_plan_rules
+
+
+def test_builtin_rules_match_original_formula():
+    table = PlanTable()
+    table.build(PlanRules())
+    plan = json.loads(table.lookup('business', 'Klingon', 10).body)
+    assert (plan['words_count'], plan['sentences_count'], plan['chat_turns']) == (8, 3, 2)
+    assert len(table) == 3 * 116
+
+
+def test_rules_file_overrides_by_goal_and_language(tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps({
+        'version': 'test',
+        'goal_types': {'business': {'words_per_minute': 2}},
+        'languages': {'Japanese': {'min_chat_turns': 9}},
+    }), encoding='utf-8')
+    table = PlanTable()
+    table.build(load_plan_rules(str(path)))
+
+    business = table.lookup('business', 'Japanese', 10)
+    plan = json.loads(business.body)
+    assert (plan['words_count'], plan['chat_turns']) == (20, 9)
+    assert table.lookup('daily', 'English', 10).etag != business.etag
+    assert etag_matches(f'"x", {business.etag}', business.etag)
+
+
+def test_every_process_picks_up_a_changed_rules_file(tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps({'version': 'v1'}), encoding='utf-8')
+    # two tables stand in for two worker processes serving the same rules file
+    first, second = PlanTable(str(path), check_interval_seconds=0), PlanTable(str(path), check_interval_seconds=0)
+    before = first.lookup('business', 'English', 10).etag
+    assert second.lookup('business', 'English', 10).etag == before
+
+    path.write_text(json.dumps({'version': 'v2', 'goal_types': {'business': {'words_per_minute': 2}}}), encoding='utf-8')
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 1_000_000_000))
+    after = first.lookup('business', 'English', 10).etag
+    assert after != before and second.lookup('business', 'English', 10).etag == after
+    assert (first.rules_version, second.rules_version) == ('v2', 'v2')
+
+    # a half-written file leaves the last good table in place
+    path.write_text('{"version": ', encoding='utf-8')
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 2_000_000_000))
+    assert first.lookup('business', 'English', 10).etag == after
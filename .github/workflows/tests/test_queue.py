@@ -0,0 +1,202 @@
+import sys
+import threading
+import time
+
+import pytest
+
+from app import queue as queue_module
+from app.queue import InMemoryQueue, WeightedLanePicker, parse_lanes
+
+
+def test_users_are_served_round_robin_within_a_lane():
+    queue = InMemoryQueue({'interactive': 1})
+    for i in range(100):
+        queue.enqueue(f'bulk-{i}', 'bulk-user')
+    queue.enqueue('first', 'new-user')
+
+    served = [queue.dequeue().job_id for _ in range(3)]
+    assert served == ['bulk-0', 'first', 'bulk-1']
+
+
+def test_lanes_are_interleaved_by_weight_and_reported_separately():
+    queue = InMemoryQueue(parse_lanes('interactive:3,bulk:1'))
+    for i in range(8):
+        queue.enqueue(f'i{i}', f'u{i}', 'interactive')
+        queue.enqueue(f'b{i}', 'bulk-user', 'bulk')
+
+    snapshot = queue.metrics()
+    assert snapshot.main_depth == 16
+    assert {name: lane.depth for name, lane in snapshot.lanes.items()} == {'interactive': 8, 'bulk': 8}
+
+    lanes = [queue.dequeue().lane for _ in range(8)]
+    assert lanes.count('interactive') == 6 and lanes.count('bulk') == 2
+
+
+def test_empty_lane_does_not_bank_credit():
+    picker = WeightedLanePicker({'interactive': 4, 'bulk': 1})
+    for _ in range(10):
+        assert picker.pick(['bulk']) == 'bulk'
+    picks = [picker.pick(['interactive', 'bulk']) for _ in range(5)]
+    assert picks.count('interactive') == 4
+
+
+@pytest.fixture
+def frequent_thread_switches():
+    # switch threads far more often than usual so unguarded read-modify-write sequences interleave
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def test_concurrent_producers_consumers_and_metrics_keep_the_queue_consistent(frequent_thread_switches):
+    queue = InMemoryQueue(parse_lanes('interactive:3,bulk:1'))
+    produced, consumed, errors = 40000, [], []
+    consumed_lock = threading.Lock()
+    done = threading.Event()
+
+    def guarded(fn):
+        def run():
+            try:
+                fn()
+            except Exception as exc:  # pragma: no cover - only reached on a regression
+                errors.append(exc)
+        return run
+
+    def produce(offset):
+        for i in range(produced // 2):
+            queue.enqueue(f'{offset}-{i}', f'u{i % 7}', 'bulk' if i % 3 else 'interactive')
+
+    def consume():
+        while not done.is_set() or queue.metrics().main_depth:
+            job = queue.dequeue()
+            if job is not None:
+                with consumed_lock:
+                    consumed.append(job.job_id)
+
+    def read_metrics():
+        while not done.is_set():
+            queue.metrics()
+
+    producers = [threading.Thread(target=guarded(lambda o=o: produce(o))) for o in ('a', 'b')]
+    others = [threading.Thread(target=guarded(consume)) for _ in range(4)] + [threading.Thread(target=guarded(read_metrics))]
+    for thread in producers + others:
+        thread.start()
+    for thread in producers:
+        thread.join()
+    done.set()
+    for thread in others:
+        thread.join(timeout=10)
+
+    assert errors == []
+    assert len(consumed) == len(set(consumed)) == produced
+    assert queue.metrics().main_depth == 0 and queue.dequeue() is None
+
+
+def test_worker_records_enqueue_to_start_wait(monkeypatch):
+    from app import worker
+    from app.observability import metrics
+
+    queue = InMemoryQueue({'interactive': 1})
+    queue.enqueue('missing-job', 'someone')
+    monkeypatch.setattr(worker, 'queue', queue)
+
+    before = metrics.snapshot()['queue_latency_seconds']['enqueue_to_start'].get('interactive', {'count': 0})['count']
+    worker.process_next_job()
+    after = metrics.snapshot()['queue_latency_seconds']['enqueue_to_start']['interactive']['count']
+    assert after == before + 1
+
+
+def _queued_job(user_id, age_seconds=0, lane=None):
+    from datetime import datetime, timedelta, timezone
+    from uuid import uuid4
+
+    from app.db import ImportJobRecord, get_session
+
+    job_id = str(uuid4())
+    at = datetime.now(timezone.utc) - timedelta(seconds=age_seconds)
+    with get_session() as session:
+        session.add(ImportJobRecord(
+            job_id=job_id,
+            user_id=user_id,
+            status='queued',
+            channel='daily',
+            lane=lane,
+            content_sha256='0' * 64,
+            content_preview_masked='',
+            created_at=at,
+            updated_at=at,
+        ))
+    return job_id
+
+
+def test_duplicate_delivery_is_dropped_without_ending_the_batch(monkeypatch):
+    from app import worker
+
+    first, second = _queued_job('dup-user'), _queued_job('dup-user')
+    queue = InMemoryQueue({'interactive': 1})
+    for job_id in (first, first, second):
+        queue.enqueue(job_id, 'dup-user')
+    monkeypatch.setattr(worker, 'queue', queue)
+
+    calls = []
+    monkeypatch.setattr(worker, '_run_import', lambda job_id, user_id, preview: calls.append(job_id))
+    assert worker.process_batch(max_jobs=10) == [first, first, second]
+    assert calls == [first, second]
+
+
+def test_stale_queued_jobs_are_requeued_once_into_their_own_lane(monkeypatch):
+    from app import worker
+
+    stale, fresh = _queued_job('sweep-user', age_seconds=3600, lane='bulk'), _queued_job('sweep-user')
+    legacy = _queued_job('sweep-user', age_seconds=3600)
+    queue = InMemoryQueue({'interactive': 3, 'bulk': 1})
+    monkeypatch.setattr(worker, 'queue', queue)
+
+    assert worker.requeue_stale_jobs(older_than_seconds=600) >= 2
+    queued = {}
+    while (entry := queue.dequeue()) is not None:
+        queued[entry.job_id] = entry.lane
+    assert queued[stale] == 'bulk' and fresh not in queued
+    # a row from before lanes were stored is not promoted ahead of bulk work
+    assert queued[legacy] == 'bulk'
+    # the sweep touched the rows it pushed, so the next one leaves them alone
+    assert worker.requeue_stale_jobs(older_than_seconds=600) == 0
+
+
+def test_jobs_waiting_behind_a_backed_up_lane_are_not_pushed_again(monkeypatch):
+    from app import worker
+
+    now = time.time()
+    waiting = _queued_job('backlog-user', age_seconds=1800, lane='bulk')
+    queue = InMemoryQueue({'interactive': 3, 'bulk': 1})
+    # the head of the bulk lane has been waiting an hour, so a half-hour-old job there is not lost
+    monkeypatch.setattr(queue_module.time, 'time', lambda: now - 3600)
+    queue.enqueue('head-of-lane', 'other-user', 'bulk')
+    monkeypatch.undo()
+    queue.enqueue(waiting, 'backlog-user', 'bulk')
+    monkeypatch.setattr(worker, 'queue', queue)
+
+    assert worker.requeue_stale_jobs(older_than_seconds=600) == 0
+    assert queue.metrics().main_depth == 2
+
+
+def test_job_deleted_while_running_is_dropped_without_retry(monkeypatch):
+    from app import worker
+    from app.db import ImportJobRecord, get_session
+
+    job_id = _queued_job('erased-user')
+    queue = InMemoryQueue({'interactive': 1})
+    queue.enqueue(job_id, 'erased-user')
+    monkeypatch.setattr(worker, 'queue', queue)
+
+    def erase_then_fail(job_id, user_id, preview):
+        # DELETE /me/data lands mid-import and takes the payload with it
+        with get_session() as session:
+            session.delete(session.get(ImportJobRecord, job_id))
+        raise RuntimeError('import payload missing')
+
+    monkeypatch.setattr(worker, '_run_import', erase_then_fail)
+    assert worker.process_next_job() == job_id
+    snapshot = queue.metrics()
+    assert (snapshot.main_depth, snapshot.dlq_depth) == (0, 0)
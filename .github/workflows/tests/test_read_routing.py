@@ -0,0 +1,55 @@
+import threading
+import time
+
+from sqlalchemy import create_engine
+
+from app.db import ReadRouter
+
+
+def test_reads_go_to_replicas_except_right_after_a_write(tmp_path):
+    primary = create_engine(f'sqlite:///{tmp_path}/primary.db')
+    replica = create_engine(f'sqlite:///{tmp_path}/replica.db')
+    router = ReadRouter(primary, [replica], read_your_writes_seconds=60)
+
+    assert router.engine_for('alice') == ('replica_0', replica)
+    router.mark_write('alice')
+    assert router.engine_for('alice') == ('primary_read_your_writes', primary)
+    assert router.engine_for('bob') == ('replica_0', replica)
+
+
+def test_unreachable_replica_falls_back_to_primary(tmp_path):
+    primary = create_engine(f'sqlite:///{tmp_path}/primary.db')
+    broken = create_engine(f'sqlite:///{tmp_path}/missing/dir/replica.db')
+    router = ReadRouter(primary, [broken])
+
+    assert router.engine_for('alice') == ('primary_fallback', primary)
+    assert router.status() == [{'name': 'replica_0', 'healthy': False, 'lag_seconds': None}]
+
+
+def test_without_replicas_everything_reads_from_primary(tmp_path):
+    primary = create_engine(f'sqlite:///{tmp_path}/primary.db')
+    router = ReadRouter(primary)
+    router.mark_write('alice')
+    assert router.engine_for('alice') == ('primary', primary)
+
+
+def test_background_checker_keeps_lag_probes_off_the_request_path(tmp_path, monkeypatch):
+    primary = create_engine(f'sqlite:///{tmp_path}/primary.db')
+    replica = create_engine(f'sqlite:///{tmp_path}/replica.db')
+    router = ReadRouter(primary, [replica], lag_check_interval_seconds=60)
+    # an unchecked replica takes no reads
+    assert router.status() == [{'name': 'replica_0', 'healthy': False, 'lag_seconds': None}]
+
+    probes = []
+    measure = router._measure_lag
+    monkeypatch.setattr(router, '_measure_lag', lambda state: (probes.append(threading.current_thread().name), measure(state)))
+    router.start()
+    try:
+        deadline = time.monotonic() + 5
+        while not router.status()[0]['healthy'] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert router.engine_for('alice') == ('replica_0', replica)
+        assert router.engine_for('bob') == ('replica_0', replica)
+    finally:
+        router.stop()
+    assert probes == ['replica-lag-checker']
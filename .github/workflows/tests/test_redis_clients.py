@@ -0,0 +1,154 @@
+import pytest
+
+from app.observability import metrics
+from app.queue import OutboxQueue, QueueUnavailable
+from app.rate_limit import FallbackRateLimiter, InMemoryRateLimiter, RedisRateLimiter
+from app.redis_clients import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, GuardedRedis
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FlakyRedis:
+    def __init__(self):
+        self.down = False
+        self.calls = 0
+        self.counts = {}
+
+    def _check(self):
+        self.calls += 1
+        if self.down:
+            raise ConnectionError('redis down')
+
+    def incr(self, key):
+        self._check()
+        self.counts[key] = self.counts.get(key, 0) + 1
+        return self.counts[key]
+
+    def expire(self, key, seconds):
+        self._check()
+
+    def get(self, key):
+        self._check()
+        raise ValueError('WRONGTYPE')
+
+
+def test_breaker_opens_fails_fast_and_closes_after_a_good_trial():
+    clock = Clock()
+    breaker = CircuitBreaker('test_redis', failure_threshold=2, reset_seconds=10, clock=clock)
+    raw = FlakyRedis()
+    client = GuardedRedis(raw, breaker)
+
+    raw.down = True
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            client.incr('a')
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        client.incr('a')
+    assert raw.calls == 2
+
+    # the single trial after the reset window fails, so the breaker opens again
+    clock.now = 10
+    with pytest.raises(ConnectionError):
+        client.incr('a')
+    assert breaker.state == OPEN
+
+    raw.down = False
+    clock.now = 20
+    # an error reply still proves Redis is reachable
+    with pytest.raises(ValueError):
+        client.get('a')
+    assert breaker.state == CLOSED
+    snapshot = metrics.snapshot()['circuit_breakers']['test_redis']
+    assert snapshot['state'] == CLOSED and snapshot['rejected'] == 1
+
+
+def test_half_open_breaker_lets_a_single_trial_through():
+    clock = Clock()
+    breaker = CircuitBreaker('test_trial', failure_threshold=1, reset_seconds=5, clock=clock)
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    clock.now = 5
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.allow() and breaker.state == CLOSED
+
+
+def test_rate_limiter_falls_back_to_local_counts_while_redis_is_down():
+    raw = FlakyRedis()
+    breaker = CircuitBreaker('test_rate_limit', failure_threshold=1, reset_seconds=60)
+    limiter = FallbackRateLimiter(RedisRateLimiter(GuardedRedis(raw, breaker), per_minute=2), InMemoryRateLimiter(2))
+    before = metrics.snapshot()['redis_fallbacks'].get('rate_limit', 0)
+
+    assert limiter.allow('u')
+    raw.down = True
+    assert [limiter.allow('u') for _ in range(3)] == [True, True, False]
+    assert raw.calls == 3
+    assert metrics.snapshot()['redis_fallbacks']['rate_limit'] - before == 3
+
+
+class FlakyQueue:
+    def __init__(self):
+        self.down = False
+        self.pushed = []
+
+    def enqueue(self, job_id, user_id='', lane=None):
+        if self.down:
+            raise CircuitOpenError('open')
+        self.pushed.append(job_id)
+
+    def ping(self):
+        if self.down:
+            raise CircuitOpenError('open')
+        return True
+
+
+def test_outbox_buffers_jobs_and_pushes_them_in_order_on_recovery():
+    inner = FlakyQueue()
+    queue = OutboxQueue(inner, max_pending=2)
+
+    queue.enqueue('a')
+    inner.down = True
+    queue.enqueue('b')
+    queue.enqueue('c')
+    with pytest.raises(QueueUnavailable):
+        queue.enqueue('d')
+    assert queue.outbox_depth == 2 and metrics.snapshot()['queue_outbox_depth'] == 2
+
+    inner.down = False
+    assert queue.ping()
+    queue.enqueue('e')
+    assert inner.pushed == ['a', 'b', 'c', 'e']
+    assert queue.outbox_depth == 0
+
+
+def test_import_fails_cleanly_when_the_outbox_is_full(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app import main
+    from app.db import ImportJobRecord, get_session
+    from app.security import create_access_token
+
+    def full(*args, **kwargs):
+        raise QueueUnavailable('full')
+
+    monkeypatch.setattr(main.queue, 'enqueue', full)
+    headers = {'Authorization': f'Bearer {create_access_token("outbox_full_user")}', 'Idempotency-Key': 'outbox-full'}
+    client = TestClient(main.app)
+
+    res = client.post('/import', json={'channel': 'daily', 'content': 'hello there'}, headers=headers)
+    assert res.status_code == 503
+    with get_session() as session:
+        statuses = {job.status for job in session.query(ImportJobRecord).filter_by(user_id='outbox_full_user')}
+    assert statuses == {'failed'}
+
+    monkeypatch.undo()
+    assert client.post('/import', json={'channel': 'daily', 'content': 'hello there'}, headers=headers).status_code == 200
@@ -0,0 +1,46 @@
+from datetime import datetime, timezone
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+
+from app import responses
+from app.responses import FastJSONResponse, TrustedModelRoute, dumps
+from app.schemas import ImportJob, ImportListResponse
+
+CREATED = datetime(2026, 3, 1, 12, 30, 5, 123000, tzinfo=timezone.utc)
+
+
+class LeakyJob(ImportJob):
+    secret: str = 'do-not-send'
+
+
+def _client(route_class) -> TestClient:
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.router.route_class = route_class
+
+    @app.get('/jobs', response_model=ImportListResponse)
+    def jobs() -> ImportListResponse:
+        job = ImportJob(job_id='j1', status='completed', progress_percent=100, created_at=CREATED)
+        return ImportListResponse(items=[job], total=1, offset=0, limit=20)
+
+    @app.get('/leaky', response_model=ImportJob)
+    def leaky() -> ImportJob:
+        return LeakyJob(job_id='j2', status='queued', progress_percent=0, created_at=CREATED)
+
+    return TestClient(app)
+
+
+def test_trusted_route_matches_the_validated_response():
+    trusted, regular = _client(TrustedModelRoute), _client(APIRoute)
+    assert trusted.get('/jobs').content == regular.get('/jobs').content
+    assert trusted.get('/jobs').json()['items'][0]['created_at'] == '2026-03-01T12:30:05.123000Z'
+    # a subclass is not trusted, so the response model still filters it
+    assert 'secret' not in trusted.get('/leaky').json()
+
+
+def test_dumps_fallback_writes_the_same_json(monkeypatch):
+    payload = {'items': [{'job_id': '한글', 'created_at': CREATED}], 'total': 1}
+    fast = dumps(payload)
+    monkeypatch.setattr(responses, 'orjson', None)
+    assert dumps(payload) == fast
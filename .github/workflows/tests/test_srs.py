@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+
+from app.db import ReviewCardRecord, get_session
+from app.srs import (
+    CardState,
+    ReviewConflict,
+    Sm2Parameters,
+    add_cards,
+    due_cards,
+    record_review,
+    reschedule_cards,
+    schedule,
+)
+
+PARAMS = Sm2Parameters()
+NOW = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+
+def test_sm2_intervals_grow_with_ease_and_reset_on_lapse():
+    state = CardState(2.5, 0.0, 0, 0)
+    intervals = []
+    for _ in range(4):
+        state, due_at = schedule(state, 4, NOW, PARAMS)
+        intervals.append(state.interval_days)
+    assert intervals == [1.0, 6.0, 15.0, 37.5]
+    assert due_at == NOW + timedelta(days=37.5)
+
+    lapsed, due_at = schedule(state, 1, NOW, PARAMS)
+    assert (lapsed.repetitions, lapsed.lapses) == (0, 1)
+    assert lapsed.ease < state.ease
+    assert due_at - NOW == timedelta(minutes=10)
+
+
+def test_ease_never_drops_below_minimum_and_interval_is_capped():
+    state = CardState(1.3, 300.0, 5, 0)
+    state, _ = schedule(state, 3, NOW, PARAMS)
+    assert state.ease == PARAMS.min_ease
+    assert state.interval_days == PARAMS.max_interval_days
+
+
+def test_due_cards_come_back_in_due_order_and_review_is_guarded():
+    user_id = f'srs-{uuid4().hex[:8]}'
+    rows = add_cards(user_id, [('would like', None), ('book a table', 'reserve')], now=NOW - timedelta(hours=1))
+    first = rows[0]['card_id']
+
+    assert [card.front for card in due_cards(user_id, 10, now=NOW, primary=True)] == ['would like', 'book a table']
+
+    reviewed = record_review(user_id, first, 5, now=NOW)
+    assert reviewed.repetitions == 1 and reviewed.reviews == 1
+    assert [card.card_id for card in due_cards(user_id, 10, now=NOW, primary=True)] == [rows[1]['card_id']]
+    assert record_review('someone-else', first, 5, now=NOW) is None
+
+
+
+def test_concurrent_review_of_the_same_card_is_rejected(monkeypatch):
+    from app import srs
+
+    user_id = f'srs-{uuid4().hex[:8]}'
+    card_id = add_cards(user_id, [('would like', None)], now=NOW)[0]['card_id']
+    real_schedule = srs.schedule
+
+    def racing_schedule(*args):
+        # another submit for the same card commits between our read and our write
+        with get_session() as session:
+            session.get(ReviewCardRecord, card_id).reviews += 1
+        return real_schedule(*args)
+
+    monkeypatch.setattr(srs, 'schedule', racing_schedule)
+    with pytest.raises(ReviewConflict):
+        record_review(user_id, card_id, 5, now=NOW)
+
+
+def test_bulk_reschedule_scales_reviewed_cards_only():
+    user_id = f'srs-{uuid4().hex[:8]}'
+    rows = add_cards(user_id, [(f'card {i}', None) for i in range(5)], now=NOW)
+    for row in rows[:3]:
+        record_review(user_id, row['card_id'], 4, now=NOW)
+        record_review(user_id, row['card_id'], 4, now=NOW)
+
+    changed = reschedule_cards(PARAMS, Sm2Parameters(interval_modifier=0.5), user_id=user_id, batch_size=2)
+    assert changed == 3
+
+    with get_session() as session:
+        cards = {card.card_id: card for card in session.query(ReviewCardRecord).filter_by(user_id=user_id)}
+        for row in rows[:3]:
+            assert cards[row['card_id']].interval_days == 3.0
+        assert all(cards[row['card_id']].interval_days == 0.0 for row in rows[3:])
+
+
+def test_reschedule_does_not_overwrite_a_review_that_lands_mid_batch(monkeypatch):
+    from app import srs
+
+    user_id = f'srs-{uuid4().hex[:8]}'
+    rows = add_cards(user_id, [(f'card {i}', None) for i in range(2)], now=NOW)
+    for row in rows:
+        record_review(user_id, row['card_id'], 4, now=NOW)
+        record_review(user_id, row['card_id'], 4, now=NOW)
+    raced = rows[0]['card_id']
+
+    real_rescale = srs._rescale
+
+    def review_then_rescale(*args):
+        # the user reviews a card after the batch was read but before it is written back
+        record_review(user_id, raced, 4, now=NOW)
+        return real_rescale(*args)
+
+    monkeypatch.setattr(srs, '_rescale', review_then_rescale)
+    assert reschedule_cards(PARAMS, Sm2Parameters(interval_modifier=0.5), user_id=user_id) == 1
+
+    with get_session() as session:
+        cards = {card.card_id: card for card in session.query(ReviewCardRecord).filter_by(user_id=user_id)}
+        assert (cards[raced].reviews, cards[raced].interval_days) == (3, 15.0)
+        assert cards[rows[1]['card_id']].interval_days == 3.0
@@ -0,0 +1,132 @@
+from uuid import uuid4
+
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+
+from app import token_store as token_store_module
+from app.main import app
+from app.observability import metrics
+from app.security import create_access_token, create_refresh_token, decode_token
+from app.token_store import RedisTokenStore, TokenStoreUnavailable, issue_refresh_token
+
+client = TestClient(app)
+
+
+def _refresh(token: str):
+    return client.post('/auth/refresh', json={'refresh_token': token})
+
+
+def test_reusing_a_rotated_token_revokes_the_whole_family():
+    user_id = f'family_{uuid4().hex[:8]}'
+    family = uuid4().hex
+    first = create_refresh_token(user_id, family=family)
+
+    second = _refresh(first).json()['refresh_token']
+    assert decode_token(second, expected_type='refresh')['fam'] == family
+    third = _refresh(second).json()['refresh_token']
+
+    # a stolen copy of an earlier token is replayed: it fails and takes the live token down with it
+    assert _refresh(first).status_code == 401
+    assert _refresh(third).status_code == 401
+
+
+def test_tokens_from_before_families_rotate_once_onto_a_family():
+    legacy = create_refresh_token(f'legacy_{uuid4().hex[:8]}')
+    assert 'fam' not in jwt.decode(legacy, options={'verify_signature': False})
+
+    res = _refresh(legacy)
+    assert res.status_code == 200
+    assert decode_token(res.json()['refresh_token'], expected_type='refresh')['fam']
+    assert _refresh(legacy).status_code == 401
+
+
+class DownRedis:
+    def register_script(self, script):
+        def run(keys, args):
+            raise ConnectionError('redis down')
+
+        return run
+
+    def set(self, *args, **kwargs):
+        raise ConnectionError('redis down')
+
+    def delete(self, *args):
+        raise ConnectionError('redis down')
+
+
+def test_redis_outage_fails_rotation_closed():
+    store = RedisTokenStore(DownRedis())
+    before = metrics.snapshot()['refresh_tokens']['redis_error']
+    payload = decode_token(create_refresh_token(f'outage_{uuid4().hex[:8]}', family=uuid4().hex), expected_type='refresh')
+
+    store.start(payload['fam'], payload['sub'], payload['jti'])
+    for _ in range(2):
+        with pytest.raises(TokenStoreUnavailable):
+            store.rotate(payload, str(uuid4()))
+    assert metrics.snapshot()['refresh_tokens']['redis_error'] - before == 3
+
+
+class FlakyRedis:
+    # enough of redis.Redis for the token store, running the rotate script's logic in Python
+    def __init__(self):
+        self.down = False
+        self.values = {}
+
+    def _check(self):
+        if self.down:
+            raise ConnectionError('redis down')
+
+    def register_script(self, script):
+        def run(keys, args):
+            self._check()
+            current = self.values.get(keys[0])
+            if current is None:
+                return 0
+            if current == args[0]:
+                self.values[keys[0]] = args[1]
+                return 1
+            del self.values[keys[0]]
+            return 2
+
+        return run
+
+    def set(self, key, value, ex=None):
+        self._check()
+        self.values[key] = value
+
+    def delete(self, key):
+        self._check()
+        self.values.pop(key, None)
+
+
+def test_logout_during_an_outage_still_holds_after_redis_recovers(monkeypatch):
+    redis = FlakyRedis()
+    monkeypatch.setattr(token_store_module, 'token_store', RedisTokenStore(redis))
+    user_id = f'outage_logout_{uuid4().hex[:8]}'
+    refresh_token = issue_refresh_token(user_id)
+    headers = {'Authorization': f'Bearer {create_access_token(user_id)}'}
+
+    redis.down = True
+    assert client.post('/auth/logout', headers=headers, json={'refresh_token': refresh_token}).status_code == 204
+
+    redis.down = False
+    assert _refresh(refresh_token).status_code == 401
+    assert redis.values == {}
+
+
+def test_logout_with_redis_up_still_holds_during_a_later_outage(monkeypatch):
+    redis = FlakyRedis()
+    monkeypatch.setattr(token_store_module, 'token_store', RedisTokenStore(redis))
+    user_id = f'logout_then_outage_{uuid4().hex[:8]}'
+    logged_out = issue_refresh_token(user_id)
+    headers = {'Authorization': f'Bearer {create_access_token(user_id)}'}
+    assert client.post('/auth/logout', headers=headers, json={'refresh_token': logged_out}).status_code == 204
+
+    rotated = issue_refresh_token(user_id)
+    assert _refresh(rotated).status_code == 200
+
+    redis.down = True
+    assert _refresh(logged_out).status_code == 401
+    # an already rotated (possibly stolen) token cannot be checked without Redis, so it is refused
+    assert _refresh(rotated).status_code == 503
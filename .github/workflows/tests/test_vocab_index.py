@@ -0,0 +1,115 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from sqlalchemy import delete
+
+from app import vocab_index as vocab_module
+from app.db import ImportItemRecord, ImportJobRecord, get_session
+from app.vocab_index import TermCounts, VocabularyIndex
+
+
+def _store_items(user_id, job_id, items):
+    # as the worker does: the items commit together with the job's completion
+    now = datetime.now(timezone.utc)
+    with get_session() as session:
+        session.add(ImportJobRecord(
+            job_id=job_id,
+            user_id=user_id,
+            status='completed',
+            progress_percent=100,
+            channel='daily',
+            content_sha256='0' * 64,
+            content_preview_masked='',
+            created_at=now,
+            updated_at=now,
+        ))
+        session.add_all(
+            ImportItemRecord(job_id=job_id, user_id=user_id, kind=kind, text=text, occurrences=count, created_at=now)
+            for kind, text, count in items
+        )
+
+
+def test_top_k_orders_by_count_then_first_seen():
+    counts = TermCounts()
+    for term_id, count in [(7, 3), (8, 5), (9, 3), (10, 1)]:
+        counts.add(term_id, count)
+    counts.add(10, 4)
+
+    assert counts.top(3) == [(8, 5), (10, 5), (7, 3)]
+    assert counts.top(10, min_count=4) == [(8, 5), (10, 5)]
+    assert counts.get(10) == 5 and counts.get(99) == 0
+
+
+def test_top_k_matches_without_numpy(monkeypatch):
+    counts = TermCounts()
+    for term_id in range(5000):
+        counts.add(term_id, (term_id * 7919) % 1000)
+    expected = counts.top(25)
+
+    monkeypatch.setattr(vocab_module, 'numpy', None)
+    assert counts.top(25) == expected
+    assert [count for _, count in expected] == sorted((count for _, count in expected), reverse=True)
+
+
+def test_term_ids_are_per_user_and_the_strings_are_shared():
+    index = VocabularyIndex(max_users=2)
+    for user_id in ('a', 'b'):
+        index._vocabulary(user_id, create=True).refreshed_at = float('inf')
+        index.merge(user_id, 'job', [('phrase', ''.join(['would ', 'like']), 2), ('word', 'coffee', 1)])
+
+    first, second = index._users['a'].interner, index._users['b'].interner
+    assert len(first) == len(second) == 2
+    assert first[first.lookup('would like')] is second[second.lookup('would like')]
+    assert index.top('a', 'phrase') == [('would like', 2)]
+
+    # evicting a user drops its interner with it, so the LRU bound also bounds the terms held
+    index._vocabulary('c', create=True)
+    assert list(index._users) == ['a', 'c'] and len(index._users['c'].interner) == 0
+
+
+def test_refresh_merges_each_completed_import_once():
+    user_id = f'vocab-{uuid4().hex[:8]}'
+    index = VocabularyIndex(refresh_seconds=0)
+    _store_items(user_id, 'job-1', [('phrase', 'would like', 2), ('phrase', 'of the', 9), ('word', 'coffee', 3), ('sentence', 'Hello there you.', 1)])
+
+    assert index.top(user_id, 'phrase') == [('would like', 2)]
+    assert index.top(user_id, 'word') == [('coffee', 3)]
+
+    _store_items(user_id, 'job-2', [('phrase', 'would like', 1), ('phrase', 'book a table', 4)])
+    assert index.top(user_id, 'phrase') == [('book a table', 4), ('would like', 3)]
+    assert index.lookup(user_id, 'phrase', ['would like', 'unknown']) == {'would like': 3, 'unknown': 0}
+    assert index.imports(user_id) == 2
+
+    # the worker's in-process merge and the database refresh never double count a job
+    assert index.merge(user_id, 'job-2', [('phrase', 'would like', 1)])
+    assert index.top(user_id, 'phrase', limit=1) == [('book a table', 4)]
+    assert index.lookup(user_id, 'phrase', ['would like'])['would like'] == 3
+
+    index.forget(user_id)
+    assert not index.merge(user_id, 'job-3', [('phrase', 'would like', 1)])
+    assert len(index) == 0
+
+
+def test_least_recently_used_users_are_evicted():
+    index = VocabularyIndex(max_users=2, refresh_seconds=3600)
+    for user_id in ('a', 'b', 'c'):
+        index._vocabulary(user_id, create=True)
+    assert list(index._users) == ['b', 'c']
+
+
+def test_erasure_in_another_process_drops_the_held_vocabulary():
+    user_id = f'vocab-{uuid4().hex[:8]}'
+    first, second = VocabularyIndex(refresh_seconds=0), VocabularyIndex(refresh_seconds=0)
+    _store_items(user_id, f'job-{uuid4().hex[:8]}', [('phrase', 'would like', 2)])
+    assert first.top(user_id, 'phrase') == second.top(user_id, 'phrase') == [('would like', 2)]
+
+    # DELETE /me/data served by the first process, then the id is registered again
+    with get_session() as session:
+        session.execute(delete(ImportItemRecord).where(ImportItemRecord.user_id == user_id))
+        session.execute(delete(ImportJobRecord).where(ImportJobRecord.user_id == user_id))
+    first.forget(user_id)
+    assert second.top(user_id, 'phrase') == []
+
+    _store_items(user_id, f'job-{uuid4().hex[:8]}', [('phrase', 'book a table', 1)])
+    assert second.top(user_id, 'phrase') == [('book a table', 1)]
+    assert second.imports(user_id) == 1